@@ -0,0 +1,208 @@
+"""
+Admission control for LLM calls.
+
+At most `limit` calls are in flight at once. Callers beyond that wait in a bounded queue that is
+served round-robin across clients, so one client sending a burst (a large batch, a retry loop)
+cannot starve everyone else. When the queue, or a client's share of it, is full the call is
+rejected at once with Overloaded, which the routes turn into 429 + Retry-After.
+
+The limit adapts to the provider (additive increase, multiplicative decrease): it grows by about
+one per `limit` fast completions while the cap is actually binding, and shrinks by DECREASE_FACTOR
+on a provider 429 or a call slower than target_latency, at most once per observed call latency so
+one slow burst counts as one signal.
+
+Flask runs each async view on its own event loop (and long calls run on the background loop), so
+the controller is guarded by a threading.Lock and wakes waiters on whichever loop they wait on.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+from backend.metrics import REGISTRY
+
+DECREASE_FACTOR = 0.75
+# Weight of the newest sample in the latency moving average
+LATENCY_EWMA_ALPHA = 0.2
+MAX_RETRY_AFTER = 60
+
+ADMISSION_WAIT = REGISTRY.histogram(
+    "gpt_admission_wait_seconds", "Time LLM calls spent queued for an admission slot.")
+ADMISSION_REJECTIONS = REGISTRY.counter(
+    "gpt_admission_rejections_total", "LLM calls turned away by admission control.", ("reason",))
+
+
+class Overloaded(Exception):
+    """No slot for this call; retry_after is a whole-second estimate of when one will be free."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"LLM capacity exhausted ({reason}); retry in {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def is_rate_limit(error: BaseException) -> bool:
+    # pydantic-ai raises ModelHTTPError for provider errors; check the status without importing it
+    return getattr(error, "status_code", None) == 429
+
+
+class _Waiter:
+    __slots__ = ("loop", "future", "granted")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.future = loop.create_future()
+        self.granted = False
+
+
+def _wake(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+class AdmissionController:
+    def __init__(self, limit: int = 16, min_limit: int = 1, max_limit: int = 64, max_queue: int = 64,
+                 max_queue_per_client: int = 16, queue_timeout: float = 5.0, target_latency: float = 8.0):
+        self.limit = float(min(max(limit, min_limit), max_limit))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.max_queue_per_client = max_queue_per_client
+        self.queue_timeout = queue_timeout
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self.queued = 0
+        self.latency = target_latency / 2
+        self._queues: OrderedDict[str, deque[_Waiter]] = OrderedDict()
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    def _retry_after_locked(self) -> int:
+        # Time for the queue ahead (plus this call) to drain at the current limit
+        seconds = (self.queued + 1) * self.latency / max(int(self.limit), 1)
+        return min(max(math.ceil(seconds), 1), MAX_RETRY_AFTER)
+
+    def _rejection_locked(self, client: str) -> Overloaded | None:
+        if self.in_flight < int(self.limit) and not self.queued:
+            return None
+        if self.queued >= self.max_queue:
+            reason = "queue_full"
+        elif len(self._queues.get(client, ())) >= self.max_queue_per_client:
+            reason = "client_queue_full"
+        else:
+            return None
+        return Overloaded(reason, self._retry_after_locked())
+
+    def check(self, client: str):
+        """Raises Overloaded if a call from client would be rejected right now (for routes that must answer before acquiring)."""
+        with self._lock:
+            rejection = self._rejection_locked(client)
+        if rejection is not None:
+            ADMISSION_REJECTIONS.inc(1, rejection.reason)
+            raise rejection
+
+    def _grant_locked(self):
+        """Hands free slots to queued waiters, taking one from each client in turn."""
+        while self.queued and self.in_flight < int(self.limit):
+            client, waiters = next(iter(self._queues.items()))
+            waiter = waiters.popleft()
+            if waiters:
+                self._queues.move_to_end(client)
+            else:
+                del self._queues[client]
+            self.queued -= 1
+            try:
+                waiter.loop.call_soon_threadsafe(_wake, waiter.future)
+            except RuntimeError:
+                # The waiter's loop has closed; its request is gone
+                continue
+            waiter.granted = True
+            self.in_flight += 1
+
+    async def acquire(self, client: str) -> float:
+        """Waits for a slot and returns the seconds spent queued, or raises Overloaded."""
+        started = time.perf_counter()
+        with self._lock:
+            if self.in_flight < int(self.limit) and not self.queued:
+                self.in_flight += 1
+                ADMISSION_WAIT.observe(0.0)
+                return 0.0
+            rejection = self._rejection_locked(client)
+            if rejection is None:
+                waiter = _Waiter(asyncio.get_running_loop())
+                self._queues.setdefault(client, deque()).append(waiter)
+                self.queued += 1
+        if rejection is not None:
+            ADMISSION_REJECTIONS.inc(1, rejection.reason)
+            raise rejection
+
+        try:
+            await asyncio.wait_for(waiter.future, self.queue_timeout)
+        except BaseException as e:
+            with self._lock:
+                if waiter.granted:
+                    # Granted just as the wait ended; hand the slot on
+                    self.in_flight -= 1
+                    self._grant_locked()
+                else:
+                    waiters = self._queues.get(client)
+                    if waiters is not None and waiter in waiters:
+                        waiters.remove(waiter)
+                        self.queued -= 1
+                        if not waiters:
+                            del self._queues[client]
+                retry_after = self._retry_after_locked()
+            ADMISSION_WAIT.observe(time.perf_counter() - started)
+            if isinstance(e, asyncio.TimeoutError):
+                ADMISSION_REJECTIONS.inc(1, "queue_timeout")
+                raise Overloaded("queue_timeout", retry_after) from None
+            raise
+        waited = time.perf_counter() - started
+        ADMISSION_WAIT.observe(waited)
+        return waited
+
+    def release(self, latency: float | None = None, rate_limited: bool = False):
+        """Frees a slot. latency (for completed calls) and rate_limited feed the limit adjustment."""
+        with self._lock:
+            self.in_flight -= 1
+            self._adapt_locked(latency, rate_limited)
+            self._grant_locked()
+
+    def _adapt_locked(self, latency: float | None, rate_limited: bool):
+        now = time.monotonic()
+        if latency is not None:
+            self.latency += LATENCY_EWMA_ALPHA * (latency - self.latency)
+        if rate_limited or (latency is not None and latency > self.target_latency):
+            if now - self._last_decrease >= self.latency:
+                self.limit = max(float(self.min_limit), self.limit * DECREASE_FACTOR)
+                self._last_decrease = now
+        elif latency is not None and self.in_flight + 1 >= int(self.limit):
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+
+    @asynccontextmanager
+    async def slot(self, client: str):
+        """Holds a slot for the body; yields the seconds spent queued."""
+        waited = await self.acquire(client)
+        started = time.perf_counter()
+        latency, rate_limited = None, False
+        try:
+            yield waited
+            latency = time.perf_counter() - started
+        except Exception as e:
+            rate_limited = is_rate_limit(e)
+            raise
+        finally:
+            self.release(latency, rate_limited)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "queued": self.queued,
+                "clients_queued": len(self._queues),
+                "latency": self.latency,
+            }
@@ -1,45 +1,62 @@
-from dotenv import load_dotenv
+from __future__ import annotations
 
 # from geopy.adapters import AioHTTPAdapter
 # from geopy.geocoders import Nominatim
 
 from pydantic import BaseModel, Field
-from pydantic_ai import Agent, RunContext
-import json
+import os
+import time
+from typing import TYPE_CHECKING
 
-load_dotenv()
+from backend.metrics import RequestTrace
+from backend.output_repair import MIN_USABLE_TIPS, N_GREEN, N_RED, merge_missing, repair_tips
+from backend.prompt_builder import PromptSizeRecorder, assemble_prompt, build_repair_prompt
 
-with open("historical_data.txt", encoding="utf-8") as f:
-    HISTORICAL_DATA = f.read()
+# pydantic-ai (and the OpenAI client under it) is imported where an agent is built or run, not here:
+# it is most of the API's import time, and the schemas and prompt helpers below don't need it
+if TYPE_CHECKING:
+    from pydantic_ai import Agent
+    from pydantic_ai.models import Model
+
+# Historical records come from historical_index.get_historical_index(), so each prompt only carries
+# the records relevant to the selected region
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "600"))
+YIELD_TOKEN_BUDGET = int(os.getenv("YIELD_TOKEN_BUDGET", "200"))
+# Whole user prompt; lower-priority sections are trimmed or summarized to stay within it
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "1500"))
+PROMPT_SIZES = PromptSizeRecorder()
 
 class GPTDependencies(BaseModel):
     context: str = Field(description="User-provided context, describing their field, crop, or situation.")
     gridData: dict = Field(description="Data for the farmer’s grid location.")
     areaData: list = Field(description="List of data for the grids surrounding the farmer's location, providing context for comparing the selected field to nearby areas.")
     historical_context: str = Field(description="Relevant historical news articles for several regions.")
+    yield_context: str = Field(default="", description="Latest FAOSTAT crop yields for the selected region.")
     
 
 class GPTOutput(BaseModel):
     tips: list[str] = Field(min_length=8, max_length=8, 
                             description="Start with exactly 5 green suggestions, each starting with 🟩 and citing numbers, followed by exactly 3 red avoid/critical suggestions, each starting with 🟥 and citing numbers..")
 
-def build_prompt(deps: GPTDependencies) -> str:
-    grid_json = json.dumps(deps.gridData, ensure_ascii=False)
-    area_json = json.dumps(deps.areaData, ensure_ascii=False)
-    historical_text = deps.historical_context
-
-    return (
-        "FIELD CONTEXT:\n"
-        f"{deps.context}\n\n"
-        "SELECTED GRID DATA (JSON):\n"
-        f"{grid_json}\n\n"
-        "AREA SUMMARY (JSON; mean/min/max/count across nearby cells):\n"
-        f"{area_json}\n\n"
-        "HISTORICAL DATA:\n"
-        f"{historical_text}\n\n"
-        "Return tips as specified in the system instructions."
-    )
-    
+
+class StreamedGPTOutput(BaseModel):
+    # Same shape as GPTOutput without the length limits, so partial tip lists validate while streaming
+    # and near-miss answers reach output_repair instead of triggering a full validation retry
+    tips: list[str] = Field(default_factory=list, description=GPTOutput.model_fields["tips"].description)
+
+
+def build_prompt(deps: GPTDependencies, token_budget: int | None = PROMPT_TOKEN_BUDGET) -> str:
+    return assemble_prompt(deps, token_budget)[0]
+
+
+def build_recorded_prompt(deps: GPTDependencies, trace: RequestTrace | None = None) -> str:
+    """build_prompt() for a live request: the per-section token counts go to PROMPT_SIZES and the trace."""
+    prompt, report = assemble_prompt(deps, PROMPT_TOKEN_BUDGET)
+    PROMPT_SIZES.record(report)
+    if trace is not None:
+        trace.record_prompt(report)
+    return prompt
+
 INSTRUCTIONS = (
     "You are an agricultural AI assistant.\n"
     "Use the following field context, selected grid data, and area data to generate suggestions. \n"
@@ -58,7 +75,12 @@ INSTRUCTIONS = (
 )
 
 
-def create_agent(model: str = "openai:gpt-4o-mini", instructions: str = INSTRUCTIONS):
+DEFAULT_MODEL = "openai:gpt-4o-mini"
+
+
+def create_agent(model: str | Model = DEFAULT_MODEL, instructions: str = INSTRUCTIONS):
+    from pydantic_ai import Agent
+
     return Agent(
         model,
         deps_type=GPTDependencies,
@@ -71,10 +93,135 @@ def create_agent(model: str = "openai:gpt-4o-mini", instructions: str = INSTRUCT
       )
 
 
-async def get_recommendations(agent: Agent[GPTDependencies, GPTOutput], deps: GPTDependencies):
-    print("Calling get_recommendations() in chatgpt.py")
-    prompt = build_prompt(deps)
-    return (await agent.run(prompt, deps=deps)).output
+REPAIR_INSTRUCTIONS = (
+    "You are an agricultural AI assistant completing a partial list of suggestions for a farmer.\n"
+    "Write ONLY the number of new suggestions requested, each referencing the numbers in the grid data.\n"
+    "Prefix suggestions to take with 🟩 and suggestions to avoid with 🟥.\n"
+    "Do NOT repeat existing suggestions and do NOT mention brand names."
+)
+
+# Repair agents share their main agent's model; keyed by id() since Agent is unhashable
+_repair_agents: dict[int, tuple[Agent, Agent]] = {}
+
+
+def get_repair_agent(agent: Agent) -> Agent:
+    from pydantic_ai import Agent
+
+    cached = _repair_agents.get(id(agent))
+    if cached is None or cached[0] is not agent:
+        repair = Agent(
+            agent.model,
+            output_type=StreamedGPTOutput,
+            instructions=REPAIR_INSTRUCTIONS,
+            model_settings={"max_output_tokens": 200, "temperature": 0.3},
+        )
+        cached = _repair_agents[id(agent)] = (agent, repair)
+    return cached[1]
+
+
+async def run_traced(agent: Agent, prompt: str, trace: RequestTrace, output_type=None, **kwargs):
+    """
+    Runs the agent node by node so the trace can separate time waiting on the model
+    (model request nodes) from parsing and validating its output (call-tools nodes).
+    """
+    from pydantic_ai import Agent
+
+    async with agent.iter(prompt, output_type=output_type, **kwargs) as run:
+        node = run.next_node
+        while not Agent.is_end_node(node):
+            if Agent.is_model_request_node(node):
+                stage = "llm"
+            elif Agent.is_call_tools_node(node):
+                stage = "validation"
+            else:
+                stage = "agent"
+            with trace.stage(stage):
+                node = await run.next(node)
+        usage = trace.record_usage(run.usage)
+    # pydantic-ai re-prompts on output it cannot parse; each re-prompt is another model request
+    trace.record_retry("validation", (getattr(usage, "requests", 1) or 1) - 1)
+    return run.result.output
+
+
+async def request_missing_tips(agent: Agent, deps: GPTDependencies, kept: list[str], n_green: int, n_red: int,
+                               trace: RequestTrace) -> list[str]:
+    trace.record_retry("followup")
+    prompt = build_repair_prompt(deps, kept, n_green, n_red)
+    with trace.stage("repair_llm"):
+        output = await run_traced(get_repair_agent(agent), prompt, RequestTrace("untraced"))
+    return output.tips
+
+
+async def finalize_tips(agent: Agent, deps: GPTDependencies, tips: list[str], prompt: str,
+                        trace: RequestTrace) -> GPTOutput:
+    """
+    Turns the model's tip list into a GPTOutput. Near misses are repaired locally (reordered,
+    trimmed), missing tips are asked for in a short follow-up, and only when too little is usable
+    is the full prompt run again.
+    """
+    with trace.stage("validation"):
+        green, red, report = repair_tips(tips)
+    outcome = report["outcome"]
+
+    if report["missing_green"] or report["missing_red"]:
+        if len(green) + len(red) >= MIN_USABLE_TIPS:
+            outcome = "followup"
+            extra = await request_missing_tips(agent, deps, green + red, report["missing_green"],
+                                               report["missing_red"], trace)
+            green, red = merge_missing(green, red, extra)
+        if len(green) < N_GREEN or len(red) < N_RED:
+            outcome = "full_retry"
+            trace.record_retry("full_retry")
+            output = await run_traced(agent, prompt, trace, deps=deps)
+            green, red, _ = repair_tips(output.tips)
+            if len(green) < N_GREEN or len(red) < N_RED:
+                # Strictly validated by GPTOutput but with the prefixes mixed up; keep the model's order
+                green, red = output.tips, []
+
+    trace.record_repair(outcome)
+    with trace.stage("validation"):
+        return GPTOutput(tips=green + red)
+
+
+async def get_recommendations(agent: Agent[GPTDependencies, GPTOutput], deps: GPTDependencies,
+                              trace: RequestTrace | None = None):
+    trace = trace or RequestTrace("untraced")
+    with trace.stage("prompt_build"):
+        prompt = build_recorded_prompt(deps, trace)
+    # Lenient output type: count and order are checked by finalize_tips rather than by a full retry
+    output = await run_traced(agent, prompt, trace, output_type=StreamedGPTOutput, deps=deps)
+    return await finalize_tips(agent, deps, output.tips, prompt, trace)
+
+
+async def stream_recommendations(agent: Agent[GPTDependencies, GPTOutput], deps: GPTDependencies,
+                                 trace: RequestTrace | None = None):
+    """
+    Yields ("tip", index, text) for each tip as soon as the model has moved on to the next one,
+    then ("done", None, GPTOutput) once the full list has been validated.
+    Time spent by the consumer between tips is not counted as LLM time.
+    """
+    trace = trace or RequestTrace("untraced")
+    with trace.stage("prompt_build"):
+        prompt = build_recorded_prompt(deps, trace)
+    emitted = 0
+    resumed = time.perf_counter()
+    async with agent.run_stream(prompt, deps=deps, output_type=StreamedGPTOutput) as result:
+        async for partial in result.stream_output(debounce_by=None):
+            # The last tip may still be growing; everything before it is complete
+            while emitted < len(partial.tips) - 1:
+                trace.add("llm", time.perf_counter() - resumed)
+                yield "tip", emitted, partial.tips[emitted]
+                resumed = time.perf_counter()
+                emitted += 1
+        streamed = await result.get_output()
+        trace.add("llm", time.perf_counter() - resumed)
+        trace.record_usage(result.usage)
+    final = await finalize_tips(agent, deps, streamed.tips, prompt, trace)
+
+    while emitted < len(final.tips):
+        yield "tip", emitted, final.tips[emitted]
+        emitted += 1
+    yield "done", None, final
 
 
 
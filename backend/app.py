@@ -1,11 +1,42 @@
+import os
+
 from flask import Flask
 from flask_cors import CORS
 
-def create_app():
-    app = Flask(__name__)
-    CORS(app)
+# How create_app prepares what the first requests need (the agent, the datasets, the precomputed
+# tips table): "background" builds it on a thread while the server starts taking requests,
+# "blocking" before create_app returns, "off" leaves it all to first use
+WARMUP_MODES = ("background", "blocking", "off")
+
+
+def create_app(warmup: str | None = None):
+    """
+    Builds the Flask app without loading the agent or any dataset; those are created on first use,
+    or ahead of it according to warmup (default APP_WARMUP, else "background").
+    """
+    from dotenv import load_dotenv
+
+    # Before the route modules are imported, since they read their settings at import
+    load_dotenv()
+    warmup = warmup or os.getenv("APP_WARMUP", "background")
+    if warmup not in WARMUP_MODES:
+        raise ValueError(f"warmup must be one of {', '.join(WARMUP_MODES)}, not {warmup!r}")
 
+    from backend.hot_reload import start_watcher
+    from backend.lazy import start_warm_up, warm_up
     from backend.routes import register_routes
+
+    app = Flask(__name__)
+    CORS(app)
     register_routes(app)
 
-    return app
\ No newline at end of file
+    # Refreshed datasets (fetch_data.py output, historical_data.txt, FAOSTAT CSVs) are swapped in
+    # without a restart; DATA_RELOAD_INTERVAL_SECONDS=0 turns the file watcher off
+    start_watcher(float(os.getenv("DATA_RELOAD_INTERVAL_SECONDS", "5")))
+
+    if warmup == "blocking":
+        warm_up()
+    elif warmup == "background":
+        start_warm_up()
+
+    return app
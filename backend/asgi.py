@@ -0,0 +1,318 @@
+"""
+ASGI entry point, alongside create_app(): the same routes and JSON contract, served by one
+long-lived event loop per worker.
+
+The recommendation routes (/api/gpt_response, /stream and /batch) are handled natively on that
+loop, so a worker keeps as many model calls in flight as admission control allows rather than one
+per thread, and all of them share one pooled provider HTTP client (backend/llm_client.py). Every
+other route is the Flask app itself, run through asgiref's WSGI adapter.
+
+On shutdown the worker answers new recommendation requests with 503. It then waits up to
+ASGI_DRAIN_SECONDS for requests in flight and for model calls still running past their deadline
+(whose tips get cached), and closes the HTTP client.
+
+Run with any ASGI server, e.g.:
+    uvicorn --factory backend.asgi:create_asgi_app --workers 4 --timeout-graceful-shutdown 30
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+
+from asgiref.wsgi import WsgiToAsgi
+from dotenv import load_dotenv
+from werkzeug.exceptions import BadRequest, UnsupportedMediaType
+
+# An entry point: .env is read before the modules below read their settings at import
+load_dotenv()
+
+import backend.routes.get_chatgpt_response as gpt_route
+from backend.admission import Overloaded
+from backend.ai_agent import DEFAULT_MODEL, create_agent
+from backend.app import WARMUP_MODES, create_app
+from backend.background_loop import pending, use_loop
+from backend.lazy import start_warm_up, warm_up
+from backend.llm_client import create_http_client, pooled_model
+from backend.metrics import RequestTrace
+from backend.request_deps import InvalidRequest
+
+logger = logging.getLogger(__name__)
+
+DRAIN_SECONDS = float(os.getenv("ASGI_DRAIN_SECONDS", "30"))
+
+EVENT_STREAM_HEADERS = [
+    (b"content-type", b"text/event-stream; charset=utf-8"),
+    (b"cache-control", b"no-cache"),
+    (b"x-accel-buffering", b"no"),
+]
+
+
+def header(scope, name: bytes) -> str | None:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def client_of(scope) -> str:
+    """Same as client_id() in the Flask route: X-Client-Id, else the peer address."""
+    client = scope.get("client")
+    return header(scope, b"x-client-id") or (client[0] if client else None) or "anonymous"
+
+
+def cors_headers(scope) -> list[tuple[bytes, bytes]]:
+    """What flask-cors adds with CORS(app)'s defaults: the request's Origin echoed back, else *."""
+    origin = header(scope, b"origin")
+    if origin is None:
+        return [(b"access-control-allow-origin", b"*")]
+    return [(b"access-control-allow-origin", origin.encode("latin-1")), (b"vary", b"Origin")]
+
+
+async def read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise ConnectionError("Client disconnected before sending the body")
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+def parse_json(body: bytes, content_type: str | None):
+    """Flask's request.get_json(), raising the same errors for a wrong content type or invalid JSON."""
+    mimetype = (content_type or "").split(";")[0].strip().lower()
+    if mimetype != "application/json" and not (mimetype.startswith("application/") and mimetype.endswith("+json")):
+        raise UnsupportedMediaType(
+            "Did not attempt to load JSON data because the request Content-Type was not 'application/json'.")
+    try:
+        return json.loads(body)
+    except ValueError:
+        raise BadRequest() from None
+
+
+class RecommendationServer:
+    """The ASGI application; see the module docstring."""
+
+    def __init__(self, flask_app, warmup: str = "background", pooled_client: bool = True):
+        """
+        pooled_client=False keeps whatever agent factory is installed (e.g. a stub model in benchmarks)
+        instead of building the agent on the worker's pooled HTTP client.
+        """
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.warmup = warmup
+        self.pooled_client = pooled_client
+        self.http_client = None
+        self.in_flight = 0
+        self.draining = False
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.routes = {
+            "/api/gpt_response": self.gpt_response,
+            "/api/gpt_response/stream": self.gpt_response_stream,
+            "/api/gpt_response/batch": self.gpt_response_batch,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+        handler = self.routes.get(scope["path"]) if scope["type"] == "http" and scope["method"] == "POST" else None
+        if handler is None:
+            # Everything else, including CORS preflights for the routes above, is the Flask app
+            await self.wsgi(scope, receive, send)
+            return
+        if self.draining:
+            await self.send_json(send, scope, 503, self.json_body({"error": "Server is shutting down"}),
+                                 [(b"retry-after", b"1")])
+            return
+        self.in_flight += 1
+        self._idle.clear()
+        try:
+            await handler(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+            if not self.in_flight:
+                self._idle.set()
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as e:
+                    logger.exception("ASGI startup failed")
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def startup(self):
+        # Model calls that outlive their request (past the deadline) run on this loop too
+        use_loop(asyncio.get_running_loop())
+        if self.pooled_client:
+            gpt_route.agent.replace(self.build_pooled_agent)
+        if self.warmup == "blocking":
+            await asyncio.to_thread(warm_up)
+        elif self.warmup == "background":
+            start_warm_up()
+
+    def build_pooled_agent(self):
+        # Runs off the loop (warm-up or ensure_agent), so the client's imports never block requests
+        self.http_client = create_http_client()
+        return create_agent(pooled_model(DEFAULT_MODEL, self.http_client))
+
+    async def shutdown(self):
+        self.draining = True
+        deadline = time.monotonic() + DRAIN_SECONDS
+        try:
+            await asyncio.wait_for(self._idle.wait(), DRAIN_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning("Shutting down with %d recommendation requests still in flight", self.in_flight)
+        late = [asyncio.wrap_future(future) for future in pending()]
+        if late:
+            _, unfinished = await asyncio.wait(late, timeout=max(deadline - time.monotonic(), 0))
+            if unfinished:
+                logger.warning("Cancelling %d model calls still running at shutdown", len(unfinished))
+                for future in unfinished:
+                    future.cancel()
+        use_loop(None)
+        if self.http_client is not None:
+            await self.http_client.aclose()
+
+    def json_body(self, obj) -> bytes:
+        # The Flask app's JSON provider, so bodies are byte-for-byte those of the Flask routes
+        return (self.flask_app.json.dumps(obj, separators=(",", ":")) + "\n").encode("utf-8")
+
+    def overloaded(self, error: Overloaded) -> tuple[int, bytes, list]:
+        return (429, self.json_body({"error": str(error), "retry_after": error.retry_after}),
+                [(b"retry-after", str(error.retry_after).encode())])
+
+    async def send_json(self, send, scope, status: int, body: bytes, headers: list[tuple[bytes, bytes]] = ()):
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+                        *headers, *cors_headers(scope)],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def send_events(self, send, receive, scope, frames):
+        """
+        Streams SSE frames (an async iterator of str) as they are produced. Servers drop sends to a
+        client that has gone rather than raising, so receive() is watched for http.disconnect
+        alongside, and the frames are cancelled as soon as it arrives (as iterate_in_thread does
+        under Flask): no more model calls start and admission slots are released.
+        """
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [*EVENT_STREAM_HEADERS, *cors_headers(scope)]})
+
+        async def stream():
+            async for frame in frames:
+                await send({"type": "http.response.body", "body": frame.encode("utf-8"), "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+
+        async def disconnected():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        streaming = asyncio.ensure_future(stream())
+        watching = asyncio.ensure_future(disconnected())
+        try:
+            await asyncio.wait((streaming, watching), return_when=asyncio.FIRST_COMPLETED)
+            if streaming.done():
+                streaming.result()
+        finally:
+            watching.cancel()
+            if not streaming.done():
+                # The client went away (or this request is being cancelled); the trace is finished by the generator
+                streaming.cancel()
+            await asyncio.gather(streaming, watching, return_exceptions=True)
+            if hasattr(frames, "aclose"):
+                await frames.aclose()
+
+    async def gpt_response(self, scope, receive, send):
+        trace = RequestTrace("gpt_response")
+        outcome = "error"
+        try:
+            with trace.stage("parse"):
+                data = parse_json(await read_body(receive), header(scope, b"content-type"))
+            tips = await gpt_route.answer(data, trace, client_of(scope))
+            outcome = trace.fields.get("served_from", "ok")
+            with trace.stage("serialize"):
+                response = 200, self.json_body(tips), [(b"x-tips-source", outcome.encode())]
+        except InvalidRequest as e:
+            outcome = "invalid"
+            response = 400, self.json_body({"error": str(e)}), []
+        except Overloaded as e:
+            outcome = "rejected"
+            response = self.overloaded(e)
+        except Exception as e:
+            response = 500, self.json_body({"error": str(e)}), []
+        finally:
+            trace.finish(outcome)
+        await self.send_json(send, scope, *response)
+
+    async def gpt_response_stream(self, scope, receive, send):
+        trace = RequestTrace("gpt_response_stream")
+        client = client_of(scope)
+        try:
+            with trace.stage("parse"):
+                data = parse_json(await read_body(receive), header(scope, b"content-type"))
+            # Off the loop: the precomputed and cache lookups are SQLite queries
+            deps, cache_key, cached_tips = await asyncio.to_thread(gpt_route.prepare_stream, data, trace, client)
+        except InvalidRequest as e:
+            trace.finish("invalid")
+            await self.send_json(send, scope, 400, self.json_body({"error": str(e)}))
+            return
+        except Overloaded as e:
+            trace.finish("rejected")
+            await self.send_json(send, scope, *self.overloaded(e))
+            return
+        except Exception as e:
+            trace.finish("error")
+            await self.send_json(send, scope, 500, self.json_body({"error": str(e)}))
+            return
+
+        if cached_tips is None:
+            await self.send_events(send, receive, scope, gpt_route.stream_frames(deps, cache_key, trace, client))
+            return
+        frames = gpt_route.cached_frames(cached_tips, trace)
+
+        async def replay():
+            for frame in frames:
+                yield frame
+
+        await self.send_events(send, receive, scope, replay())
+
+    async def gpt_response_batch(self, scope, receive, send):
+        try:
+            body = parse_json(await read_body(receive), header(scope, b"content-type"))
+        except (BadRequest, UnsupportedMediaType):
+            # get_json(silent=True) in the Flask route
+            body = None
+        try:
+            items, concurrency, timeout = gpt_route.parse_batch(body or {})
+        except ValueError as e:
+            await self.send_json(send, scope, 400, self.json_body({"error": str(e)}))
+            return
+        frames = gpt_route.batch_frames(items, concurrency, timeout, client_of(scope))
+        await self.send_events(send, receive, scope, frames)
+
+
+def create_asgi_app(warmup: str | None = None, pooled_client: bool = True) -> RecommendationServer:
+    """
+    The ASGI counterpart of create_app(). warmup is as for create_app (default APP_WARMUP, else
+    "background") but runs at lifespan startup, once the worker's loop and HTTP client exist.
+    """
+    warmup = warmup or os.getenv("APP_WARMUP", "background")
+    if warmup not in WARMUP_MODES:
+        raise ValueError(f"warmup must be one of {', '.join(WARMUP_MODES)}, not {warmup!r}")
+    return RecommendationServer(create_app(warmup="off"), warmup, pooled_client)
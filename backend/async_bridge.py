@@ -0,0 +1,61 @@
+import asyncio
+import threading
+from typing import AsyncIterator, Callable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+
+def iterate_in_thread(make_agen: Callable[[], AsyncIterator[T]], max_buffered: int = 16) -> Iterator[T]:
+    """
+    Runs an async generator on its own event loop in a worker thread and yields its items
+    synchronously. Flask streams responses from plain generators, while the agent streams
+    asynchronously, so this bridges the two.
+
+    At most max_buffered items wait for the consumer. When the consumer stops early (Flask closes
+    the response generator on a client disconnect), the async generator is cancelled, so nothing
+    keeps calling the model for a client that has gone.
+    """
+    runner = asyncio.Runner(loop_factory=asyncio.new_event_loop)
+    loop = runner.get_loop()
+    items: asyncio.Queue = asyncio.Queue(max_buffered)
+
+    async def pump():
+        try:
+            async for item in make_agen():
+                await items.put(("item", item))
+            await items.put(("done", None))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await items.put(("error", e))
+        # Keep the loop running until the consumer has taken the last message
+        await items.join()
+
+    async def take():
+        message = await items.get()
+        items.task_done()
+        return message
+
+    task = loop.create_task(pump())
+
+    def run():
+        with runner:
+            runner.run(asyncio.wait([task]))
+
+    threading.Thread(target=run, daemon=True).start()
+
+    try:
+        while True:
+            kind, value = asyncio.run_coroutine_threadsafe(take(), loop).result()
+            if kind == "item":
+                yield value
+            elif kind == "error":
+                raise value
+            else:
+                return
+    finally:
+        try:
+            loop.call_soon_threadsafe(task.cancel)
+        except RuntimeError:
+            # The loop has already finished and closed
+            pass
@@ -0,0 +1,53 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Coroutine, TypeVar
+
+T = TypeVar("T")
+
+_loop: asyncio.AbstractEventLoop | None = None
+_lock = threading.Lock()
+_pending: set[Future] = set()
+
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """
+    One event loop running forever on a daemon thread. Flask closes each async view's loop when
+    the view returns, so work that must outlive a request (an LLM call past its deadline) runs here.
+    """
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="background-loop", daemon=True).start()
+        return _loop
+
+
+def use_loop(loop: asyncio.AbstractEventLoop | None):
+    """
+    Makes submit() schedule onto loop (None goes back to the private thread). An ASGI worker already
+    runs one long-lived loop, so work that outlives a request runs there with everything else.
+    """
+    global _loop
+    with _lock:
+        _loop = loop
+
+
+def _forget(future: Future):
+    with _lock:
+        _pending.discard(future)
+
+
+def submit(coro: Coroutine[None, None, T]) -> Future:
+    """Schedules coro on the background loop; cancelling the returned Future cancels it."""
+    future = asyncio.run_coroutine_threadsafe(coro, get_background_loop())
+    with _lock:
+        _pending.add(future)
+    future.add_done_callback(_forget)
+    return future
+
+
+def pending() -> list[Future]:
+    """Submitted work that has not finished yet, e.g. for a worker to wait on before it exits."""
+    with _lock:
+        return list(_pending)
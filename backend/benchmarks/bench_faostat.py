@@ -0,0 +1,116 @@
+"""
+Measures FaostatStore ingestion, cached startup and query latency on a synthetic FAOSTAT export,
+against scanning the parsed CSV rows for every query.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_faostat [--areas 200] [--items 150] [--years 30] [--json]
+"""
+
+import argparse
+import csv
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from backend.faostat_store import FaostatStore
+
+ELEMENTS = (("5312", "Area harvested", "ha"), ("5412", "Yield", "kg/ha"), ("5510", "Production", "t"))
+HEADER = ["Domain Code", "Domain", "Area Code (M49)", "Area", "Element Code", "Element", "Item Code (CPC)", "Item",
+          "Year Code", "Year", "Unit", "Value", "Flag", "Flag Description", "Note"]
+
+
+def write_synthetic_csv(path: Path, areas: int, items: int, years: int, seed: int = 0) -> int:
+    rng = random.Random(seed)
+    rows = 0
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(HEADER)
+        for a in range(areas):
+            for code, element, unit in ELEMENTS:
+                for i in range(items):
+                    for year in range(2024 - years, 2024):
+                        value = "" if rng.random() < 0.03 else f"{rng.uniform(100, 90000):.1f}"
+                        writer.writerow(["QCL", "Crops and livestock products", str(a), f"Area {a}", code, element,
+                                         f"{i:05d}", f"Item {i}", str(year), str(year), unit, value, "A",
+                                         "Official figure", ""])
+                        rows += 1
+    return rows
+
+
+def scan_latest(rows: list[dict], area: str, element: str) -> dict:
+    """Baseline: one pass over the parsed CSV rows, keeping the newest valued year per item."""
+    latest = {}
+    for row in rows:
+        if row["Area"] == area and row["Element"] == element and row["Value"]:
+            year = int(row["Year"])
+            if year >= latest.get(row["Item"], (0,))[0]:
+                latest[row["Item"]] = (year, float(row["Value"]))
+    return latest
+
+
+def timed(fn, repeats: int = 1) -> tuple[float, object]:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = fn()
+    return (time.perf_counter() - start) / repeats * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--areas", type=int, default=200)
+    parser.add_argument("--items", type=int, default=150)
+    parser.add_argument("--years", type=int, default=30)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "FAOSTAT_data_synthetic.csv"
+        n_rows = write_synthetic_csv(path, args.areas, args.items, args.years)
+        csv_bytes = path.stat().st_size
+
+        def read_rows():
+            with open(path, encoding="utf-8-sig", newline="") as f:
+                return list(csv.DictReader(f))
+
+        csv_ms, rows = timed(read_rows)
+        cold_ms, _ = timed(lambda: FaostatStore.load_csv(path))
+        warm_ms, store = timed(lambda: FaostatStore.load_csv(path), repeats=5)
+        cache_bytes = path.with_name(path.name + ".cache.npz").stat().st_size
+
+        rng = random.Random(1)
+        areas = [f"Area {rng.randrange(args.areas)}" for _ in range(args.queries)]
+        scan_queries = areas[: max(1, args.queries // 20)]
+        scan_ms, _ = timed(lambda: [scan_latest(rows, a, "Yield") for a in scan_queries])
+        latest_ms, _ = timed(lambda: [store.latest(a, "Yield") for a in areas])
+        get_ms, _ = timed(lambda: [store.get(a, "Item 7", "Yield", 2020) for a in areas])
+
+        # Same answers as the scan
+        expected = scan_latest(rows, areas[0], "Yield")
+        got = {r["item"]: (r["year"], r["value"]) for r in store.latest(areas[0], "Yield")}
+        assert got == expected, "FaostatStore.latest disagrees with the CSV scan"
+
+    results = {
+        "rows": n_rows,
+        "csv_size_mb": round(csv_bytes / 1e6, 1),
+        "csv_dictreader_ms": round(csv_ms, 1),
+        "cold_load_ms": round(cold_ms, 1),
+        "warm_load_ms": round(warm_ms, 1),
+        "cache_size_mb": round(cache_bytes / 1e6, 2),
+        "scan_latest_ms_per_query": round(scan_ms / len(scan_queries), 3),
+        "store_latest_ms_per_query": round(latest_ms / len(areas), 4),
+        "store_get_ms_per_query": round(get_ms / len(areas), 4),
+    }
+    results["latest_speedup"] = round(results["scan_latest_ms_per_query"] / results["store_latest_ms_per_query"], 1)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for key, value in results.items():
+        print(f"{key:<28}{value}")
+
+
+if __name__ == "__main__":
+    main()
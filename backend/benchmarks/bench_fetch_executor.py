@@ -0,0 +1,86 @@
+"""
+Throughput of the concurrent Earth Engine fetch executor against a simulated-latency fake client.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_fetch_executor [--step 5] [--concurrency 1 2 4 8 16] [--json]
+
+The fake charges a fixed latency per request plus a per-point cost, and rejects requests
+beyond --ee-limit concurrent ones. The baseline is the old fetch_data.py __main__ path:
+every point in a single reduceRegions request.
+"""
+
+import argparse
+import json
+import time
+
+from backend.benchmarks.fake_ee import FakeEE
+from backend.gee.dataset.fetch_executor import AdaptiveChunker, ConcurrentFetcher
+from backend.gee.dataset.tiled_fetch import _lattice, build_merged_image, fetch_points
+
+BANDS = ["mean_2m_air_temperature", "total_precipitation", "NDVI", "cropland"]
+
+
+def make_client(args) -> FakeEE:
+    return FakeEE(latency=args.latency, per_point_latency=args.per_point_latency, max_concurrent=args.ee_limit)
+
+
+def datasets_for(client: FakeEE) -> dict:
+    return {band: client.ImageCollection(band).select(band) for band in BANDS}
+
+
+def run(args, concurrency: int | None, coords) -> dict:
+    client = make_client(args)
+    merged_image = build_merged_image(datasets_for(client))
+    start = time.perf_counter()
+    if concurrency is None:
+        results = fetch_points(client, merged_image, coords)
+        requests, errors = 1, 0
+    else:
+        fetcher = ConcurrentFetcher(
+            client, merged_image, max_concurrency=concurrency,
+            chunker=AdaptiveChunker(initial=args.initial_chunk, target_latency=args.target_latency),
+            base_delay=0.05, max_delay=0.5,
+        )
+        results = fetcher.fetch(coords)
+        requests, errors = fetcher.requests, fetcher.errors
+    wall = time.perf_counter() - start
+    return {
+        "mode": "single request" if concurrency is None else f"concurrency {concurrency}",
+        "concurrency": concurrency,
+        "points": len(results),
+        "wall_s": round(wall, 3),
+        "points_per_s": round(len(results) / wall, 1),
+        "requests": requests,
+        "errors": errors,
+        "peak_in_flight": client.peak_concurrency,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--step", type=float, default=5.0, help="grid resolution in degrees")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated seconds per request")
+    parser.add_argument("--per-point-latency", type=float, default=0.0005, help="simulated seconds per point")
+    parser.add_argument("--ee-limit", type=int, default=8, help="fake Earth Engine concurrent request limit")
+    parser.add_argument("--initial-chunk", type=int, default=64)
+    parser.add_argument("--target-latency", type=float, default=0.5, help="chunker's target seconds per request")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    coords = [(lon, lat) for lat in _lattice(-90, 90, args.step) for lon in _lattice(-180, 180, args.step)]
+    rows = [run(args, None, coords)] + [run(args, c, coords) for c in args.concurrency]
+
+    if args.json:
+        print(json.dumps({"points": len(coords), "results": rows}, indent=2))
+        return
+
+    print(f"{len(coords)} points, fake EE limit {args.ee_limit} concurrent requests")
+    print(f"{'mode':<18}{'wall s':>9}{'pts/s':>10}{'requests':>10}{'errors':>8}{'peak':>6}")
+    for r in rows:
+        print(f"{r['mode']:<18}{r['wall_s']:>9}{r['points_per_s']:>10}{r['requests']:>10}"
+              f"{r['errors']:>8}{r['peak_in_flight']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Load time and memory of the JSON grid format versus the memory-mapped binary grid file.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_gridfile [--step 1.0] [--json]
+
+A synthetic global grid at --step degrees is written in both formats to a temporary
+directory. Each format is then loaded in a fresh interpreter so RSS numbers are isolated.
+"""
+
+import argparse
+import json
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BANDS = [
+    "mean_2m_air_temperature", "total_precipitation", "cropland", "NDVI", "landcover",
+    "SoilMoi0_10cm_inst", "SoilMoi10_40cm_inst", "SoilTMP0_10cm_inst", "SoilTMP10_40cm_inst",
+    "Tveg_tavg", "volumetric_soil_water_layer_1", "volumetric_soil_water_layer_2",
+]
+
+
+def rss_kb(field: str = "VmRSS") -> int:
+    """Current (VmRSS) or peak (VmHWM) resident set size of this process."""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def synthetic_grid(step: float) -> dict:
+    rng = random.Random(0)
+    data = {}
+    n_lat, n_lon = round(180 / step), round(360 / step)
+    for i in range(n_lat):
+        for j in range(n_lon):
+            lat, lon = -90 + i * step, -180 + j * step
+            data[f"{lon},{lat}"] = {band: (rng.random() if rng.random() > 0.3 else None) for band in BANDS}
+    data.update({"lat_step": step, "lon_step": step})
+    return data
+
+
+def child(fmt: str, path: str):
+    """Runs in a fresh interpreter: load one format, read one cell, report timings and RSS."""
+    import numpy  # noqa: F401  imported before the baseline so both formats pay for it equally
+
+    from backend.grid_store import GridStore
+
+    baseline = rss_kb()
+    baseline_peak = rss_kb("VmHWM")
+    start = time.perf_counter()
+    store = GridStore.from_json(path) if fmt == "json" else GridStore.from_gridfile(path)
+    load_s = time.perf_counter() - start
+    peak_mb = (rss_kb("VmHWM") - baseline_peak) / 1024
+
+    start = time.perf_counter()
+    for k in range(1000):
+        store.cell(-45 + k % 90, -90 + k % 180)
+    cell_us = (time.perf_counter() - start) / 1000 * 1e6
+
+    start = time.perf_counter()
+    area = store.area(10, 10, radius=5)
+    area_ms = (time.perf_counter() - start) * 1000
+
+    print(json.dumps({
+        "format": fmt,
+        "load_s": round(load_s, 4),
+        "peak_rss_delta_mb": round(peak_mb, 1),
+        "rss_delta_mb": round((rss_kb() - baseline) / 1024, 1),
+        "cell_lookup_us": round(cell_us, 2),
+        "area_r5_ms": round(area_ms, 3),
+        "area_cells": len(area),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--step", type=float, default=1.0, help="grid resolution in degrees")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    parser.add_argument("--child", nargs=2, metavar=("FORMAT", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    from backend.gridfile import convert_json
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path, grid_path = Path(tmp) / "grid.json", Path(tmp) / "grid.grid"
+        with open(json_path, "w") as f:
+            json.dump(synthetic_grid(args.step), f, indent=4)
+
+        start = time.perf_counter()
+        convert_json(json_path, grid_path)
+        convert_s = time.perf_counter() - start
+
+        results = []
+        for fmt, path in (("json", json_path), ("grid", grid_path)):
+            out = subprocess.run(
+                [sys.executable, "-m", "backend.benchmarks.bench_gridfile", "--child", fmt, str(path)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(out)
+            result["file_mb"] = round(path.stat().st_size / 2**20, 2)
+            results.append(result)
+
+    summary = {"step_deg": args.step, "convert_s": round(convert_s, 3), "results": results}
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    print(f"Grid step {args.step}°, JSON -> grid conversion {convert_s:.2f}s")
+    print(f"{'format':<8}{'file MB':>10}{'load s':>10}{'peak +MB':>10}{'RSS +MB':>10}{'cell us':>10}{'area ms':>10}")
+    for r in results:
+        print(f"{r['format']:<8}{r['file_mb']:>10}{r['load_s']:>10}{r['peak_rss_delta_mb']:>10}{r['rss_delta_mb']:>10}"
+              f"{r['cell_lookup_us']:>10}{r['area_r5_ms']:>10}")
+
+
+if __name__ == "__main__":
+    main()
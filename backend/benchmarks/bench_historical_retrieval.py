@@ -0,0 +1,89 @@
+"""
+Compares prompts built with the whole historical_data.txt against region-aware retrieval.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_historical_retrieval [--budget 600] [--json]
+"""
+
+import argparse
+import json
+import time
+
+from backend.ai_agent import GPTDependencies, build_prompt
+from backend.historical_index import REGION_BOUNDS, get_historical_index, historical_data_path
+from backend.tokens import estimate_tokens
+
+LAT_STEP, LON_STEP = 20, 30
+
+
+def closest_grid_point(lat: float, lon: float) -> tuple[int, int]:
+    """Mirrors getClosestGrid in the dashboard (no antimeridian wrap)."""
+    grid_lat = min(range(-90, 90, LAT_STEP), key=lambda g: abs(g - lat))
+    grid_lon = min(range(-180, 180, LON_STEP), key=lambda g: abs(g - lon))
+    return grid_lat, grid_lon
+
+
+def time_build(deps: GPTDependencies, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        build_prompt(deps, token_budget=None)
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def _time_retrieval(grid: dict, context: str, budget: int, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        get_historical_index().context_for(grid, context, token_budget=budget)
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=int, default=600, help="history token budget")
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=25.0,
+                        help="assumed provider prefill cost used to estimate LLM latency saved")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    historical_data = historical_data_path().read_text(encoding="utf-8")
+    rows = []
+    for region, (lat_min, lat_max, lon_min, lon_max) in REGION_BOUNDS.items():
+        grid_lat, grid_lon = closest_grid_point((lat_min + lat_max) / 2, (lon_min + lon_max) / 2)
+        grid = {"gridLat": grid_lat, "gridLon": grid_lon, "ndvi": 0.5, "rain": 1.2, "temp": 18.0}
+        base = dict(context="Mixed cropping farm", gridData=grid, areaData=[])
+
+        full = GPTDependencies(**base, historical_context=historical_data)
+        retrieved_text = get_historical_index().context_for(grid, base["context"], token_budget=args.budget)
+        retrieved = GPTDependencies(**base, historical_context=retrieved_text)
+
+        full_tokens = estimate_tokens(build_prompt(full, token_budget=None))
+        retrieved_tokens = estimate_tokens(build_prompt(retrieved, token_budget=None))
+        rows.append({
+            "region": region,
+            "grid": [grid_lat, grid_lon],
+            "full_prompt_tokens": full_tokens,
+            "retrieved_prompt_tokens": retrieved_tokens,
+            "token_reduction_pct": round(100 * (1 - retrieved_tokens / full_tokens), 1),
+            "est_llm_ms_saved": round((full_tokens - retrieved_tokens) / 1000 * args.ms_per_1k_tokens, 1),
+            "full_build_ms": round(time_build(full, args.repeats), 4),
+            "retrieval_and_build_ms": round(
+                time_build(retrieved, args.repeats)
+                + _time_retrieval(grid, base["context"], args.budget, args.repeats), 4),
+        })
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(f"{'region':<24}{'grid':>12}{'full tok':>10}{'retr tok':>10}{'saved %':>9}{'~LLM ms':>9}{'build ms':>10}{'retr ms':>9}")
+    for row in rows:
+        print(f"{row['region']:<24}{str(tuple(row['grid'])):>12}{row['full_prompt_tokens']:>10}"
+              f"{row['retrieved_prompt_tokens']:>10}{row['token_reduction_pct']:>9}{row['est_llm_ms_saved']:>9}"
+              f"{row['full_build_ms']:>10.3f}{row['retrieval_and_build_ms']:>9.3f}")
+    mean_saved = sum(r["token_reduction_pct"] for r in rows) / len(rows)
+    print(f"\nMean prompt token reduction: {mean_saved:.1f}% (history budget {args.budget} tokens)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+Load test of the recommendation routes against a local stub model, spending no OpenAI tokens.
+
+Starts the app in a child process, with the agent's model replaced by StubLLM: create_app() on a
+threaded WSGI server, or create_asgi_app() on uvicorn with --server asgi. Then drives
+/api/gpt_response (or /stream) with `--concurrency` closed-loop clients sending dashboard-shaped
+payloads built from gee/dataset/test.json. The server has its own process (and GIL), so the
+clients do not slow it down. Reports requests per second, p50/p95/p99 latency, status codes,
+where tips came from (X-Tips-Source), and the mean time per traced stage, read from the server's
+/metrics. Route settings (GPT_DEADLINE_SECONDS, GPT_ADMISSION_LIMIT, ...) are read from the
+environment as usual.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_load [--requests 500] [--concurrency 32] [--latency 0.5]
+        [--distribution lognormal] [--failure-rate 0.02] [--shapes valid=0.9,short=0.1]
+        [--distinct 500] [--route gpt_response|stream] [--server wsgi|asgi] [--json] [--out run.json]
+        [--baseline base.json --tolerance 0.1]
+Exits with status 1 when a baseline is given and a tracked metric regressed beyond tolerance.
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from backend.benchmarks.harness import (
+    compare, load_dataset, make_payloads, percentiles, report_comparison, scrape,
+)
+from backend.benchmarks.stub_model import SHAPES, StubLLM
+
+ROUTES = {"gpt_response": "/api/gpt_response", "stream": "/api/gpt_response/stream"}
+TRACKED = {
+    "throughput_rps": True,
+    "latency_ms.p50": False,
+    "latency_ms.p95": False,
+    "latency_ms.p99": False,
+    "error_rate": False,
+}
+
+
+def parse_shapes(raw: str) -> dict[str, float]:
+    shapes = {}
+    for part in raw.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SHAPES:
+            raise argparse.ArgumentTypeError(f"unknown shape {name}; choose from {', '.join(SHAPES)}")
+        shapes[name] = float(weight or 1)
+    return shapes
+
+
+def serve(args):
+    """The child process: the app with a stub model, printing its port once it is listening."""
+    import socket
+
+    import backend.routes.get_chatgpt_response as gpt_route
+    from backend.ai_agent import create_agent
+    from backend.metrics import REGISTRY
+
+    stub = StubLLM(args.latency, args.distribution, args.spread, args.failure_rate, args.rate_limit_rate,
+                   args.shapes, seed=args.seed)
+    gpt_route.agent.replace(lambda: create_agent(stub.model))
+    REGISTRY.callback("bench_stub_model", "StubLLM counters (load benchmark only).",
+                      lambda: {(name,): value for name, value in stub.stats().items()}, ("stat",))
+
+    if args.server == "asgi":
+        import uvicorn
+        from backend.asgi import create_asgi_app
+
+        app = create_asgi_app(warmup="blocking", pooled_client=False)
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        print(sock.getsockname()[1], flush=True)
+        uvicorn.Server(uvicorn.Config(app, log_level="error", access_log=False, backlog=4096)).run(sockets=[sock])
+    else:
+        from werkzeug.serving import make_server
+        from backend.app import create_app
+
+        # One access-log line per request would dominate the output (and the timings)
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        server = make_server("127.0.0.1", 0, create_app(warmup="blocking"), threaded=True)
+        print(server.server_port, flush=True)
+        server.serve_forever()
+
+
+def start_server(args) -> tuple[subprocess.Popen, int]:
+    """Spawns serve() and waits until /metrics answers."""
+    process = subprocess.Popen([sys.executable, "-m", "backend.benchmarks.bench_load", *sys.argv[1:], "--serve"],
+                               stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line:
+        raise RuntimeError(f"server exited with status {process.wait()} before listening")
+    port = int(line)
+    deadline = time.monotonic() + 60
+    while True:
+        try:
+            scrape(port)
+            return process, port
+        except OSError:
+            if time.monotonic() > deadline or process.poll() is not None:
+                process.kill()
+                raise RuntimeError("server did not start answering within 60s")
+            time.sleep(0.05)
+
+
+def send(port: int, path: str, payload: dict, client: str, timeout: float) -> tuple[int, str, float]:
+    """(status, tips source, seconds) for one request; SSE bodies are read to the end."""
+    body = json.dumps(payload).encode("utf-8")
+    start = time.perf_counter()
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    try:
+        connection.request("POST", path, body, {"Content-Type": "application/json", "X-Client-Id": client})
+        response = connection.getresponse()
+        data = response.read()
+        source = response.getheader("X-Tips-Source") or ""
+        if path.endswith("/stream") and response.status == 200:
+            source = "stream_error" if b"event: error" in data else "stream"
+        return response.status, source, time.perf_counter() - start
+    except Exception as e:
+        return 0, type(e).__name__, time.perf_counter() - start
+    finally:
+        connection.close()
+
+
+def stage_totals(samples: dict, route: str) -> dict[str, tuple[float, float]]:
+    """(count, seconds) per traced stage of route, from a /metrics scrape."""
+    counts = samples.get("gpt_request_stage_seconds_count", {})
+    sums = samples.get("gpt_request_stage_seconds_sum", {})
+    return {stage: (count, sums.get((r, stage), 0.0)) for (r, stage), count in counts.items() if r == route}
+
+
+def stub_stats(samples: dict) -> dict[str, float]:
+    return {name: value for (name,), value in samples.get("bench_stub_model", {}).items()}
+
+
+def run_load(args, port: int, payloads: list[dict]) -> dict:
+    path = ROUTES[args.route]
+    # Every payload is sent once before any repeats, in an order fixed by the seed
+    plan = [payloads[i % len(payloads)] for i in range(args.requests)]
+    random.Random(args.seed).shuffle(plan)
+    next_index = 0
+    lock = threading.Lock()
+    results = []
+
+    def worker(worker_id: int):
+        nonlocal next_index
+        client = f"client-{worker_id % args.clients}"
+        while True:
+            with lock:
+                if next_index >= len(plan):
+                    return
+                payload = plan[next_index]
+                next_index += 1
+            outcome = send(port, path, payload, client, args.timeout)
+            with lock:
+                results.append(outcome)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        for worker_id in range(args.concurrency):
+            pool.submit(worker, worker_id)
+    return {"results": results, "elapsed": time.perf_counter() - started}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32, help="closed-loop clients sending at once")
+    parser.add_argument("--clients", type=int, default=8, help="distinct X-Client-Id values the workers share")
+    parser.add_argument("--route", choices=list(ROUTES), default="gpt_response")
+    parser.add_argument("--server", choices=["wsgi", "asgi"], default="wsgi",
+                        help="create_app() on a threaded WSGI server, or create_asgi_app() on uvicorn")
+    parser.add_argument("--distinct", type=int, help="distinct payloads (default --requests); fewer means cache hits")
+    parser.add_argument("--warmup", type=int, default=10, help="requests sent before measuring")
+    parser.add_argument("--latency", type=float, default=0.5, help="mean stub model latency in seconds")
+    parser.add_argument("--distribution", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--spread", type=float, default=0.4, help="uniform half-width fraction or lognormal sigma")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of model calls raising a 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of model calls raising a 429")
+    parser.add_argument("--shapes", type=parse_shapes, default={"valid": 1.0},
+                        help=f"output shape weights, e.g. valid=0.9,short=0.1 ({', '.join(SHAPES)})")
+    parser.add_argument("--timeout", type=float, default=60.0, help="client timeout per request")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dataset", type=Path, help="grid JSON to build payloads from (default test.json)")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    parser.add_argument("--out", type=Path, help="also write the results JSON here")
+    parser.add_argument("--baseline", type=Path, help="results JSON of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed regression vs baseline (fraction)")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # The provider client is never used, but building the default agent needs a key to be set
+    os.environ.setdefault("OPENAI_API_KEY", "unused-by-stub-model")
+    os.environ.setdefault("PYDANTIC_AI_NO_BANNER", "1")
+    os.environ.setdefault("DATA_RELOAD_INTERVAL_SECONDS", "0")
+    if args.serve:
+        serve(args)
+        return
+    dataset = load_dataset(args.dataset)
+    payloads = make_payloads(dataset, args.distinct or args.requests, args.seed)
+    warmup = make_payloads(dataset, args.warmup, args.seed + 1)
+    route_label = "gpt_response" if args.route == "gpt_response" else "gpt_response_stream"
+
+    server, port = start_server(args)
+    try:
+        for payload in warmup:
+            # Distinct from the measured payloads, so warm-up never pre-fills the cache for them
+            payload["field_context"] += " (warm-up)"
+            send(port, ROUTES[args.route], payload, "warmup", args.timeout)
+        before = scrape(port)
+        run = run_load(args, port, payloads)
+        after = scrape(port)
+    finally:
+        server.terminate()
+        server.wait()
+
+    outcomes = run["results"]
+    latencies = [seconds * 1000 for _, _, seconds in outcomes]
+    statuses = Counter(str(status) for status, _, _ in outcomes)
+    errors = sum(n for status, n in statuses.items() if status != "200")
+    stages = {}
+    stages_before = stage_totals(before, route_label)
+    for stage, (count, total) in sorted(stage_totals(after, route_label).items()):
+        count -= stages_before.get(stage, (0, 0.0))[0]
+        total -= stages_before.get(stage, (0, 0.0))[1]
+        if count:
+            stages[stage] = {"mean_ms": round(total / count * 1000, 3), "count": int(count)}
+    stub_before, stub_after = stub_stats(before), stub_stats(after)
+
+    results = {
+        "config": {
+            "server": args.server, "route": args.route, "requests": args.requests, "concurrency": args.concurrency,
+            "clients": args.clients, "distinct": args.distinct or args.requests, "latency": args.latency,
+            "distribution": args.distribution, "spread": args.spread, "failure_rate": args.failure_rate,
+            "rate_limit_rate": args.rate_limit_rate, "shapes": args.shapes, "seed": args.seed,
+            "env": {k: v for k, v in os.environ.items() if k.startswith("GPT_")},
+        },
+        "elapsed_s": round(run["elapsed"], 3),
+        "throughput_rps": round(len(outcomes) / run["elapsed"], 2),
+        "latency_ms": {
+            **{k: round(v, 2) for k, v in percentiles(latencies).items()},
+            "mean": round(sum(latencies) / len(latencies), 2),
+            "max": round(max(latencies), 2),
+        },
+        "error_rate": round(errors / len(outcomes), 4),
+        "status": dict(statuses),
+        "sources": dict(Counter(source for _, source, _ in outcomes)),
+        "stages": stages,
+        "model": {k: int(stub_after[k] - stub_before.get(k, 0)) for k in stub_after if k != "peak_concurrency"}
+                 | {"peak_concurrency": int(stub_after.get("peak_concurrency", 0))},
+    }
+
+    if args.out:
+        args.out.write_text(json.dumps(results, indent=2))
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{len(outcomes)} requests to {ROUTES[args.route]} ({args.server}) at concurrency {args.concurrency} "
+              f"in {results['elapsed_s']}s: {results['throughput_rps']} req/s")
+        print("latency ms   " + "  ".join(f"{k} {v}" for k, v in results["latency_ms"].items()))
+        print(f"status       {results['status']}   error rate {results['error_rate']}")
+        print(f"sources      {results['sources']}")
+        print(f"model        {results['model']}")
+        print(f"\n{'stage':<20}{'mean ms':>12}{'count':>8}")
+        for stage, row in stages.items():
+            print(f"{stage:<20}{row['mean_ms']:>12}{row['count']:>8}")
+
+    if args.baseline:
+        rows = compare(results, json.loads(args.baseline.read_text()), TRACKED, args.tolerance)
+        if report_comparison(rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
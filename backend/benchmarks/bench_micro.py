@@ -0,0 +1,105 @@
+"""
+Micro-benchmarks of the per-request CPU work around the model call: building deps from a
+dashboard payload, assembling the prompt, the speed_utils summaries, the cache key, local output
+repair and the rule-based fallback. Each operation runs over the same dashboard-shaped payloads
+bench_load sends, so a regression here shows up before it is buried in model latency.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_micro [--payloads 200] [--repeat 5] [--json] [--out run.json]
+        [--baseline base.json --tolerance 0.2]
+Exits with status 1 when a baseline is given and an operation's p50 regressed beyond tolerance.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from statistics import mean
+
+from backend.benchmarks.harness import compare, load_dataset, make_payloads, percentiles, report_comparison
+from backend.benchmarks.stub_model import SHAPES, sample_tips
+
+
+def time_op(fn, inputs: list, repeat: int) -> dict:
+    """mean/p50/p95 microseconds per call of fn over inputs, each input run `repeat` times."""
+    samples = []
+    for _ in range(repeat):
+        for item in inputs:
+            start = time.perf_counter()
+            fn(item)
+            samples.append((time.perf_counter() - start) * 1e6)
+    return {"mean_us": round(mean(samples), 2),
+            **{f"{k}_us": round(v, 2) for k, v in percentiles(samples, (50, 95)).items()},
+            "calls": len(samples)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--payloads", type=int, default=200, help="distinct dashboard payloads to time over")
+    parser.add_argument("--repeat", type=int, default=5, help="passes over the payloads per operation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dataset", type=Path, help="grid JSON to build payloads from (default test.json)")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    parser.add_argument("--out", type=Path, help="also write the results JSON here")
+    parser.add_argument("--baseline", type=Path, help="results JSON of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed regression vs baseline (fraction)")
+    args = parser.parse_args()
+
+    os.environ.setdefault("OPENAI_API_KEY", "unused-by-micro-benchmarks")
+    from backend.ai_agent import build_prompt
+    from backend.fallback_tips import fallback_tips
+    from backend.grid_store import get_grid_store
+    from backend.output_repair import repair_tips
+    from backend.recommendation_cache import canonical_key
+    from backend.request_deps import build_deps
+    from backend.speed_utils import (
+        bands_to_columns, cells_to_columns, compact_grid, neighbourhood_means, summarize_area_list,
+        summarize_columns,
+    )
+
+    payloads = make_payloads(load_dataset(args.dataset), args.payloads, args.seed)
+    # Loaded once up front so first-call file reads are not timed as part of build_deps
+    deps = [build_deps(p) for p in payloads]
+    store = get_grid_store()
+    store_columns = bands_to_columns(store.values, store.bands).reshape(-1, *store.values.shape[1:])
+    area_columns = [cells_to_columns(p["areaData"]) for p in payloads]
+    answers = [sample_tips(shape) for shape in SHAPES]
+
+    ops = {
+        "build_deps": (build_deps, payloads),
+        "build_prompt": (build_prompt, deps),
+        "build_prompt_unbudgeted": (lambda d: build_prompt(d, token_budget=None), deps),
+        "canonical_key": (canonical_key, deps),
+        "compact_grid": (lambda p: compact_grid(p["gridData"]), payloads),
+        "cells_to_columns": (lambda p: cells_to_columns(p["areaData"]), payloads),
+        "summarize_columns": (summarize_columns, area_columns),
+        "summarize_area_list": (lambda p: summarize_area_list(p["areaData"], p["gridData"]), payloads),
+        "neighbourhood_means": (neighbourhood_means, [store_columns]),
+        "repair_tips": (repair_tips, answers),
+        "fallback_tips": (lambda p: fallback_tips(p["gridData"], p["areaData"]), payloads),
+    }
+    results = {
+        "config": {"payloads": args.payloads, "repeat": args.repeat, "seed": args.seed},
+        "ops": {name: time_op(fn, inputs, args.repeat) for name, (fn, inputs) in ops.items()},
+    }
+
+    if args.out:
+        args.out.write_text(json.dumps(results, indent=2))
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'operation':<26}{'mean us':>12}{'p50 us':>12}{'p95 us':>12}{'calls':>8}")
+        for name, row in results["ops"].items():
+            print(f"{name:<26}{row['mean_us']:>12}{row['p50_us']:>12}{row['p95_us']:>12}{row['calls']:>8}")
+
+    if args.baseline:
+        tracked = {f"ops.{name}.p50_us": False for name in ops}
+        rows = compare(results, json.loads(args.baseline.read_text()), tracked, args.tolerance)
+        if report_comparison(rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Shows how prompt size grows with the area selection radius, with and without the token budget,
+and where the budgeted tokens go.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_prompt_budget [--budget 1500] [--ms-per-1k-tokens 25] [--json]
+"""
+
+import argparse
+import json
+import time
+
+from backend.ai_agent import GPTDependencies, HISTORY_TOKEN_BUDGET, PROMPT_TOKEN_BUDGET
+from backend.grid_store import get_grid_store
+from backend.historical_index import get_historical_index
+from backend.prompt_builder import assemble_prompt
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=int, default=PROMPT_TOKEN_BUDGET)
+    parser.add_argument("--lat", type=float, default=-40.0)
+    parser.add_argument("--lon", type=float, default=175.0)
+    parser.add_argument("--radii", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=25.0,
+                        help="assumed provider prefill cost used to estimate LLM latency")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    store = get_grid_store()
+    grid = store.cell(args.lat, args.lon)
+    context = "Mixed cropping farm, recent dry spell, considering irrigation"
+    history = get_historical_index().context_for(grid, context, token_budget=HISTORY_TOKEN_BUDGET)
+
+    rows = []
+    for radius in args.radii:
+        deps = GPTDependencies(context=context, gridData=grid, areaData=store.area_for_prompt(args.lat, args.lon, radius),
+                               historical_context=history)
+        _, unbounded = assemble_prompt(deps, None)
+        start = time.perf_counter()
+        for _ in range(args.repeats):
+            _, bounded = assemble_prompt(deps, args.budget)
+        build_ms = (time.perf_counter() - start) / args.repeats * 1000
+        rows.append({
+            "radius": radius,
+            "area_cells": len(deps.areaData),
+            "unbounded_tokens": unbounded["total"],
+            "budgeted_tokens": bounded["total"],
+            "est_llm_ms_unbounded": round(unbounded["total"] / 1000 * args.ms_per_1k_tokens, 1),
+            "est_llm_ms_budgeted": round(bounded["total"] / 1000 * args.ms_per_1k_tokens, 1),
+            "build_ms": round(build_ms, 3),
+            "sections": bounded["tokens"],
+            "degraded": bounded["degraded"],
+        })
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(f"{'radius':>6}{'cells':>7}{'unbounded':>11}{'budgeted':>10}{'~LLM ms':>9}{'build ms':>10}  sections / degraded")
+    for row in rows:
+        print(f"{row['radius']:>6}{row['area_cells']:>7}{row['unbounded_tokens']:>11}{row['budgeted_tokens']:>10}"
+              f"{row['est_llm_ms_budgeted']:>9}{row['build_ms']:>10.3f}  {row['sections']} {row['degraded']}")
+    print(f"\nBudget {args.budget} tokens")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Cold-start time of an API worker: how long a fresh process takes to import the app, build it with
+create_app(), accept connections, and answer its first recommendation, for each APP_WARMUP mode.
+
+Each run starts a new interpreter (the --child mode of this script) serving create_app() on a local
+port, with the agent's model replaced by StubLLM so no OpenAI call is made; the stub and pydantic-ai
+are still only imported when the agent is first built, as in production. The parent times the
+child from spawn until it is listening ("ready") and until the first /api/gpt_response answer
+("first response"), then sends a second request for the steady-state latency.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_startup [--runs 5] [--modes off background blocking]
+        [--latency 0] [--top 15] [--json] [--out run.json] [--baseline base.json --tolerance 0.2]
+Exits with status 1 when a baseline is given and a startup time regressed beyond tolerance.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from statistics import median
+
+from backend.benchmarks.harness import compare, load_dataset, make_payloads, report_comparison
+
+MODES = ("off", "background", "blocking")
+TIMINGS = ("import_s", "create_app_s", "ready_s", "first_response_s", "first_request_ms", "second_request_ms")
+
+
+def child(args):
+    """Serves the app on an ephemeral port and prints one JSON line once it is listening."""
+    started = time.perf_counter()
+    import backend.app
+    import backend.routes.get_chatgpt_response as gpt_route
+    imported = time.perf_counter()
+
+    def stub_agent():
+        from backend.ai_agent import create_agent
+        from backend.benchmarks.stub_model import StubLLM
+
+        return create_agent(StubLLM(args.latency, "fixed").model)
+
+    gpt_route.agent.replace(stub_agent)
+    app = backend.app.create_app(warmup=args.child)
+    created = time.perf_counter()
+
+    import logging
+    from werkzeug.serving import make_server
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    print(json.dumps({"port": server.server_port, "import_s": imported - started,
+                      "create_app_s": created - imported}), flush=True)
+    server.serve_forever()
+
+
+def post(port: int, payload: dict) -> tuple[int, float]:
+    body = json.dumps(payload).encode("utf-8")
+    start = time.perf_counter()
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    try:
+        connection.request("POST", "/api/gpt_response", body, {"Content-Type": "application/json"})
+        response = connection.getresponse()
+        response.read()
+        return response.status, time.perf_counter() - start
+    finally:
+        connection.close()
+
+
+def start_once(mode: str, args, payloads: list[dict], env: dict) -> dict:
+    spawned = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "backend.benchmarks.bench_startup", "--child", mode, "--latency", str(args.latency)],
+        stdout=subprocess.PIPE, text=True, env=env,
+    )
+    try:
+        line = process.stdout.readline()
+        ready = time.perf_counter()
+        if not line:
+            raise RuntimeError(f"child exited with status {process.wait()} before listening")
+        info = json.loads(line)
+        status, first = post(info["port"], payloads[0])
+        first_response = time.perf_counter()
+        status_2, second = post(info["port"], payloads[1])
+    finally:
+        process.terminate()
+        process.wait()
+    return {
+        "import_s": info["import_s"], "create_app_s": info["create_app_s"],
+        "ready_s": ready - spawned, "first_response_s": first_response - spawned,
+        "first_request_ms": first * 1000, "second_request_ms": second * 1000,
+        "ok": status == 200 and status_2 == 200,
+    }
+
+
+def interpreter_seconds(env: dict) -> float:
+    """Time to start and exit a bare interpreter, the floor under ready_s."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True, env=env)
+    return time.perf_counter() - start
+
+
+def heaviest_imports(env: dict, n: int) -> list[dict]:
+    """The n modules with the most self time (-X importtime) when importing and building the app."""
+    err = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "from backend.app import create_app; create_app('off')"],
+        check=True, capture_output=True, text=True, env=env,
+    ).stderr
+    rows = []
+    for line in err.splitlines():
+        parts = line.removeprefix("import time:").split("|")
+        if len(parts) == 3 and parts[0].strip().isdigit():
+            rows.append({"module": parts[2].strip(), "self_ms": int(parts[0]) / 1000,
+                         "cumulative_ms": int(parts[1]) / 1000})
+    return sorted(rows, key=lambda r: r["self_ms"], reverse=True)[:n]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes started per mode")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--latency", type=float, default=0.0, help="stub model latency in seconds")
+    parser.add_argument("--top", type=int, default=15, help="heaviest imports to list (0 to skip)")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    parser.add_argument("--out", type=Path, help="also write the results JSON here")
+    parser.add_argument("--baseline", type=Path, help="results JSON of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed regression vs baseline (fraction)")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+        return
+
+    env = dict(os.environ)
+    # The provider client is never used, but building the default agent needs a key to be set
+    env.setdefault("OPENAI_API_KEY", "unused-by-stub-model")
+    env.setdefault("PYDANTIC_AI_NO_BANNER", "1")
+    env["DATA_RELOAD_INTERVAL_SECONDS"] = "0"
+    payloads = make_payloads(load_dataset(), 2)
+
+    modes = {}
+    for mode in args.modes:
+        runs = [start_once(mode, args, payloads, env) for _ in range(args.runs)]
+        modes[mode] = {name: round(median(run[name] for run in runs), 4) for name in TIMINGS}
+        modes[mode]["failed_runs"] = sum(not run["ok"] for run in runs)
+    results = {
+        "config": {"runs": args.runs, "latency": args.latency, "python": sys.version.split()[0]},
+        "interpreter_s": round(median(interpreter_seconds(env) for _ in range(args.runs)), 4),
+        "modes": modes,
+        "heaviest_imports": heaviest_imports(env, args.top) if args.top else [],
+    }
+
+    if args.out:
+        args.out.write_text(json.dumps(results, indent=2))
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"Median of {args.runs} cold starts (bare interpreter {results['interpreter_s']}s)")
+        print(f"{'warm-up':<12}{'import s':>10}{'create s':>10}{'ready s':>10}{'first resp s':>14}"
+              f"{'1st req ms':>12}{'2nd req ms':>12}{'failed':>8}")
+        for mode, row in modes.items():
+            print(f"{mode:<12}{row['import_s']:>10}{row['create_app_s']:>10}{row['ready_s']:>10}"
+                  f"{row['first_response_s']:>14}{row['first_request_ms']:>12}{row['second_request_ms']:>12}"
+                  f"{row['failed_runs']:>8}")
+        if results["heaviest_imports"]:
+            print(f"\n{'module (heaviest self import time)':<56}{'self ms':>10}{'cum ms':>10}")
+            for row in results["heaviest_imports"]:
+                print(f"{row['module']:<56}{row['self_ms']:>10.1f}{row['cumulative_ms']:>10.1f}")
+
+    if args.baseline:
+        tracked = {f"modes.{mode}.{name}": False for mode in args.modes
+                   for name in ("ready_s", "first_response_s")}
+        rows = compare(results, json.loads(args.baseline.read_text()), tracked, args.tolerance)
+        if report_comparison(rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
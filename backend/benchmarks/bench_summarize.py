@@ -0,0 +1,194 @@
+"""
+Compares the vectorized speed_utils summaries with the original per-cell Python loop, and checks
+that the selected-cell numbers the prompt needs survive summarization.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_summarize [--cells 5000] [--json]
+"""
+
+import argparse
+import json
+import math
+import random
+import time
+from statistics import mean
+
+import numpy as np
+
+from backend.speed_utils import (
+    DECIMALS, METRICS, cells_to_columns, compact_grid, neighbourhood_means, summarize_area_list, summarize_columns,
+)
+
+# The pre-vectorization implementation, kept here as the baseline
+LEGACY_SOURCES = {
+    "NDVI": ["NDVI"],
+    "total_precipitation": ["total_precipitation", "rain"],
+    "mean_2m_air_temperature": ["mean_2m_air_temperature", "temp"],
+    "volumetric_soil_water_layer_1": ["volumetric_soil_water_layer_1", "soil_moisture_1"],
+    "volumetric_soil_water_layer_2": ["volumetric_soil_water_layer_2", "soil_moisture_2"],
+    "cropland": ["cropland"],
+}
+LEGACY_TO_PROMPT = {
+    "NDVI": ("NDVI", 1.0, 0.0),
+    "total_precipitation": ("precip_mm_day", 1000.0, 0.0),
+    "mean_2m_air_temperature": ("temp_C", 1.0, -273.15),
+    "volumetric_soil_water_layer_1": ("soil_w1_pct", 100.0, 0.0),
+    "volumetric_soil_water_layer_2": ("soil_w2_pct", 100.0, 0.0),
+    "cropland": ("cropland_pct", 100.0, 0.0),
+}
+
+
+def _first_present_num(d, keys):
+    for k in keys:
+        v = d.get(k)
+        if isinstance(v, (int, float)):
+            return float(v)
+    return None
+
+
+def legacy_summarize_area_list(area_list):
+    cells = [c for c in area_list if isinstance(c, dict)]
+    out = {"n_cells": len(cells), "metrics": {}}
+    for canonical, choices in LEGACY_SOURCES.items():
+        vals = []
+        for c in cells:
+            v = _first_present_num(c, choices)
+            if v is None:
+                continue
+            if canonical == "mean_2m_air_temperature" and "temp" in c:
+                v = v + 273.15
+            if canonical == "total_precipitation" and "rain" in c:
+                v = v / 1000.0
+            vals.append(v)
+        if vals:
+            out["metrics"][canonical] = {"mean": mean(vals), "min": min(vals), "max": max(vals), "count": len(vals)}
+    return out
+
+
+def era5_cell(rng: random.Random) -> dict:
+    cell = {
+        "NDVI": rng.uniform(-0.1, 0.9),
+        "total_precipitation": rng.uniform(0, 0.02),
+        "mean_2m_air_temperature": rng.uniform(250, 310),
+        "volumetric_soil_water_layer_1": rng.uniform(0.05, 0.5),
+        "volumetric_soil_water_layer_2": rng.uniform(0.05, 0.5),
+        "cropland": rng.uniform(0, 1),
+        "landcover": rng.randrange(10, 100, 10),
+    }
+    if rng.random() < 0.05:
+        cell["NDVI"] = None
+    return cell
+
+
+def as_area_data(cell: dict) -> dict:
+    """The dashboard's areaData aliases (getAreaDataForSuggestions): same ERA5 units, renamed keys."""
+    return {
+        "NDVI": cell["NDVI"], "rain": cell["total_precipitation"], "temp": cell["mean_2m_air_temperature"],
+        "soil_moisture_1": cell["volumetric_soil_water_layer_1"],
+        "soil_moisture_2": cell["volumetric_soil_water_layer_2"],
+        "cropland": cell["cropland"], "landcover": cell["landcover"],
+    }
+
+
+def as_grid_data(cell: dict) -> dict:
+    """The dashboard's gridData (getDataForLocation) without the display noise: mm and °C."""
+    return {
+        "ndvi": cell["NDVI"], "rain": cell["total_precipitation"] * 1000,
+        "temp": cell["mean_2m_air_temperature"] - 273.15, "cropland": cell["cropland"],
+        "landcover": cell["landcover"],
+    }
+
+
+def timed(fn, repeats: int) -> tuple[float, object]:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = fn()
+    return (time.perf_counter() - start) / repeats * 1000, result
+
+
+def check_fidelity(era5: list[dict]) -> None:
+    """Raises AssertionError if any prompt-facing number drifts from the source data."""
+    selected = era5[len(era5) // 2]
+    area = [as_area_data(c) for c in era5]
+
+    # Both area schemas summarize to the same statistics
+    assert summarize_area_list(era5) == summarize_area_list(area), "ERA5 and alias schemas disagree"
+
+    # The selected cell's numbers are exactly what compact_grid reports for it, in either schema
+    summary = summarize_area_list(area, as_grid_data(selected))
+    compact = compact_grid(as_grid_data(selected))
+    from_era5 = compact_grid(selected)
+    for name in METRICS:
+        if compact[name] is not None:
+            assert compact[name] == from_era5[name], f"compact_grid differs between schemas for {name}"
+            assert summary["metrics"][name]["selected"] == compact[name], name
+
+    # Mean/min/max/count match the legacy loop on ERA5 keys, where its unit handling was correct
+    legacy = legacy_summarize_area_list(era5)
+    for key, stats in legacy["metrics"].items():
+        name, scale, offset = LEGACY_TO_PROMPT[key]
+        ours = summary["metrics"][name]
+        assert ours["count"] == stats["count"], name
+        for stat in ("mean", "min", "max"):
+            expected = stats[stat] * scale + offset
+            assert math.isclose(ours[stat], expected, abs_tol=10 ** -DECIMALS[name]), (name, stat, ours[stat], expected)
+
+    # The neighbourhood pass agrees with summarizing one 3x3 window by hand
+    side = int(math.isqrt(len(era5)))
+    grid = cells_to_columns(era5[: side * side]).reshape(len(METRICS), side, side)
+    means, anomalies = neighbourhood_means(grid)
+    i = j = side // 2
+    window = grid[:, i - 1:i + 2, j - 1:j + 2].reshape(len(METRICS), -1)
+    direct = summarize_columns(window, 4)
+    for m, name in enumerate(METRICS):
+        if name in direct["metrics"] and "anomaly" in direct["metrics"][name]:
+            assert math.isclose(anomalies[m, i, j], direct["metrics"][name]["anomaly"],
+                                abs_tol=10 ** -DECIMALS[name]), name
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cells", type=int, default=5000)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    era5 = [era5_cell(rng) for _ in range(args.cells)]
+    area = [as_area_data(c) for c in era5]
+    check_fidelity(era5)
+
+    small = area[:9]
+    legacy_9_ms, _ = timed(lambda: legacy_summarize_area_list(small), args.repeats * 50)
+    selected = as_grid_data(era5[4])
+    vector_9_ms, _ = timed(lambda: summarize_area_list(small, selected), args.repeats * 50)
+    legacy_ms, _ = timed(lambda: legacy_summarize_area_list(area), args.repeats)
+    vector_ms, _ = timed(lambda: summarize_area_list(area, selected), args.repeats)
+
+    columns = cells_to_columns(area)
+    columns_ms, _ = timed(lambda: summarize_columns(columns, 0), args.repeats)
+    side = int(math.isqrt(args.cells))
+    grid = np.ascontiguousarray(columns[:, : side * side].reshape(len(METRICS), side, side))
+    neighbourhood_ms, _ = timed(lambda: neighbourhood_means(grid), args.repeats)
+
+    results = {
+        "cells": args.cells,
+        "legacy_3x3_ms": round(legacy_9_ms, 4),
+        "vectorized_3x3_ms": round(vector_9_ms, 4),
+        "legacy_ms": round(legacy_ms, 2),
+        "vectorized_ms": round(vector_ms, 2),
+        "vectorized_from_columns_ms": round(columns_ms, 3),
+        "every_cell_3x3_anomaly_ms": round(neighbourhood_ms, 3),
+        "speedup": round(legacy_ms / vector_ms, 1),
+        "fidelity": "ok",
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for key, value in results.items():
+        print(f"{key:<28}{value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Local stand-in for the parts of the `ee` client used by backend/gee/dataset.
+
+Values are deterministic functions of (band, lon, lat), so runs are reproducible.
+getInfo() calls can be given a simulated latency, a failure rate and a concurrency
+limit (exceeding it raises, like Earth Engine's "Too many concurrent aggregations").
+"""
+
+import hashlib
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+
+class FakeEEException(Exception):
+    pass
+
+
+class FakeEE:
+    def __init__(self, latency: float = 0.0, per_point_latency: float = 0.0, failure_rate: float = 0.0,
+                 max_concurrent: int | None = None, time_start: int = 1_700_000_000_000, seed: int = 0):
+        self.latency = latency
+        self.per_point_latency = per_point_latency
+        self.failure_rate = failure_rate
+        self.max_concurrent = max_concurrent
+        self.time_start = time_start
+        self.calls = 0
+        self.failures = 0
+        self.points_fetched = 0
+        self.peak_concurrency = 0
+        self._active = 0
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+
+        self.Geometry = SimpleNamespace(Point=lambda lon, lat: (lon, lat))
+        self.Reducer = SimpleNamespace(first=lambda: "first")
+        self.EEException = FakeEEException
+
+    def ImageCollection(self, source):
+        if isinstance(source, _Image):
+            return _Collection(self, source.bands)
+        return _Collection(self, ())
+
+    def Image(self, asset_id):
+        return _Image(self, ())
+
+    def FeatureCollection(self, points):
+        return list(points)
+
+    def _get_info(self, compute, n_points: int = 0):
+        """Runs one simulated server round trip."""
+        with self._lock:
+            self.calls += 1
+            self._active += 1
+            self.peak_concurrency = max(self.peak_concurrency, self._active)
+            over_limit = self.max_concurrent is not None and self._active > self.max_concurrent
+            fail = over_limit or self._rng.random() < self.failure_rate
+        try:
+            time.sleep(self.latency + self.per_point_latency * n_points)
+            if fail:
+                with self._lock:
+                    self.failures += 1
+                raise FakeEEException(
+                    "Too many concurrent aggregations." if over_limit else "Computation timed out."
+                )
+            return compute()
+        finally:
+            with self._lock:
+                self._active -= 1
+
+
+class _Value:
+    def __init__(self, client: FakeEE, compute):
+        self._client = client
+        self._compute = compute
+
+    def getInfo(self):
+        return self._client._get_info(self._compute)
+
+
+class _Image:
+    def __init__(self, client: FakeEE, bands: tuple):
+        self._client = client
+        self.bands = bands
+
+    def select(self, band):
+        return _Image(self._client, (band,))
+
+    def addBands(self, other: "_Image"):
+        return _Image(self._client, self.bands + other.bands)
+
+    def get(self, prop):
+        return _Value(self._client, lambda: self._client.time_start if prop == "system:time_start" else None)
+
+    def reduceRegions(self, collection, reducer, scale):
+        def compute():
+            features = []
+            for lon, lat in collection:
+                properties = {band: fake_value(band, lon, lat) for band in self.bands}
+                features.append({"geometry": {"coordinates": [lon, lat]}, "properties": properties})
+            with self._client._lock:
+                self._client.points_fetched += len(collection)
+            return {"features": features}
+
+        client = self._client
+        return SimpleNamespace(getInfo=lambda: client._get_info(compute, len(collection)))
+
+
+class _Collection:
+    def __init__(self, client: FakeEE, bands: tuple):
+        self._client = client
+        self.bands = bands
+
+    def select(self, band):
+        return _Collection(self._client, (band,))
+
+    def sort(self, prop, ascending=True):
+        return self
+
+    def filterDate(self, start, end):
+        return self
+
+    def first(self):
+        return _Image(self._client, self.bands)
+
+
+def fake_value(band: str, lon: float, lat: float) -> float | None:
+    """Deterministic pseudo-random band value; about a third of cells are null like ocean cells."""
+    digest = hashlib.blake2b(f"{band}:{lon}:{lat}".encode(), digest_size=8).digest()
+    r = int.from_bytes(digest, "little") / 2**64
+    return None if r < 0.3 else round(r, 6)
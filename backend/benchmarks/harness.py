@@ -0,0 +1,157 @@
+"""
+Shared pieces of the load and micro benchmarks: dashboard-shaped request payloads built from the
+fetched grid (gee/dataset/test.json), latency percentiles, reading a server's /metrics, and
+comparison against a saved run.
+"""
+
+import http.client
+import json
+import math
+import random
+import re
+from pathlib import Path
+
+from backend.grid_store import AREA_FIELDS, DEFAULT_GRID_PATH
+
+CONTEXTS = (
+    "Dairy farm on volcanic loam, pasture recovering after a dry summer",
+    "Mixed cropping farm, recent dry spell, considering irrigation",
+    "Smallholder maize and beans, rain-fed, heavy clay soil",
+    "Vineyard on a north-facing slope, frost risk in spring",
+    "Wheat and canola rotation, planning nitrogen application",
+    "Rice paddies, monsoon season approaching",
+    "Sheep and beef hill country, erosion on steep faces",
+    "Orchard (apples), considering new irrigation scheduling",
+)
+
+
+def _noise(seed: float, pct: float = 0.12) -> float:
+    """seededNoise from the dashboard's dataHelpers.js."""
+    s = abs(math.floor(seed * 100000))
+    s = (s * 9301 + 49297) % 233280
+    return 1 + (s / 233280 * 2 - 1) * pct
+
+
+def load_dataset(path: str | Path | None = None) -> dict:
+    with open(path or DEFAULT_GRID_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def dashboard_payload(dataset: dict, key: str, lat: float, lon: float, context: str) -> dict:
+    """
+    The /api/gpt_response body the dashboard sends for a click at lat/lon on the cell `key`:
+    gridData from getDataForLocation (display units with seeded noise) and areaData from
+    getAreaDataForSuggestions (raw units, aliased names).
+    """
+    entry = dataset[key]
+    grid_lon, grid_lat = (float(v) for v in key.split(","))
+    seed = lat * 1000 + lon
+    grid = {"gridLat": grid_lat, "gridLon": grid_lon, "gridLabel": f"({key})"}
+    if entry.get("NDVI") is not None:
+        grid["ndvi"] = entry["NDVI"] * _noise(seed + 3)
+        grid["health"] = round(20 + max(0, min(1, (grid["ndvi"] + 1) / 2)) * 80)
+    if entry.get("total_precipitation") is not None:
+        grid["rain"] = entry["total_precipitation"] * 1000 * _noise(seed + 1)
+    if entry.get("mean_2m_air_temperature") is not None:
+        grid["temp"] = (entry["mean_2m_air_temperature"] - 273.15) * _noise(seed + 2)
+    if entry.get("cropland") is not None:
+        grid["cropSupport"] = entry["cropland"] * _noise(seed + 4)
+
+    lat_step, lon_step = dataset.get("lat_step", 20), dataset.get("lon_step", 30)
+    area = []
+    for d_lat in (-lat_step, 0, lat_step):
+        for d_lon in (-lon_step, 0, lon_step):
+            neighbour = dataset.get(f"{grid_lon + d_lon:g},{grid_lat + d_lat:g}")
+            if neighbour:
+                area.append({"gridLat": grid_lat + d_lat, "gridLon": grid_lon + d_lon,
+                             **{name: neighbour.get(band) for name, band in AREA_FIELDS.items()}})
+    return {"field_context": context, "gridData": grid, "areaData": area}
+
+
+def make_payloads(dataset: dict, n: int, seed: int = 0) -> list[dict]:
+    """
+    n distinct payloads for clicks on land cells. Each has its own click position and a numbered
+    context, so no two share a cache key.
+    """
+    rng = random.Random(seed)
+    keys = [k for k, v in dataset.items() if isinstance(v, dict) and v.get("NDVI") is not None] or \
+        [k for k, v in dataset.items() if isinstance(v, dict)]
+    lat_step, lon_step = dataset.get("lat_step", 20), dataset.get("lon_step", 30)
+    payloads = []
+    for i in range(n):
+        key = rng.choice(keys)
+        grid_lon, grid_lat = (float(v) for v in key.split(","))
+        lat = grid_lat + rng.uniform(-lat_step / 2, lat_step / 2)
+        lon = grid_lon + rng.uniform(-lon_step / 2, lon_step / 2)
+        context = f"{rng.choice(CONTEXTS)} (field {i})"
+        payloads.append(dashboard_payload(dataset, key, lat, lon, context))
+    return payloads
+
+
+def percentiles(values: list[float], qs=(50, 95, 99)) -> dict[str, float]:
+    """Nearest-rank percentiles, as {"p50": ..., ...}; empty input gives None for each."""
+    ordered = sorted(values)
+    out = {}
+    for q in qs:
+        out[f"p{q}"] = ordered[min(len(ordered) - 1, max(math.ceil(q / 100 * len(ordered)) - 1, 0))] if ordered else None
+    return out
+
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][\w:]*)(?:\{(.*)\})? (\S+)$')
+LABEL = re.compile(r'(\w+)="([^"]*)"')
+
+
+def scrape(port: int, host: str = "127.0.0.1") -> dict[str, dict[tuple, float]]:
+    """A local server's GET /metrics, as {sample name: {label values: value}}."""
+    connection = http.client.HTTPConnection(host, port, timeout=10)
+    try:
+        connection.request("GET", "/metrics")
+        text = connection.getresponse().read().decode("utf-8")
+    finally:
+        connection.close()
+    samples: dict[str, dict[tuple, float]] = {}
+    for line in text.splitlines():
+        match = SAMPLE.match(line)
+        if match:
+            name, labels, value = match.groups()
+            samples.setdefault(name, {})[tuple(v for _, v in LABEL.findall(labels or ""))] = float(value)
+    return samples
+
+
+def flatten(results: dict, prefix: str = "") -> dict[str, float]:
+    """Numeric leaves of a results dict keyed by dotted path, e.g. "latency_ms.p95"."""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, path + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare(results: dict, baseline: dict, higher_is_better: dict[str, bool], tolerance: float) -> list[dict]:
+    """
+    Compares the tracked metrics of two runs. higher_is_better maps dotted metric paths (see
+    flatten) to their direction; a metric regresses when it is worse than baseline by more than
+    tolerance (a fraction).
+    """
+    ours, theirs = flatten(results), flatten(baseline)
+    rows = []
+    for path, higher in higher_is_better.items():
+        if path not in ours or path not in theirs or not theirs[path]:
+            continue
+        change = (ours[path] - theirs[path]) / abs(theirs[path])
+        worse = -change if higher else change
+        rows.append({"metric": path, "baseline": theirs[path], "current": ours[path],
+                     "change_pct": round(change * 100, 1), "regressed": worse > tolerance})
+    return rows
+
+
+def report_comparison(rows: list[dict]) -> bool:
+    """Prints the comparison table; returns whether anything regressed."""
+    print(f"\n{'metric':<36}{'baseline':>12}{'current':>12}{'change':>10}")
+    for row in rows:
+        flag = "  REGRESSED" if row["regressed"] else ""
+        print(f"{row['metric']:<36}{row['baseline']:>12g}{row['current']:>12g}{row['change_pct']:>9.1f}%{flag}")
+    return any(row["regressed"] for row in rows)
@@ -0,0 +1,147 @@
+"""
+Local stand-in for the OpenAI model behind the agent, for load tests that spend no tokens.
+
+StubLLM wraps a pydantic-ai FunctionModel (plain and streamed) whose answers take a simulated
+latency drawn from a fixed, uniform or lognormal distribution, fail at a configurable rate (as
+provider 500s or 429s), and come in configurable shapes: valid 5 🟩 + 3 🟥 lists, or the near
+misses output_repair handles (misordered, short, long) and unusable ones (garbage). Short
+answers exercise the follow-up repair call, which the stub answers with the tips it asks for.
+"""
+
+import asyncio
+import json
+import math
+import random
+import re
+import threading
+
+from pydantic_ai.exceptions import ModelHTTPError
+from pydantic_ai.messages import ModelResponse, ToolCallPart
+from pydantic_ai.models.function import AgentInfo, DeltaToolCall, FunctionModel
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+SHAPES = ("valid", "misordered", "short", "long", "garbage")
+REPAIR_REQUEST = re.compile(r"Write exactly (\d+) new 🟩 suggestions and (\d+) new 🟥")
+
+
+def _green(n: int, start: int = 0) -> list[str]:
+    return [f"🟩 Because NDVI is 0.{41 + i}, apply nitrogen in split dose {i + 1}." for i in range(start, start + n)]
+
+
+def _red(n: int, start: int = 0) -> list[str]:
+    return [f"🟥 Avoid irrigating above {12 + i} mm while topsoil moisture is 38%." for i in range(start, start + n)]
+
+
+def sample_tips(shape: str) -> list[str]:
+    if shape == "misordered":
+        return _red(3) + _green(5)
+    if shape == "short":
+        return _green(4) + _red(3)
+    if shape == "long":
+        return _green(6) + _red(3)
+    if shape == "garbage":
+        return ["Consider the weather.", "Plant crops."]
+    return _green(5) + _red(3)
+
+
+class StubLLM:
+    def __init__(self, latency: float = 0.5, distribution: str = "lognormal", spread: float = 0.4,
+                 failure_rate: float = 0.0, rate_limit_rate: float = 0.0, shapes: dict[str, float] | None = None,
+                 stream_chunks: int = 8, seed: int = 0):
+        """
+        latency is the mean seconds per call; spread is the uniform half-width as a fraction of it,
+        or the lognormal sigma. shapes maps SHAPES to relative weights (default all valid).
+        """
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"distribution must be one of {', '.join(LATENCY_DISTRIBUTIONS)}")
+        self.latency = latency
+        self.distribution = distribution
+        self.spread = spread
+        self.failure_rate = failure_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.shapes = shapes or {"valid": 1.0}
+        self.stream_chunks = stream_chunks
+        self.calls = 0
+        self.repair_calls = 0
+        self.failures = 0
+        self.rate_limited = 0
+        self.peak_concurrency = 0
+        self._active = 0
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self.model = FunctionModel(self._respond, stream_function=self._stream, model_name="stub")
+
+    def _draw(self) -> tuple[float, str | None, str]:
+        """(latency, failure kind or None, output shape) for one call."""
+        with self._lock:
+            if self.distribution == "fixed":
+                latency = self.latency
+            elif self.distribution == "uniform":
+                latency = self.latency * (1 + self._rng.uniform(-self.spread, self.spread))
+            else:
+                # Median scaled so the mean stays at self.latency
+                latency = self._rng.lognormvariate(0, self.spread) * self.latency / math.exp(self.spread ** 2 / 2)
+            roll = self._rng.random()
+            failure = "rate_limit" if roll < self.rate_limit_rate else \
+                "error" if roll < self.rate_limit_rate + self.failure_rate else None
+            shape = self._rng.choices(list(self.shapes), weights=list(self.shapes.values()))[0]
+        return max(latency, 0.0), failure, shape
+
+    def _answer(self, messages) -> tuple[float, str | None, list[str]]:
+        """(latency, failure kind or None, tips) for one model request."""
+        latency, failure, shape = self._draw()
+        with self._lock:
+            self.calls += 1
+            self._active += 1
+            self.peak_concurrency = max(self.peak_concurrency, self._active)
+        prompt = str(messages[-1])
+        repair = REPAIR_REQUEST.search(prompt)
+        if repair:
+            with self._lock:
+                self.repair_calls += 1
+            # Follow-ups ask for a handful of tips, so they answer faster
+            return latency / 4, None, _green(int(repair.group(1)), start=10) + _red(int(repair.group(2)), start=10)
+        if failure is not None:
+            with self._lock:
+                self.failures += failure == "error"
+                self.rate_limited += failure == "rate_limit"
+        return latency, failure, sample_tips(shape)
+
+    def _done(self):
+        with self._lock:
+            self._active -= 1
+
+    async def _respond(self, messages, info: AgentInfo) -> ModelResponse:
+        latency, failure, tips = self._answer(messages)
+        try:
+            await asyncio.sleep(latency)
+            if failure is not None:
+                raise ModelHTTPError(429 if failure == "rate_limit" else 500, "stub")
+            return ModelResponse(parts=[ToolCallPart(info.output_tools[0].name, {"tips": tips})])
+        finally:
+            self._done()
+
+    async def _stream(self, messages, info: AgentInfo):
+        latency, failure, tips = self._answer(messages)
+        try:
+            if failure is not None:
+                await asyncio.sleep(latency)
+                raise ModelHTTPError(429 if failure == "rate_limit" else 500, "stub")
+            args = json.dumps({"tips": tips}, ensure_ascii=False)
+            step = -(-len(args) // self.stream_chunks)
+            yield {0: DeltaToolCall(name=info.output_tools[0].name)}
+            for start in range(0, len(args), step):
+                await asyncio.sleep(latency / self.stream_chunks)
+                yield {0: DeltaToolCall(json_args=args[start:start + step])}
+        finally:
+            self._done()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "repair_calls": self.repair_calls,
+                "failures": self.failures,
+                "rate_limited": self.rate_limited,
+                "peak_concurrency": self.peak_concurrency,
+            }
@@ -0,0 +1,109 @@
+"""
+Rule-based tips used when the model misses its deadline or fails.
+
+Thresholds on the selected cell's NDVI, temperature, precipitation, soil water and cropland
+(converted to prompt units by speed_utils.compact_grid) pick from a fixed set of suggestions,
+each citing the number it was based on. The output has the GPTOutput shape: 5 🟩 then 3 🟥.
+Identical inputs always give identical tips.
+"""
+
+from backend.speed_utils import compact_grid, summarize_area_list
+
+N_GREEN = 5
+N_RED = 3
+
+
+def _rules(cell: dict, neighbours: dict) -> tuple[list[str], list[str]]:
+    """Green and red candidates, most specific first."""
+    green, red = [], []
+    ndvi, temp, rain = cell["NDVI"], cell["temp_C"], cell["precip_mm_day"]
+    soil, soil_deep, cropland = cell["soil_w1_pct"], cell["soil_w2_pct"], cell["cropland_pct"]
+
+    if soil is not None:
+        if soil < 15:
+            green.append(f"Topsoil moisture is low at {soil}%: irrigate early or late in the day and mulch to cut evaporation.")
+            red.append(f"Avoid sowing or transplanting into dry topsoil ({soil}% moisture) without irrigating first.")
+        elif soil > 40:
+            green.append(f"Topsoil moisture is high at {soil}%: check drainage and clear blocked channels.")
+            red.append(f"Avoid heavy machinery on waterlogged ground ({soil}% topsoil moisture); it will compact the soil.")
+        else:
+            green.append(f"Topsoil moisture is adequate at {soil}%: a good window for sowing and fertiliser uptake.")
+
+    if rain is not None:
+        if rain < 0.5:
+            green.append(f"Rainfall is only {rain} mm/day: prioritise water for the most drought-sensitive crops.")
+            red.append(f"Avoid planting water-demanding crops while rainfall is {rain} mm/day without irrigation.")
+        elif rain > 10:
+            green.append(f"Rainfall is heavy at {rain} mm/day: scout for fungal disease and nutrient leaching.")
+            red.append(f"Avoid applying fertiliser or sprays before more rain at {rain} mm/day; it will wash off.")
+        else:
+            green.append(f"Rainfall of {rain} mm/day supports growth: time top-dressing to follow rain.")
+
+    if temp is not None:
+        if temp > 30:
+            green.append(f"Temperature is high at {temp}°C: irrigate in the cool of the day and provide shade for livestock.")
+            red.append(f"Avoid spraying or field work in the midday heat ({temp}°C).")
+        elif temp < 5:
+            green.append(f"Temperature is low at {temp}°C: protect frost-sensitive crops with covers or delay sowing.")
+            red.append(f"Avoid sowing warm-season crops at {temp}°C; germination will be poor.")
+        else:
+            green.append(f"Temperature of {temp}°C suits most temperate crops: keep to the usual sowing calendar.")
+
+    if ndvi is not None:
+        if ndvi < 0.2:
+            green.append(f"NDVI is low at {ndvi}: check for bare patches, pests or nutrient deficiency and reseed gaps.")
+            red.append(f"Avoid increasing stocking rates while vegetation is sparse (NDVI {ndvi}).")
+        elif ndvi > 0.6:
+            green.append(f"NDVI is strong at {ndvi}: canopy is dense, so monitor for disease in humid spells.")
+        else:
+            green.append(f"NDVI is moderate at {ndvi}: a balanced nitrogen application can lift canopy growth.")
+        anomaly = neighbours.get("NDVI", {}).get("anomaly")
+        if anomaly is not None and anomaly < -0.1:
+            green.append(f"NDVI is {abs(anomaly)} below nearby cells: compare management with neighbouring fields.")
+
+    if soil is not None and soil_deep is not None and soil_deep - soil > 10:
+        green.append(f"Deeper soil holds more water ({soil_deep}% vs {soil}% at the surface): favour deep-rooted crops.")
+
+    if cropland is not None:
+        if cropland > 50:
+            green.append(f"Cropland covers {cropland}% of the area: rotate crops to break pest and disease cycles.")
+            red.append(f"Avoid continuous monocropping where cropland is {cropland}% of the landscape.")
+        elif cropland < 10:
+            green.append(f"Cropland is only {cropland}% of the area: keep field margins as habitat for pollinators.")
+
+    return green, red
+
+
+def _defaults(cell: dict) -> tuple[list[str], list[str]]:
+    """Always-applicable tips, citing whatever numbers are available."""
+    cited = ", ".join(
+        f"{label} {cell[key]}{unit}"
+        for key, label, unit in (("NDVI", "NDVI", ""), ("temp_C", "temperature", "°C"),
+                                 ("precip_mm_day", "rainfall", " mm/day"), ("soil_w1_pct", "topsoil moisture", "%"))
+        if cell[key] is not None
+    ) or "the current conditions"
+    green = [
+        f"Test soil nutrients before the next application so fertiliser matches {cited}.",
+        f"Keep a field diary of {cited} to spot trends across seasons.",
+        "Scout the field weekly for pests and disease and act on early signs.",
+        "Maintain ground cover between crops to protect soil structure.",
+        "Check irrigation and drainage equipment before the next weather change.",
+    ]
+    red = [
+        f"Avoid blanket fertiliser rates that ignore {cited}.",
+        "Avoid burning crop residues; incorporate them to build organic matter.",
+        "Avoid spraying when wind or rain is forecast within the next day.",
+    ]
+    return green, red
+
+
+def fallback_tips(grid: dict | None, area: list | None = None) -> list[str]:
+    """5 🟩 and 3 🟥 tips for the selected cell, without calling the model."""
+    grid = grid or {}
+    cell = compact_grid(grid)
+    neighbours = summarize_area_list(area, grid)["metrics"] if area else {}
+    green, red = _rules(cell, neighbours)
+    default_green, default_red = _defaults(cell)
+    green = (green + default_green)[:N_GREEN]
+    red = (red + default_red)[:N_RED]
+    return [f"🟩 {tip}" for tip in green] + [f"🟥 {tip}" for tip in red]
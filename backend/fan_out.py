@@ -0,0 +1,39 @@
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Sequence, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+async def bounded_map(fn: Callable[[T], Awaitable[R]], items: Sequence[T], max_concurrency: int = 8,
+                      timeout: float | None = None) -> AsyncIterator[tuple[int, R | None, BaseException | None]]:
+    """
+    Runs fn over items with at most max_concurrency calls in flight, each cut off after timeout
+    seconds (time spent queued for a slot is not counted). Yields (index, result, error) in
+    completion order, so callers can report each item as soon as it finishes.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(index: int, item: T):
+        async with semaphore:
+            try:
+                return index, await asyncio.wait_for(fn(item), timeout), None
+            except asyncio.TimeoutError:
+                return index, None, TimeoutError(f"timed out after {timeout:g}s")
+            except asyncio.CancelledError:
+                if asyncio.current_task().cancelling():
+                    raise
+                # A call this item was sharing (SingleFlight) was cancelled by its owner; a bare
+                # CancelledError has no message to report
+                return index, None, RuntimeError("shared call was cancelled")
+            except Exception as e:
+                return index, None, e
+
+    tasks = [asyncio.ensure_future(run(i, item)) for i, item in enumerate(items)]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        # The consumer went away (client disconnect); do not leave calls running
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,248 @@
+"""
+Typed, columnar store for FAOSTAT exports (e.g. gee/downloaded_data/FAOSTAT_data_*.csv).
+
+Rows are parsed once into NumPy columns: categorical area/item/element/unit/flag codes,
+int16 years and float64 values (NaN when blank). They are sorted by a composite
+(area, element, item, year) key, so:
+    - a single (area, item, element, year) lookup is one binary search, and
+    - all rows of one (area, element) pair form a contiguous run, grouped by item and
+      ordered by year, so "latest yield per crop for a country" is a slice plus a diff.
+
+Each CSV gets a binary .npz cache next to it (keyed by the CSV's size and mtime), so later
+startups skip CSV parsing entirely.
+"""
+
+import csv
+import os
+import re
+from pathlib import Path
+
+import numpy as np
+
+from backend.historical_index import REGION_BOUNDS, regions_near
+from backend.hot_reload import Dataset
+from backend.tokens import estimate_tokens
+
+DEFAULT_FAOSTAT_DIR = Path(__file__).parent / "gee" / "downloaded_data"
+CACHE_SUFFIX = ".cache.npz"
+CATEGORIES = ("area", "item", "element", "unit", "flag")
+CSV_COLUMNS = {"area": "Area", "item": "Item", "element": "Element", "unit": "Unit", "flag": "Flag"}
+
+# Region names used elsewhere in the backend that FAOSTAT spells differently
+FAOSTAT_AREA_NAMES = {
+    "USA": "United States of America",
+    "Europe (UK)": "United Kingdom of Great Britain and Northern Ireland",
+    "Russia (Steppe)": "Russian Federation",
+    "Vietnam": "Viet Nam",
+    "China": "China, mainland",
+}
+
+ITEM_STOP_WORDS = {"and", "or", "other", "raw", "dry", "green", "fresh", "excluding", "spp"}
+
+
+class FaostatStore:
+    def __init__(self, columns: dict[str, np.ndarray], categories: dict[str, np.ndarray]):
+        self.categories = {name: [str(v) for v in values] for name, values in categories.items()}
+        self.codes = {name: {value: i for i, value in enumerate(values)} for name, values in self.categories.items()}
+        self.year_min = int(columns["year"].min()) if len(columns["year"]) else 0
+        self._radix = (
+            len(self.categories["element"]),
+            len(self.categories["item"]),
+            int(columns["year"].max()) - self.year_min + 1 if len(columns["year"]) else 1,
+        )
+        keys = self._keys(columns["area"], columns["element"], columns["item"], columns["year"])
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.columns = {name: values[order] for name, values in columns.items()}
+        # Whole names only, so "Niger" is not found in "Nigeria" nor "Oman" in "woman". Lookarounds
+        # rather than \b, since names such as "Bolivia (Plurinational State of)" end in punctuation.
+        names = sorted(self.categories["area"], key=len, reverse=True)
+        self._area_pattern = re.compile(
+            r"(?<!\w)(" + "|".join(re.escape(n) for n in names) + r")(?!\w)", re.IGNORECASE) if names else None
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _keys(self, area, element, item, year) -> np.ndarray:
+        n_element, n_item, n_year = self._radix
+        area, element, item = (np.asarray(a, dtype=np.int64) for a in (area, element, item))
+        year = np.asarray(year, dtype=np.int64) - self.year_min
+        return ((area * n_element + element) * n_item + item) * n_year + year
+
+    @classmethod
+    def parse_csv(cls, path: str | Path) -> tuple[dict, dict]:
+        """Reads one FAOSTAT CSV export into (columns, categories) arrays."""
+        lookups = {name: {} for name in CATEGORIES}
+        codes = {name: [] for name in CATEGORIES}
+        years, values = [], []
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            for row in csv.DictReader(f):
+                for name, column in CSV_COLUMNS.items():
+                    lookup = lookups[name]
+                    codes[name].append(lookup.setdefault(row[column], len(lookup)))
+                years.append(int(row["Year"]))
+                value = row["Value"]
+                values.append(float(value) if value else np.nan)
+
+        columns = {name: np.array(codes[name], dtype=np.int32) for name in CATEGORIES}
+        columns["year"] = np.array(years, dtype=np.int16)
+        columns["value"] = np.array(values, dtype=np.float64)
+        categories = {name: np.array(list(lookups[name]), dtype=str) for name in CATEGORIES}
+        return columns, categories
+
+    @classmethod
+    def load_csv(cls, path: str | Path, use_cache: bool = True) -> "FaostatStore":
+        """Loads a CSV through its binary cache, rebuilding the cache if the CSV has changed."""
+        path = Path(path)
+        cache_path = path.with_name(path.name + CACHE_SUFFIX)
+        stat = path.stat()
+        source = np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+        if use_cache and cache_path.exists():
+            with np.load(cache_path) as cached:
+                if np.array_equal(cached["source"], source):
+                    return cls(
+                        {name: cached[f"col_{name}"] for name in (*CATEGORIES, "year", "value")},
+                        {name: cached[f"cat_{name}"] for name in CATEGORIES},
+                    )
+
+        columns, categories = cls.parse_csv(path)
+        if use_cache:
+            tmp_path = cache_path.with_name(cache_path.name + ".tmp.npz")
+            np.savez(
+                tmp_path, source=source,
+                **{f"col_{name}": values for name, values in columns.items()},
+                **{f"cat_{name}": values for name, values in categories.items()},
+            )
+            os.replace(tmp_path, cache_path)
+        return cls(columns, categories)
+
+    @classmethod
+    def merge(cls, stores: list["FaostatStore"]) -> "FaostatStore":
+        """Combines several stores, remapping their category codes onto shared tables."""
+        if len(stores) == 1:
+            return stores[0]
+        categories = {name: list(dict.fromkeys(v for s in stores for v in s.categories[name])) for name in CATEGORIES}
+        lookup = {name: {v: i for i, v in enumerate(values)} for name, values in categories.items()}
+        columns = {name: [] for name in (*CATEGORIES, "year", "value")}
+        for store in stores:
+            for name in CATEGORIES:
+                remap = np.array([lookup[name][v] for v in store.categories[name]], dtype=np.int32)
+                columns[name].append(remap[store.columns[name]] if len(remap) else store.columns[name])
+            columns["year"].append(store.columns["year"])
+            columns["value"].append(store.columns["value"])
+        return cls(
+            {name: np.concatenate(parts) for name, parts in columns.items()},
+            {name: np.array(values, dtype=str) for name, values in categories.items()},
+        )
+
+    @classmethod
+    def load_dir(cls, directory: str | Path, use_cache: bool = True) -> "FaostatStore":
+        paths = sorted(Path(directory).glob("FAOSTAT_*.csv"))
+        if not paths:
+            raise FileNotFoundError(f"No FAOSTAT_*.csv files in {directory}")
+        return cls.merge([cls.load_csv(path, use_cache) for path in paths])
+
+    def _code(self, name: str, value: str) -> int | None:
+        return self.codes[name].get(value)
+
+    def get(self, area: str, item: str, element: str, year: int) -> float | None:
+        codes = (self._code("area", area), self._code("element", element), self._code("item", item))
+        if None in codes or not self.year_min <= year < self.year_min + self._radix[2]:
+            return None
+        key = self._keys(codes[0], codes[1], codes[2], year)
+        i = int(np.searchsorted(self.keys, key))
+        if i == len(self.keys) or self.keys[i] != key:
+            return None
+        value = self.columns["value"][i]
+        return None if np.isnan(value) else float(value)
+
+    def latest(self, area: str, element: str = "Yield") -> list[dict]:
+        """Most recent non-blank value of every item for one area and element."""
+        area_code, element_code = self._code("area", area), self._code("element", element)
+        if area_code is None or element_code is None:
+            return []
+        lo_key = self._keys(area_code, element_code, 0, self.year_min)
+        lo, hi = np.searchsorted(self.keys, [lo_key, lo_key + self._radix[1] * self._radix[2]])
+        values = self.columns["value"][lo:hi]
+        valid = np.flatnonzero(~np.isnan(values)) + lo
+        if not len(valid):
+            return []
+
+        items = self.columns["item"][valid]
+        # Rows are ordered by year within each item, so the last row of each item run is the latest
+        last = valid[np.append(np.flatnonzero(np.diff(items)), len(items) - 1)]
+        return [
+            {
+                "item": str(self.categories["item"][self.columns["item"][i]]),
+                "year": int(self.columns["year"][i]),
+                "value": float(self.columns["value"][i]),
+                "unit": str(self.categories["unit"][self.columns["unit"][i]]),
+            }
+            for i in last
+        ]
+
+    def areas_for(self, lat: float | None, lon: float | None, context: str = "") -> list[str]:
+        """FAOSTAT areas named in the context, then those near the grid point."""
+        known = self.codes["area"]
+        found = {m.lower() for m in self._area_pattern.findall(context)} if context and self._area_pattern else set()
+        mentioned = [area for area in known if area.lower() in found]
+
+        nearby = []
+        if lat is not None and lon is not None:
+            # REGION_BOUNDS uses the backend's region names; map them back to FAOSTAT's spelling
+            by_region = {region: FAOSTAT_AREA_NAMES.get(region, region) for region in REGION_BOUNDS}
+            for region in regions_near(lat, lon, by_region):
+                area = by_region[region]
+                if area in known and area not in mentioned and area not in nearby:
+                    nearby.append(area)
+        return mentioned + nearby
+
+    def benchmarks_for(self, grid: dict | None, context: str | None = "", element: str = "Yield",
+                       token_budget: int = 200) -> str:
+        """
+        Latest regional FAOSTAT values for the selected cell, as prompt lines. Crops named in the
+        context come first; everything stays within token_budget.
+        """
+        grid = grid or {}
+        context = context or ""
+        try:
+            lat, lon = float(grid["gridLat"]), float(grid["gridLon"])
+        except (KeyError, TypeError, ValueError):
+            lat = lon = None
+
+        lines, used = [], 0
+        words = set(re.findall(r"[a-z]+", context.lower()))
+        for area in self.areas_for(lat, lon, context):
+            rows = self.latest(area, element)
+            rows.sort(key=lambda row: not _mentions_item(row["item"], words))
+            for row in rows:
+                line = f'{area} | {row["item"]} | {element} {row["year"]}: {row["value"]:g} {row["unit"]}'
+                cost = estimate_tokens(line) + 1
+                if used + cost > token_budget:
+                    return "\n".join(lines)
+                lines.append(line)
+                used += cost
+        return "\n".join(lines)
+
+
+def _mentions_item(item: str, words: set[str]) -> bool:
+    """Whether the context names the crop, e.g. "tomato" for "Tomatoes" or "pea" for "Peas, green"."""
+    names = {w for w in re.findall(r"[a-z]+", item.split(",")[0].lower()) if w not in ITEM_STOP_WORDS}
+    return any(w in words or w.removesuffix("s") in words or w.removesuffix("es") in words for w in names)
+
+
+def faostat_dir() -> Path:
+    return Path(os.getenv("FAOSTAT_DIR") or DEFAULT_FAOSTAT_DIR)
+
+
+FAOSTAT = Dataset("faostat", lambda: FaostatStore.load_dir(faostat_dir()),
+                  lambda: faostat_dir().glob("FAOSTAT_*.csv"))
+
+
+def get_faostat_store() -> FaostatStore:
+    """
+    Every FAOSTAT_*.csv in FAOSTAT_DIR (default gee/downloaded_data), loaded on first use and
+    hot-reloaded when a CSV is added or replaced.
+    """
+    return FAOSTAT.get()
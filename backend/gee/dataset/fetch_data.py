@@ -1,19 +1,28 @@
 # pyright:basic
 
 from json import dump
+import argparse
+import os
 import ssl
+import time
 import ee
-import multiprocessing
-from functools import partial
+from pathlib import Path
+
+from backend.gridfile import grid_dict_to_arrays, write_grid
+from backend.timeseries_store import TimeSeriesStore
+from backend.gee.dataset.fetch_executor import DEFAULT_MAX_CONCURRENCY, ConcurrentFetcher
+from backend.gee.dataset.tiled_fetch import build_merged_image, fetch_points, run_tiled_fetch
 
 # Boilerplate to handle SSL certificate issues
 ssl._create_default_https_context = ssl._create_stdlib_context
 
-# --- Authenticate and Initialize the Earth Engine API ---
-print("Step 1: Authenticating and Initializing Earth Engine...")
-ee.Authenticate()
-ee.Initialize(project="THE-PROJECT-ID")
-print("Earth Engine initialized successfully.")
+
+def initialize_ee():
+    """Authenticates and initializes the Earth Engine API (only when actually fetching)."""
+    print("Step 1: Authenticating and Initializing Earth Engine...")
+    ee.Authenticate()
+    ee.Initialize(project="THE-PROJECT-ID")
+    print("Earth Engine initialized successfully.")
 
 # --- Dataset Configuration ---
 dataset_names = {
@@ -76,49 +85,16 @@ def worker_fetch_data_efficient(coords_chunk, datasets):
     and returns the results.
     """
     print(f"Worker processing a chunk of {len(coords_chunk)} coordinates...")
-
-    # 2. Convert coordinates into an EE FeatureCollection.
-    points_collection = ee.FeatureCollection(
-        [ee.Geometry.Point(lon, lat) for lon, lat in coords_chunk]
-    )
-    print("   ...Converted coordinates to EE FeatureCollection.")
-
-    # 3. Create a single, merged EE Image with all required bands.
-    merged_image = None
-    for key, image_collection in datasets.items():
-        latest_image = image_collection.sort("system:time_start", False).first()
-        if merged_image is None:
-            merged_image = latest_image
-        else:
-            merged_image = merged_image.addBands(latest_image)
-    print("   ...Built a single, merged image with all bands.")
-
-    # 4. Use reduceRegions to get all data for all points in one server-side request.
-    print("   ...Sending a single reduceRegions request to Earth Engine...")
-    reduced_data = merged_image.reduceRegions(
-        collection=points_collection, reducer=ee.Reducer.first(), scale=30
-    )
-
-    # 5. Fetch all the results from the server in one go. This is the only getInfo() call.
-    all_data = reduced_data.getInfo()
-    print("   ...Received data from Earth Engine.")
-
-    # 6. Parse the results and return them to the main process.
-    results_dict = {}
-    for feature in all_data["features"]:
-        coords = feature["geometry"]["coordinates"]
-        lon, lat = coords
-        data = feature["properties"]
-        results_dict[f"{lon},{lat}"] = data
+    results_dict = fetch_points(ee, build_merged_image(datasets), coords_chunk)
     print(f"Worker finished processing and is returning {len(results_dict)} results.")
     return results_dict
 
 
-# --- NEW MULTIPROCESSING FUNCTION ---
-def get_location_data_blocks_efficient(block_sizes, all_datasets):
+def get_location_data_blocks_efficient(block_sizes, all_datasets, max_concurrency=DEFAULT_MAX_CONCURRENCY):
     """
-    Divides the globe into a grid and fetches data for each block concurrently
-    using an efficient, single-request-per-worker strategy.
+    Divides the globe into a grid and fetches data for each block concurrently.
+    The work is network-bound, so it runs on a thread-based executor that shares one
+    merged image and adapts chunk sizes to Earth Engine's response times and errors.
     """
     lat_step, lon_step = block_sizes
 
@@ -129,33 +105,42 @@ def get_location_data_blocks_efficient(block_sizes, all_datasets):
 
     print(f"Step 2: Generated {len(coords_to_process)} coordinates to process.")
     print(f"Using a block size of {lat_step}° latitude by {lon_step}° longitude.")
+    print(f"Fetching with up to {max_concurrency} concurrent Earth Engine requests...")
 
-    cpu_count = multiprocessing.cpu_count()
-    print(f"Starting multiprocessing pool with {cpu_count} workers...")
-
-    # We use chunks to distribute the workload evenly among workers
-    chunk_size = len(coords_to_process) // cpu_count + 1
-    chunks = [
-        coords_to_process[i : i + chunk_size]
-        for i in range(0, len(coords_to_process), chunk_size)
-    ]
-    print(f"Dividing coordinates into {len(chunks)} chunks for parallel processing.")
-
-    task_func = partial(worker_fetch_data_efficient, datasets=all_datasets)
-
-    with multiprocessing.Pool(processes=cpu_count) as pool:
-        results = pool.map(task_func, chunks)
-
-    print("Step 3: All tasks completed. Compiling final dictionary...")
-    final_dict = {}
-    for result_chunk in results:
-        final_dict.update(result_chunk)
+    fetcher = ConcurrentFetcher(ee, build_merged_image(all_datasets), max_concurrency=max_concurrency)
+    final_dict = fetcher.fetch(coords_to_process)
+    print(f"Step 3: All tasks completed in {fetcher.requests} requests ({fetcher.errors} retried).")
 
     final_dict.update({"lat_step": lat_step, "lon_step": lon_step})
     return final_dict
 
 
 if __name__ == "__main__":
+    # Run from the repository root: python -m backend.gee.dataset.fetch_data [--format json|grid|both]
+    parser = argparse.ArgumentParser(description="Fetch the global band grid from Earth Engine.")
+    parser.add_argument(
+        "--format", choices=["json", "grid", "both"], default="json",
+        help="json: indented test.json; grid: columnar float32 test.grid (see backend/gridfile.py)",
+    )
+    parser.add_argument(
+        "--checkpoint-dir", default=str(Path(__file__).parent / "checkpoints"),
+        help="where finished tiles are stored; rerunning resumes from here and skips unchanged tiles",
+    )
+    parser.add_argument(
+        "--timeseries-dir", default=str(Path(__file__).parent / "timeseries"),
+        help="each fetch is appended here as a snapshot for /api/timeseries",
+    )
+    parser.add_argument("--tile-rows", type=int, default=3, help="grid rows per tile")
+    parser.add_argument("--tile-cols", type=int, default=4, help="grid columns per tile")
+    parser.add_argument("--max-retries", type=int, default=5, help="retries per request, with exponential backoff")
+    parser.add_argument(
+        "--max-concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY,
+        help="concurrent Earth Engine requests; keep below the project's request limit",
+    )
+    args = parser.parse_args()
+
+    initialize_ee()
+
     print("\n--- Starting Data Retrieval Process ---")
     print("Step 1.1: Initializing Earth Engine and retrieving dataset schemas...")
     datasets = retrieve_datasets()
@@ -163,24 +148,39 @@ if __name__ == "__main__":
 
     block_definition = [20, 30]
     lat_step, lon_step = block_definition
-    lat_coords = [lat for lat in range(-90, 90, lat_step)]
-    lon_coords = [lon for lon in range(-180, 180, lon_step)]
-    coords_to_process = [[lon, lat] for lat in lat_coords for lon in lon_coords]
+    print(f"Step 2: Using a block size of {lat_step}° latitude by {lon_step}° longitude.")
+    print(f"Step 3: Fetching {args.tile_rows}x{args.tile_cols}-block tiles, checkpointed in {args.checkpoint_dir}.")
 
-    print(f"Step 2: Generated {len(coords_to_process)} coordinates to process.")
-    print(f"Using a block size of {lat_step}° latitude by {lon_step}° longitude.")
-    print("Step 3: Consolidating all coordinates into a single request for efficiency.")
-
-    # Pass all coordinates as a single "chunk"
-    final_data = worker_fetch_data_efficient(coords_to_process, datasets)
+    final_data, fetched_tiles = run_tiled_fetch(
+        ee, datasets, lat_step, lon_step, args.checkpoint_dir,
+        tile_rows=args.tile_rows, tile_cols=args.tile_cols, max_retries=args.max_retries,
+        max_concurrency=args.max_concurrency,
+    )
 
     print("\n--- Processing Complete ---")
-    print(f"Successfully retrieved data for {len(final_data)} blocks.")
-
-    # Add metadata to the final dictionary
-    final_data.update({"lat_step": lat_step, "lon_step": lon_step})
-
-    print("Saving results to test.json...")
-    with open("test.json", "w") as file:
-        dump(final_data, file, indent=4)
+    print(f"Successfully retrieved data for {len(final_data) - 2} blocks.")
+
+    output_dir = Path(__file__).parent
+    if args.format in ("json", "both"):
+        print("Saving results to test.json...")
+        # Written beside the old file and renamed over it, so a running API never reads half a file
+        with open(output_dir / "test.json.tmp", "w") as file:
+            dump(final_data, file, indent=4)
+        os.replace(output_dir / "test.json.tmp", output_dir / "test.json")
+    if args.format in ("grid", "both"):
+        print("Saving results to test.grid...")
+        write_grid(output_dir / "test.grid", *grid_dict_to_arrays(final_data))
     print("Results saved.")
+
+    if not fetched_tiles:
+        # Same data as the last snapshot; appending it again would duplicate a time step
+        print("No tiles were refetched; the time-series store is left as it is.")
+    else:
+        print(f"Appending snapshot to the time-series store in {args.timeseries_dir}...")
+        values, band_names, lat0, lon0, _, _ = grid_dict_to_arrays(final_data)
+        timeseries = TimeSeriesStore.open_or_create(
+            args.timeseries_dir, bands=band_names, lat0=lat0, lon0=lon0, lat_step=lat_step, lon_step=lon_step,
+            n_lat=values.shape[1], n_lon=values.shape[2],
+        )
+        timeseries.append(int(time.time()), values, band_names)
+        print(f"Time-series store now holds {len(timeseries)} snapshots.")
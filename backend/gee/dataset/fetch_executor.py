@@ -0,0 +1,158 @@
+"""
+Thread-based executor for Earth Engine point fetches.
+
+Fetching is network-bound: each request spends its time waiting on Earth Engine, so threads
+are enough and nothing has to be pickled. The merged multi-band image is built once by the
+caller and shared by every request. Concurrency is capped at the project's Earth Engine
+request limit and backs off when Earth Engine reports too many concurrent requests. Chunk
+sizes grow while requests come back fast and shrink on slow responses or errors.
+"""
+
+import math
+import random
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable
+
+from backend.gee.dataset.tiled_fetch import Tile, fetch_points
+
+# Earth Engine's per-project concurrent request limit is typically 40; stay well under it by default
+DEFAULT_MAX_CONCURRENCY = 10
+RATE_LIMIT_MARKERS = ("too many concurrent", "too many requests", "quota", "rate limit", "429")
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    message = str(error).lower()
+    return any(marker in message for marker in RATE_LIMIT_MARKERS)
+
+
+class AdaptiveChunker:
+    """
+    Points per request. Doubles while requests finish well under target_latency, scales down
+    proportionally when they run over it, and halves on errors.
+    """
+
+    def __init__(self, initial: int = 64, minimum: int = 1, maximum: int = 2000, target_latency: float = 20.0):
+        self.size = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+
+    def on_success(self, latency: float):
+        if latency < self.target_latency / 2:
+            self.size = min(self.maximum, self.size * 2)
+        elif latency > self.target_latency:
+            self.size = max(self.minimum, int(self.size * self.target_latency / latency))
+
+    def on_error(self):
+        self.size = max(self.minimum, self.size // 2)
+
+
+class ConcurrencyLimit:
+    """Additive-increase / multiplicative-decrease cap on in-flight requests, never above maximum."""
+
+    def __init__(self, maximum: int):
+        self.maximum = maximum
+        self.value = float(maximum)
+
+    @property
+    def current(self) -> int:
+        return max(1, int(self.value))
+
+    def on_success(self):
+        self.value = min(self.maximum, self.value + 1 / self.current)
+
+    def on_rate_limited(self):
+        self.value = max(1.0, self.value / 2)
+
+
+class ConcurrentFetcher:
+    """
+    Fetches the points of many tiles with bounded, adaptive concurrency.
+    Chunks never span tiles, so each tile is reported through on_tile_done as soon as all of
+    its points are in, which lets the caller checkpoint it.
+    """
+
+    def __init__(self, ee_client, merged_image, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 chunker: AdaptiveChunker | None = None, max_retries: int = 5, base_delay: float = 2.0,
+                 max_delay: float = 120.0, scale: int = 30, sleep: Callable[[float], None] = time.sleep):
+        self.ee_client = ee_client
+        self.merged_image = merged_image
+        self.limit = ConcurrencyLimit(max_concurrency)
+        self.chunker = chunker or AdaptiveChunker()
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.scale = scale
+        self.sleep = sleep
+        self.requests = 0
+        self.errors = 0
+
+    def _fetch_chunk(self, coords, delay: float):
+        if delay:
+            self.sleep(delay)
+        start = time.perf_counter()
+        results = fetch_points(self.ee_client, self.merged_image, coords, self.scale)
+        return results, time.perf_counter() - start
+
+    def fetch_tiles(self, tiles: list[Tile], on_tile_done: Callable[[Tile, dict], None] | None = None) -> dict:
+        """Returns {tile_id: results}; raises once any chunk has failed more than max_retries times."""
+        tiles_by_id = {tile.tile_id: tile for tile in tiles}
+        remaining = {tile.tile_id: len(tile.coords) for tile in tiles}
+        results = {tile.tile_id: {} for tile in tiles}
+        # (tile_id, coords, attempt)
+        work = deque((tile.tile_id, list(tile.coords), 0) for tile in tiles if tile.coords)
+        for tile in tiles:
+            if not tile.coords and on_tile_done:
+                on_tile_done(tile, {})
+
+        unassigned = sum(len(coords) for _, coords, _ in work)
+        in_flight = {}
+        with ThreadPoolExecutor(max_workers=self.limit.maximum) as pool:
+            while work or in_flight:
+                while work and len(in_flight) < self.limit.current:
+                    tile_id, coords, attempt = work.popleft()
+                    # Never hand out so much that the remaining request slots sit idle
+                    size = min(self.chunker.size, math.ceil(unassigned / self.limit.current))
+                    chunk, rest = coords[:size], coords[size:]
+                    unassigned -= len(chunk)
+                    if rest:
+                        work.appendleft((tile_id, rest, attempt))
+                    delay = 0
+                    if attempt:
+                        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+                    future = pool.submit(self._fetch_chunk, chunk, delay)
+                    in_flight[future] = (tile_id, chunk, attempt)
+                    self.requests += 1
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    tile_id, chunk, attempt = in_flight.pop(future)
+                    try:
+                        chunk_results, latency = future.result()
+                    except Exception as e:
+                        self.errors += 1
+                        self.chunker.on_error()
+                        if is_rate_limit_error(e):
+                            self.limit.on_rate_limited()
+                        if attempt >= self.max_retries:
+                            for pending in in_flight:
+                                pending.cancel()
+                            raise
+                        print(f"   ...chunk of {len(chunk)} points in tile {tile_id} failed ({e}); retrying")
+                        work.appendleft((tile_id, chunk, attempt + 1))
+                        unassigned += len(chunk)
+                        continue
+
+                    self.chunker.on_success(latency)
+                    self.limit.on_success()
+                    results[tile_id].update(chunk_results)
+                    remaining[tile_id] -= len(chunk)
+                    if remaining[tile_id] == 0 and on_tile_done:
+                        on_tile_done(tiles_by_id[tile_id], results[tile_id])
+        return results
+
+    def fetch(self, coords) -> dict:
+        """Fetches a flat list of (lon, lat) points."""
+        return self.fetch_tiles([Tile(0, 0, tuple(coords))])["0_0"]
@@ -0,0 +1,194 @@
+"""
+Resumable, incremental tiled fetch of the global band grid.
+
+The grid is split into bounded tiles, each fetched with one or more reduceRegions + getInfo()
+requests. Each finished tile is checkpointed to disk together with the system:time_start of every source image it
+was computed from. A later run skips tiles whose checkpoint is already based on the current
+images, so an interrupted run resumes where it stopped and a refresh only refetches tiles
+when a source has actually been updated.
+
+Tiles are fetched concurrently by fetch_executor.ConcurrentFetcher. The Earth Engine
+client is passed in rather than imported, so the pipeline can run against
+a local fake (see backend/benchmarks/fake_ee.py).
+"""
+
+import json
+import os
+import random
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+MANIFEST_NAME = "manifest.json"
+
+
+@dataclass(frozen=True)
+class Tile:
+    row: int
+    col: int
+    coords: tuple[tuple[float, float], ...]  # (lon, lat) pairs
+
+    @property
+    def tile_id(self) -> str:
+        return f"{self.row}_{self.col}"
+
+
+def make_tiles(lat_step: float, lon_step: float, tile_rows: int, tile_cols: int) -> list[Tile]:
+    """Splits the (-90..90, -180..180) lattice into tiles of at most tile_rows x tile_cols points."""
+    lat_coords = _lattice(-90, 90, lat_step)
+    lon_coords = _lattice(-180, 180, lon_step)
+    tiles = []
+    for row, i in enumerate(range(0, len(lat_coords), tile_rows)):
+        for col, j in enumerate(range(0, len(lon_coords), tile_cols)):
+            coords = tuple(
+                (lon, lat) for lat in lat_coords[i : i + tile_rows] for lon in lon_coords[j : j + tile_cols]
+            )
+            tiles.append(Tile(row, col, coords))
+    return tiles
+
+
+def build_merged_image(datasets: dict):
+    """The latest image of every collection, merged into one multi-band image."""
+    merged_image = None
+    for image_collection in datasets.values():
+        latest_image = image_collection.sort("system:time_start", False).first()
+        merged_image = latest_image if merged_image is None else merged_image.addBands(latest_image)
+    return merged_image
+
+
+def source_versions(datasets: dict) -> dict:
+    """system:time_start of the latest image in each collection (None for undated assets)."""
+    return {
+        key: collection.sort("system:time_start", False).first().get("system:time_start").getInfo()
+        for key, collection in datasets.items()
+    }
+
+
+def fetch_points(ee_client, merged_image, coords, scale: int = 30) -> dict:
+    """One reduceRegions + getInfo() round trip for a batch of (lon, lat) points."""
+    points_collection = ee_client.FeatureCollection(
+        [ee_client.Geometry.Point(lon, lat) for lon, lat in coords]
+    )
+    reduced_data = merged_image.reduceRegions(
+        collection=points_collection, reducer=ee_client.Reducer.first(), scale=scale
+    )
+    all_data = reduced_data.getInfo()
+
+    results = {}
+    for feature in all_data["features"]:
+        lon, lat = feature["geometry"]["coordinates"]
+        results[f"{_plain(lon)},{_plain(lat)}"] = feature["properties"]
+    return results
+
+
+def with_retries(fn: Callable, max_retries: int = 5, base_delay: float = 2.0, max_delay: float = 120.0,
+                 sleep: Callable[[float], None] = time.sleep):
+    """Calls fn(), retrying failures with exponential backoff and full jitter."""
+    for attempt in range(max_retries + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == max_retries:
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * 2**attempt))
+            print(f"   ...attempt {attempt + 1} failed ({e}); retrying in {delay:.1f}s")
+            sleep(delay)
+
+
+class TileCheckpoint:
+    """
+    Directory of per-tile result files plus a manifest recording, for each tile, the grid it
+    belongs to and the source versions it was computed from. Every write is atomic.
+    """
+
+    def __init__(self, directory: str | Path, grid: dict):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.grid = grid
+        self.manifest = {"grid": grid, "tiles": {}}
+        manifest_path = self.directory / MANIFEST_NAME
+        if manifest_path.exists():
+            with open(manifest_path, encoding="utf-8") as f:
+                saved = json.load(f)
+            # A different lattice or tiling makes old tiles meaningless
+            if saved.get("grid") == grid:
+                self.manifest = saved
+
+    def is_current(self, tile: Tile, versions: dict) -> bool:
+        entry = self.manifest["tiles"].get(tile.tile_id)
+        return (
+            entry is not None
+            and entry["versions"] == versions
+            and (self.directory / entry["file"]).exists()
+        )
+
+    def save(self, tile: Tile, versions: dict, results: dict):
+        file_name = f"tile_{tile.tile_id}.json"
+        _write_json_atomic(self.directory / file_name, results)
+        self.manifest["tiles"][tile.tile_id] = {"file": file_name, "versions": versions, "cells": len(results)}
+        _write_json_atomic(self.directory / MANIFEST_NAME, self.manifest)
+
+    def load_all(self) -> dict:
+        merged = {}
+        for entry in self.manifest["tiles"].values():
+            with open(self.directory / entry["file"], encoding="utf-8") as f:
+                merged.update(json.load(f))
+        return merged
+
+
+def run_tiled_fetch(ee_client, datasets: dict, lat_step: float, lon_step: float, checkpoint_dir: str | Path,
+                    tile_rows: int = 3, tile_cols: int = 4, max_retries: int = 5, base_delay: float = 2.0,
+                    max_concurrency: int | None = None,
+                    sleep: Callable[[float], None] = time.sleep) -> tuple[dict, int]:
+    """
+    Fetches every tile that is missing or stale in checkpoint_dir and returns the whole grid
+    in fetch_data.py's {"lon,lat": {band: value}, "lat_step": ..., "lon_step": ...} shape,
+    with the number of tiles fetched by this run (0 when every checkpoint was up to date).
+    Tiles are fetched concurrently by a ConcurrentFetcher and checkpointed as each completes.
+    """
+    from backend.gee.dataset.fetch_executor import DEFAULT_MAX_CONCURRENCY, ConcurrentFetcher
+
+    tiles = make_tiles(lat_step, lon_step, tile_rows, tile_cols)
+    checkpoint = TileCheckpoint(checkpoint_dir, {
+        "lat_step": lat_step, "lon_step": lon_step, "tile_rows": tile_rows, "tile_cols": tile_cols,
+    })
+
+    versions = with_retries(lambda: source_versions(datasets), max_retries, base_delay, sleep=sleep)
+    pending = [tile for tile in tiles if not checkpoint.is_current(tile, versions)]
+    print(f"{len(tiles)} tiles, {len(tiles) - len(pending)} up to date, {len(pending)} to fetch.")
+
+    if pending:
+        fetcher = ConcurrentFetcher(
+            ee_client, build_merged_image(datasets), max_concurrency=max_concurrency or DEFAULT_MAX_CONCURRENCY,
+            max_retries=max_retries, base_delay=base_delay, sleep=sleep,
+        )
+        done = 0
+
+        def save(tile: Tile, results: dict):
+            nonlocal done
+            done += 1
+            checkpoint.save(tile, versions, results)
+            print(f"   ...tile {tile.tile_id} done ({done}/{len(pending)}, {len(results)} cells)")
+
+        fetcher.fetch_tiles(pending, on_tile_done=save)
+
+    final_dict = checkpoint.load_all()
+    final_dict.update({"lat_step": lat_step, "lon_step": lon_step})
+    return final_dict, len(pending)
+
+
+def _lattice(start: float, stop: float, step: float) -> list[float]:
+    count = int(round((stop - start) / step))
+    return [_plain(start + k * step) for k in range(count) if start + k * step < stop]
+
+
+def _plain(v: float) -> float | int:
+    return int(v) if float(v).is_integer() else v
+
+
+def _write_json_atomic(path: Path, data):
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
@@ -0,0 +1,139 @@
+import json
+import math
+import os
+from pathlib import Path
+
+import numpy as np
+
+from backend.gridfile import GridFile, grid_dict_to_arrays
+from backend.hot_reload import Dataset
+
+DEFAULT_GRID_PATH = Path(__file__).parent / "gee" / "dataset" / "test.json"
+
+# Largest neighbourhood radius (in cells) served for one request, by /api/area and build_deps
+MAX_AREA_RADIUS = 10
+
+# Fields sent as areaData by the dashboard (see getAreaDataForSuggestions in AgriDashboard.jsx)
+AREA_FIELDS = {
+    "NDVI": "NDVI",
+    "rain": "total_precipitation",
+    "temp": "mean_2m_air_temperature",
+    "soil_moisture_1": "volumetric_soil_water_layer_1",
+    "soil_moisture_2": "volumetric_soil_water_layer_2",
+    "cropland": "cropland",
+    "landcover": "landcover",
+}
+
+# Bands from land-only products (ERA5-Land, GLDAS); a cell with any of them is over land
+LAND_BANDS = ("volumetric_soil_water_layer_1", "volumetric_soil_water_layer_2", "SoilMoi0_10cm_inst",
+              "SoilMoi10_40cm_inst")
+
+
+class GridStore:
+    """
+    The fetch_data.py grid held as one float32 array of shape (band, lat, lon), NaN for nulls.
+    Cells sit on a regular lat_step/lon_step lattice, so lookups are index arithmetic, not scans.
+    """
+
+    def __init__(self, values: np.ndarray, bands: list[str], lat0: float, lon0: float,
+                 lat_step: float, lon_step: float):
+        self.values = values
+        self.bands = list(bands)
+        self.band_index = {band: i for i, band in enumerate(self.bands)}
+        self.lat0 = lat0
+        self.lon0 = lon0
+        self.lat_step = lat_step
+        self.lon_step = lon_step
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.values.shape[1], self.values.shape[2]
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "GridStore":
+        """Builds the store from fetch_data.py's {"lon,lat": {band: value}} output."""
+        return cls(*grid_dict_to_arrays(data))
+
+    @classmethod
+    def from_json(cls, path: str | Path) -> "GridStore":
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    @classmethod
+    def from_gridfile(cls, path: str | Path) -> "GridStore":
+        """Memory-maps a binary grid file; band data is only paged in as cells are read."""
+        grid = GridFile(path)
+        return cls(grid.values, grid.bands, grid.lat0, grid.lon0, grid.lat_step, grid.lon_step)
+
+    @classmethod
+    def from_path(cls, path: str | Path) -> "GridStore":
+        return cls.from_gridfile(path) if str(path).endswith(".grid") else cls.from_json(path)
+
+    def index_of(self, lat: float, lon: float) -> tuple[int, int]:
+        """Nearest lattice cell, matching getClosestGrid in the dashboard (clamped, no wrap)."""
+        n_lat, n_lon = self.shape
+        i = min(max(round((lat - self.lat0) / self.lat_step), 0), n_lat - 1)
+        j = min(max(round((lon - self.lon0) / self.lon_step), 0), n_lon - 1)
+        return i, j
+
+    def coords_of(self, i: int, j: int) -> tuple[float, float]:
+        return _plain(self.lat0 + i * self.lat_step), _plain(self.lon0 + j * self.lon_step)
+
+    def cell_at(self, i: int, j: int) -> dict:
+        grid_lat, grid_lon = self.coords_of(i, j)
+        cell = {band: _value(self.values[b, i, j]) for b, band in enumerate(self.bands)}
+        cell.update({"gridLat": grid_lat, "gridLon": grid_lon})
+        return cell
+
+    def cell(self, lat: float, lon: float) -> dict:
+        return self.cell_at(*self.index_of(lat, lon))
+
+    def area(self, lat: float, lon: float, radius: int = 1) -> list[dict]:
+        """Cells within radius lattice steps of the nearest cell, like getAreaGridData (radius 1 = 3x3)."""
+        n_lat, n_lon = self.shape
+        ci, cj = self.index_of(lat, lon)
+        return [
+            self.cell_at(i, j)
+            for i in range(max(ci - radius, 0), min(ci + radius, n_lat - 1) + 1)
+            for j in range(max(cj - radius, 0), min(cj + radius, n_lon - 1) + 1)
+        ]
+
+    def land_mask(self) -> np.ndarray:
+        """(lat, lon) bool array of cells with a value in any LAND_BANDS band."""
+        rows = [self.band_index[b] for b in LAND_BANDS if b in self.band_index]
+        if not rows:
+            return np.ones(self.shape, dtype=bool)
+        return (~np.isnan(self.values[rows])).any(axis=0)
+
+    def area_for_prompt(self, lat: float, lon: float, radius: int = 1) -> list[dict]:
+        """area() reduced to the fields the dashboard sends as areaData."""
+        return [
+            {"gridLat": cell["gridLat"], "gridLon": cell["gridLon"],
+             **{name: cell.get(band) for name, band in AREA_FIELDS.items()}}
+            for cell in self.area(lat, lon, radius)
+        ]
+
+
+def _value(v) -> float | None:
+    v = float(v)
+    return None if math.isnan(v) else v
+
+
+def _plain(v: float) -> float | int:
+    return int(v) if float(v).is_integer() else v
+
+
+def grid_data_path() -> Path:
+    return Path(os.getenv("GRID_DATA_PATH") or DEFAULT_GRID_PATH)
+
+
+GRID = Dataset("grid", lambda: GridStore.from_path(grid_data_path()), lambda: [grid_data_path()])
+
+
+def get_grid_store() -> GridStore:
+    """
+    The grid named by GRID_DATA_PATH (default gee/dataset/test.json), loaded on first use and
+    hot-reloaded when the file is replaced. Paths ending in .grid are memory-mapped binary grid
+    files, anything else is read as JSON.
+    """
+    return GRID.get()
@@ -0,0 +1,144 @@
+"""
+Columnar binary format for fetched Earth Engine grids.
+
+Layout:
+    8 bytes   magic b"AGRID001"
+    4 bytes   little-endian uint32 header length
+    n bytes   UTF-8 JSON header: lat0, lon0, lat_step, lon_step, n_lat, n_lon, bands
+    padding   zero bytes up to the next 64-byte boundary
+    data      one little-endian float32 (n_lat, n_lon) array per band, in header order; NaN = null
+
+Convert an existing JSON grid with:
+    python -m backend.gridfile input.json output.grid
+"""
+
+import json
+import os
+import struct
+import sys
+from pathlib import Path
+
+import numpy as np
+
+MAGIC = b"AGRID001"
+ALIGNMENT = 64
+DTYPE = np.dtype("<f4")
+
+
+def write_grid(path: str | Path, values: np.ndarray, bands: list[str], lat0: float, lon0: float,
+               lat_step: float, lon_step: float):
+    """Writes a (band, lat, lon) array atomically: readers never see a half-written file."""
+    n_bands, n_lat, n_lon = values.shape
+    if n_bands != len(bands):
+        raise ValueError(f"Got {n_bands} band arrays for {len(bands)} band names")
+
+    header_bytes = json.dumps({
+        "lat0": lat0, "lon0": lon0, "lat_step": lat_step, "lon_step": lon_step,
+        "n_lat": n_lat, "n_lon": n_lon, "bands": list(bands),
+    }).encode("utf-8")
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b"\0" * (_data_offset(len(header_bytes)) - f.tell()))
+        f.write(np.ascontiguousarray(values, dtype=DTYPE).tobytes())
+    os.replace(tmp_path, path)
+
+
+def _data_offset(header_len: int) -> int:
+    return -(-(len(MAGIC) + 4 + header_len) // ALIGNMENT) * ALIGNMENT
+
+
+def read_header(path: str | Path) -> dict:
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a grid file")
+        (header_len,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(header_len))
+    header["data_offset"] = _data_offset(header_len)
+    return header
+
+
+class GridFile:
+    """
+    Lazy, memory-mapped view of a grid file. Opening only reads the header; band data is paged
+    in by the OS as cells and windows are touched.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        header = read_header(self.path)
+        self.lat0 = header["lat0"]
+        self.lon0 = header["lon0"]
+        self.lat_step = header["lat_step"]
+        self.lon_step = header["lon_step"]
+        self.bands = header["bands"]
+        self.band_index = {band: i for i, band in enumerate(self.bands)}
+        self.values = np.memmap(
+            self.path, dtype=DTYPE, mode="r", offset=header["data_offset"],
+            shape=(len(self.bands), header["n_lat"], header["n_lon"]),
+        )
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.values.shape[1], self.values.shape[2]
+
+    def band(self, name: str) -> np.ndarray:
+        return self.values[self.band_index[name]]
+
+    def cell(self, i: int, j: int) -> dict:
+        return {band: float(self.values[b, i, j]) for b, band in enumerate(self.bands)}
+
+    def window(self, i0: int, i1: int, j0: int, j1: int, bands: list[str] | None = None) -> np.ndarray:
+        """Copies rows i0:i1 and columns j0:j1 of the requested bands into memory."""
+        index = [self.band_index[b] for b in bands] if bands else slice(None)
+        return np.array(self.values[index, i0:i1, j0:j1])
+
+
+def grid_dict_to_arrays(data: dict) -> tuple[np.ndarray, list[str], float, float, float, float]:
+    """
+    Converts fetch_data.py's {"lon,lat": {band: value}} dict to write_grid() arguments:
+    (values, bands, lat0, lon0, lat_step, lon_step).
+    """
+    lat_step = data.get("lat_step", 20)
+    lon_step = data.get("lon_step", 30)
+    cells = {}
+    bands: dict[str, None] = {}
+    for key, properties in data.items():
+        if not isinstance(properties, dict):
+            continue
+        lon, lat = (float(part) for part in key.split(","))
+        cells[(lat, lon)] = properties
+        bands.update(dict.fromkeys(properties))
+
+    lats = [lat for lat, _ in cells]
+    lons = [lon for _, lon in cells]
+    lat0, lon0 = min(lats), min(lons)
+    n_lat = round((max(lats) - lat0) / lat_step) + 1
+    n_lon = round((max(lons) - lon0) / lon_step) + 1
+
+    band_list = list(bands)
+    values = np.full((len(band_list), n_lat, n_lon), np.nan, dtype=np.float32)
+    for (lat, lon), properties in cells.items():
+        i = round((lat - lat0) / lat_step)
+        j = round((lon - lon0) / lon_step)
+        for b, band in enumerate(band_list):
+            value = properties.get(band)
+            if isinstance(value, (int, float)):
+                values[b, i, j] = value
+    return values, band_list, lat0, lon0, lat_step, lon_step
+
+
+def convert_json(json_path: str | Path, grid_path: str | Path):
+    with open(json_path, encoding="utf-8") as f:
+        data = json.load(f)
+    write_grid(grid_path, *grid_dict_to_arrays(data))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python -m backend.gridfile input.json output.grid")
+    convert_json(sys.argv[1], sys.argv[2])
+    print(f"Wrote {sys.argv[2]}")
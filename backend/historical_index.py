@@ -0,0 +1,216 @@
+import json
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+from backend.hot_reload import Dataset
+from backend.tokens import estimate_tokens
+
+DEFAULT_HISTORICAL_DATA_PATH = Path(__file__).with_name("historical_data.txt")
+
+GLOBAL_REGION = "Global"
+
+# Approximate (lat_min, lat_max, lon_min, lon_max) extents of the regions named in historical_data.txt
+# and the FAOSTAT exports in gee/downloaded_data
+REGION_BOUNDS = {
+    "New Zealand": (-47.5, -34.0, 166.0, 179.0),
+    "Argentina": (-55.0, -21.0, -73.0, -53.0),
+    "Australia": (-44.0, -10.0, 113.0, 154.0),
+    "Australia (WA)": (-35.0, -13.0, 113.0, 129.0),
+    "Bangladesh": (20.5, 26.7, 88.0, 92.7),
+    "Brazil": (-34.0, 5.0, -74.0, -34.0),
+    "Brazil (Amazon)": (-10.0, 5.0, -74.0, -44.0),
+    "Canada": (42.0, 83.0, -141.0, -52.0),
+    "China": (18.0, 54.0, 73.0, 135.0),
+    "China (Loess Plateau)": (33.0, 41.0, 100.0, 114.0),
+    "Egypt": (22.0, 32.0, 25.0, 37.0),
+    "Ethiopia": (3.0, 15.0, 33.0, 48.0),
+    "Europe": (35.0, 71.0, -10.0, 40.0),
+    "Europe (UK)": (50.0, 59.0, -8.0, 2.0),
+    "France": (42.0, 51.0, -5.0, 8.0),
+    "Germany": (47.0, 55.0, 6.0, 15.0),
+    "India": (6.0, 36.0, 68.0, 97.0),
+    "Indonesia": (-11.0, 6.0, 95.0, 141.0),
+    "Israel": (29.5, 33.5, 34.0, 36.0),
+    "Italy": (36.0, 47.0, 6.0, 19.0),
+    "Kenya (Rift Valley)": (-3.0, 3.0, 35.0, 37.0),
+    "Mexico": (14.0, 33.0, -118.0, -86.0),
+    "Middle East": (12.0, 42.0, 25.0, 63.0),
+    "Morocco": (27.0, 36.0, -13.0, -1.0),
+    "Netherlands": (50.7, 53.6, 3.3, 7.3),
+    "Pakistan": (23.0, 37.0, 60.0, 78.0),
+    "Paraguay": (-28.0, -19.0, -63.0, -54.0),
+    "Peru": (-18.0, 0.0, -81.0, -68.0),
+    "Philippines": (4.0, 21.0, 116.0, 127.0),
+    "Russia (Steppe)": (45.0, 55.0, 35.0, 90.0),
+    "Sahel Region": (10.0, 20.0, -17.0, 40.0),
+    "South Africa": (-35.0, -22.0, 16.0, 33.0),
+    "Spain": (36.0, 44.0, -10.0, 4.0),
+    "Sub-Saharan Africa": (-35.0, 15.0, -18.0, 52.0),
+    "USA": (24.0, 50.0, -125.0, -66.0),
+    "USA (California)": (32.0, 42.0, -125.0, -114.0),
+    "USA (Dust Bowl)": (32.0, 40.0, -105.0, -94.0),
+    "USA (Iowa)": (40.0, 44.0, -97.0, -90.0),
+    "USA (Midwest)": (36.0, 49.0, -104.0, -80.0),
+    "Uruguay": (-35.0, -30.0, -58.0, -53.0),
+    "Vietnam": (8.0, 24.0, 102.0, 110.0),
+}
+
+# Extra names a farmer might use in their field context
+REGION_ALIASES = {
+    "New Zealand": ["nz", "aotearoa", "canterbury", "waikato", "otago", "marlborough"],
+    "Europe (UK)": ["uk", "united kingdom", "britain", "england", "scotland", "wales"],
+    # Not bare "america", which would pull USA history into South and Central America contexts
+    "USA": ["united states", "united states of america", "usa"],
+}
+
+RECORD_PATTERN = re.compile(r'^\[\s*"([^"]*)"\s*,\s*"([^"]*)"\s*,\s*"([^"]*)"\s*\],?\s*$')
+DESCRIPTION_MIN_CHARS = 80
+
+
+@dataclass(frozen=True)
+class HistoricalRecord:
+    region: str
+    fact: str
+    period: str
+
+    def render(self) -> str:
+        return json.dumps([self.region, self.fact, self.period], ensure_ascii=False)
+
+
+class HistoricalIndex:
+    """
+    historical_data.txt parsed once into (region, fact, period) records, indexed by region.
+    The free-text articles section is kept as Global records (title + summary).
+    """
+
+    def __init__(self, records: list[HistoricalRecord]):
+        self.records = records
+        self.by_region: dict[str, list[HistoricalRecord]] = {}
+        for record in records:
+            self.by_region.setdefault(record.region, []).append(record)
+
+        self._name_patterns = {}
+        for region in self.by_region:
+            if region == GLOBAL_REGION:
+                continue
+            names = {region, region.split(" (")[0]}
+            if "(" in region:
+                names.add(region[region.index("(") + 1 : region.rindex(")")])
+            names.update(REGION_ALIASES.get(region, []))
+            self._name_patterns[region] = re.compile(
+                r"\b(" + "|".join(re.escape(n) for n in sorted(names, key=len, reverse=True)) + r")\b",
+                re.IGNORECASE,
+            )
+
+    @classmethod
+    def parse(cls, text: str) -> "HistoricalIndex":
+        records = []
+        lines = [line.strip() for line in text.splitlines()]
+        title = None
+        for line in lines:
+            if not line:
+                continue
+            match = RECORD_PATTERN.match(line)
+            if match:
+                records.append(HistoricalRecord(*match.groups()))
+            elif len(line) >= DESCRIPTION_MIN_CHARS and title is not None:
+                records.append(HistoricalRecord(GLOBAL_REGION, f"{title}: {line}", ""))
+                title = None
+            elif len(line) >= 20 and not line.endswith(":"):
+                title = line
+        return cls(records)
+
+    def regions_for(self, lat: float | None, lon: float | None, context: str = "",
+                    lat_margin: float = 20.0, lon_margin: float = 30.0) -> list[str]:
+        """
+        Regions relevant to a grid point, most relevant first.
+        Regions named in the context come first, then regions whose extent overlaps the
+        point's neighbourhood (one grid step each way), nearest centre first.
+        """
+        mentioned = [r for r, pattern in self._name_patterns.items() if context and pattern.search(context)]
+
+        nearby = []
+        if lat is not None and lon is not None:
+            candidates = [r for r in self._name_patterns if r not in mentioned]
+            nearby = regions_near(lat, lon, candidates, lat_margin, lon_margin)
+        return mentioned + nearby
+
+    def select(self, lat: float | None, lon: float | None, context: str = "",
+               token_budget: int = 600, global_limit: int = 4) -> list[HistoricalRecord]:
+        """
+        Regional records for the point followed by up to global_limit Global records, within
+        token_budget. The Global records are reserved first so regional detail cannot crowd them out.
+        """
+        used = 0
+
+        def take(candidates: list[HistoricalRecord]) -> list[HistoricalRecord]:
+            nonlocal used
+            taken = []
+            for record in candidates:
+                cost = estimate_tokens(record.render()) + 1
+                if used + cost <= token_budget:
+                    taken.append(record)
+                    used += cost
+            return taken
+
+        global_records = take(self.by_region.get(GLOBAL_REGION, [])[:global_limit])
+        regional = []
+        for region in self.regions_for(lat, lon, context):
+            regional.extend(self.by_region[region])
+        return take(regional) + global_records
+
+    def context_for(self, grid: dict | None, context: str | None = "", token_budget: int = 600) -> str:
+        grid = grid or {}
+        lat = _to_float(grid.get("gridLat"))
+        lon = _to_float(grid.get("gridLon"))
+        records = self.select(lat, lon, context or "", token_budget=token_budget)
+        return "\n".join(record.render() for record in records)
+
+
+def regions_near(lat: float, lon: float, candidates, lat_margin: float = 20.0,
+                 lon_margin: float = 30.0) -> list[str]:
+    """Candidates from REGION_BOUNDS whose extent lies within the margins of the point, nearest centre first."""
+    nearby = []
+    for region in candidates:
+        bounds = REGION_BOUNDS.get(region)
+        if bounds is None:
+            continue
+        lat_min, lat_max, lon_min, lon_max = bounds
+        if lat_min - lat_margin <= lat <= lat_max + lat_margin and _lon_gap(lon, lon_min, lon_max) <= lon_margin:
+            centre_lat = (lat_min + lat_max) / 2
+            centre_lon = (lon_min + lon_max) / 2
+            distance = (lat - centre_lat) ** 2 + _lon_gap(lon, centre_lon, centre_lon) ** 2
+            nearby.append((distance, region))
+    return [region for _, region in sorted(nearby)]
+
+
+def _lon_gap(lon: float, lon_min: float, lon_max: float) -> float:
+    """Degrees of longitude between lon and the [lon_min, lon_max] band, wrapping at the antimeridian."""
+    if lon_min <= lon <= lon_max:
+        return 0.0
+    return min((lon_min - lon) % 360, (lon - lon_max) % 360)
+
+
+def _to_float(value) -> float | None:
+    try:
+        return None if value is None else float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def historical_data_path() -> Path:
+    return Path(os.getenv("HISTORICAL_DATA_PATH") or DEFAULT_HISTORICAL_DATA_PATH)
+
+
+def load_historical_index() -> HistoricalIndex:
+    return HistoricalIndex.parse(historical_data_path().read_text(encoding="utf-8"))
+
+
+HISTORY = Dataset("history", load_historical_index, lambda: [historical_data_path()])
+
+
+def get_historical_index() -> HistoricalIndex:
+    """historical_data.txt parsed on first use, and re-parsed when the file changes."""
+    return HISTORY.get()
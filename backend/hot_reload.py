@@ -0,0 +1,140 @@
+"""
+Hot reload of the datasets the API serves from disk (the grid, historical_data.txt, FAOSTAT CSVs).
+
+A Dataset holds the current loaded version behind a single reference. Readers call get() once and
+keep what it returns, so a request that started on the old version finishes on it. The watcher
+thread polls each dataset's files (mtime and size). Once a change has held still for one poll
+(fetch_data.py may still be writing), it loads the new version in the background and runs the
+dataset's warmers on it, building derived state such as the tile pyramid. Only then does it swap
+the reference, so requests never wait on a reload. A failed load keeps the old version and is
+retried once the files change again.
+"""
+
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Generic, Iterable, TypeVar
+
+from backend.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DATASETS: dict[str, "Dataset"] = {}
+
+RELOADS = REGISTRY.counter("dataset_reloads_total", "Dataset hot reloads by result.", ("dataset", "result"))
+REGISTRY.callback(
+    "dataset_generation", "Times each dataset has been swapped for a newer version since startup.",
+    lambda: {(name,): dataset.generation for name, dataset in DATASETS.items()}, ("dataset",))
+
+
+class Dataset(Generic[T]):
+    def __init__(self, name: str, load: Callable[[], T], paths: Callable[[], Iterable[Path]]):
+        self.name = name
+        self.generation = 0
+        self._load = load
+        self._paths = paths
+        self._current: T | None = None
+        self._version = None
+        self._pending = None
+        self._warmers: list[Callable[[T], None]] = []
+        self._lock = threading.Lock()
+        DATASETS[name] = self
+
+    def fingerprint(self) -> tuple:
+        """(path, mtime, size) of every existing source file; replaced files change it."""
+        entries = []
+        for path in sorted(Path(p) for p in self._paths()):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((str(path), stat.st_mtime_ns, stat.st_size))
+        return tuple(entries)
+
+    def get(self) -> T:
+        """The current version, loaded on first use. Never blocks on a reload in progress."""
+        current = self._current
+        if current is None:
+            with self._lock:
+                if self._current is None:
+                    version = self.fingerprint()
+                    self._current = self._load()
+                    self._version = version
+                current = self._current
+        return current
+
+    def loaded(self) -> bool:
+        return self._current is not None
+
+    def warm(self, fn: Callable[[T], None]) -> Callable[[T], None]:
+        """Registers fn to run on each reloaded version before it is swapped in."""
+        self._warmers.append(fn)
+        return fn
+
+    def reload_if_changed(self) -> bool:
+        """One watcher poll. Returns whether a new version was swapped in."""
+        if self._current is None:
+            # Never used, so there is nothing to refresh; the first get() loads the latest files
+            return False
+        version = self.fingerprint()
+        if version == self._version:
+            self._pending = None
+            return False
+        if version != self._pending:
+            # Changed since the last poll; wait until the writer has finished
+            self._pending = version
+            return False
+        self._pending = None
+        return self._swap(version)
+
+    def reload(self) -> bool:
+        """Loads and swaps in the current files now, whether or not they changed."""
+        return self._swap(self.fingerprint())
+
+    def _swap(self, version: tuple) -> bool:
+        started = time.perf_counter()
+        with self._lock:
+            try:
+                new = self._load()
+                for warm in self._warmers:
+                    warm(new)
+            except Exception:
+                logger.exception("Reloading %s failed; keeping the loaded version", self.name)
+                # Not retried until the files change again
+                self._version = version
+                RELOADS.inc(1, self.name, "error")
+                return False
+            self._current = new
+            self._version = version
+            self.generation += 1
+        RELOADS.inc(1, self.name, "ok")
+        logger.info("Reloaded %s (generation %d) in %.2fs", self.name, self.generation, time.perf_counter() - started)
+        return True
+
+
+_watcher: threading.Thread | None = None
+_watcher_lock = threading.Lock()
+
+
+def _watch(interval: float):
+    while True:
+        time.sleep(interval)
+        for dataset in list(DATASETS.values()):
+            try:
+                dataset.reload_if_changed()
+            except Exception:
+                logger.exception("Checking %s for changes failed", dataset.name)
+
+
+def start_watcher(interval: float) -> bool:
+    """Starts the polling thread once per process; interval <= 0 disables hot reload."""
+    global _watcher
+    with _watcher_lock:
+        if _watcher is not None or interval <= 0:
+            return False
+        _watcher = threading.Thread(target=_watch, args=(interval,), name="dataset-watcher", daemon=True)
+        _watcher.start()
+        return True
@@ -0,0 +1,86 @@
+"""
+Process-wide resources built on first use rather than at import, so importing the app and calling
+create_app() stay cheap and a new worker accepts connections in well under a second. The agent
+alone (pydantic-ai and the OpenAI client) takes most of a second to import.
+
+warm_up() builds every registered resource and loads every hot-reloadable dataset ahead of the
+first request; create_app runs it according to APP_WARMUP.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Generic, TypeVar
+
+from backend.hot_reload import DATASETS
+from backend.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RESOURCES: dict[str, "Lazy"] = {}
+
+_UNSET = object()
+
+REGISTRY.callback(
+    "startup_resource_seconds", "Time taken to build each lazily initialized resource (0 until built).",
+    lambda: {(name,): resource.build_seconds for name, resource in RESOURCES.items()}, ("resource",))
+
+
+class Lazy(Generic[T]):
+    """A value built by build() on the first get(), exactly once, however many threads ask for it."""
+
+    def __init__(self, name: str, build: Callable[[], T]):
+        self.name = name
+        self.build_seconds = 0.0
+        self._build = build
+        self._value = _UNSET
+        self._lock = threading.Lock()
+        RESOURCES[name] = self
+
+    def get(self) -> T:
+        value = self._value
+        if value is _UNSET:
+            with self._lock:
+                if self._value is _UNSET:
+                    started = time.perf_counter()
+                    self._value = self._build()
+                    self.build_seconds = time.perf_counter() - started
+                value = self._value
+        return value
+
+    def loaded(self) -> bool:
+        return self._value is not _UNSET
+
+    def replace(self, build: Callable[[], T]):
+        """Swaps the factory and drops any built value, e.g. to run the app against a stub model."""
+        with self._lock:
+            self._build = build
+            self._value = _UNSET
+            self.build_seconds = 0.0
+
+
+def warm_up() -> dict[str, float]:
+    """
+    Builds every registered resource and loads every dataset, returning the seconds each took.
+    A failure is logged and left for the first request to retry (or report).
+    """
+    timings = {}
+    for name, get in [(n, r.get) for n, r in RESOURCES.items()] + [(n, d.get) for n, d in DATASETS.items()]:
+        started = time.perf_counter()
+        try:
+            get()
+        except Exception as e:
+            logger.warning("Warming up %s failed: %s", name, e)
+            continue
+        timings[name] = time.perf_counter() - started
+    logger.info("Warm-up finished: %s", ", ".join(f"{n} {s:.2f}s" for n, s in timings.items()))
+    return timings
+
+
+def start_warm_up() -> threading.Thread:
+    """warm_up() on a daemon thread, so the server can start accepting requests meanwhile."""
+    thread = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,56 @@
+"""
+A pooled provider HTTP client for one ASGI worker's event loop.
+
+Connections stay open between requests (keep-alive) and are shared by every in-flight model call
+on the worker, so a call skips the TCP and TLS handshakes whenever an idle connection is free.
+The pool is sized for the admission controller's ceiling (GPT_ADMISSION_MAX_LIMIT) plus repair
+follow-ups. A client is tied to the loop it first runs on, so this is only used under ASGI: the
+Flask app gives every async view its own short-lived loop.
+"""
+
+import os
+
+LLM_POOL_MAX_CONNECTIONS = int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "256"))
+LLM_POOL_MAX_KEEPALIVE = int(os.getenv("LLM_POOL_MAX_KEEPALIVE", "64"))
+LLM_POOL_KEEPALIVE_SECONDS = float(os.getenv("LLM_POOL_KEEPALIVE_SECONDS", "60"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT_SECONDS", "5"))
+# Past the route's deadline, late results are still cached (GPT_KEEP_LATE_RESULTS), so reads may run long
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT_SECONDS", "60"))
+
+
+def _httpx():
+    try:
+        # What the OpenAI SDK uses from openai 3 on
+        import httpx2
+        return httpx2
+    except ImportError:
+        import httpx
+        return httpx
+
+
+def create_http_client():
+    """An AsyncClient with the LLM_POOL_* limits; close it with aclose() when the worker stops."""
+    httpx = _httpx()
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=LLM_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=LLM_POOL_KEEPALIVE_SECONDS,
+        ),
+        timeout=httpx.Timeout(LLM_READ_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+    )
+
+
+def pooled_model(model: str, http_client):
+    """The model named "openai:<name>" with its requests sent through http_client."""
+    provider, _, name = model.partition(":")
+    if provider != "openai" or not name:
+        raise ValueError(f"Pooled clients are only set up for openai:<model> names, not {model!r}")
+    from pydantic_ai.providers.openai import OpenAIProvider
+    try:
+        from pydantic_ai.models.openai import OpenAIChatModel
+    except ImportError:
+        # pydantic-ai < 1.0
+        from pydantic_ai.models.openai import OpenAIModel as OpenAIChatModel
+
+    return OpenAIChatModel(name, provider=OpenAIProvider(http_client=http_client))
@@ -0,0 +1,245 @@
+"""
+In-process request metrics, rendered in the Prometheus text exposition format by GET /metrics.
+
+Every request updates the histograms (a few dict lookups under a lock). Structured per-request
+log lines are sampled (METRICS_LOG_SAMPLE_RATE, default 0) and raw payload logging is off unless
+LOG_GPT_PAYLOADS is set, so nothing is written to stdout on the hot path by default.
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 1500, 2000, 4000, 8000, 16000)
+
+LOG_SAMPLE_RATE = float(os.getenv("METRICS_LOG_SAMPLE_RATE", "0"))
+LOG_PAYLOADS = os.getenv("LOG_GPT_PAYLOADS", "").lower() in ("1", "true", "yes")
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{str(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # per-bucket counts, then sum and count
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def quantile(self, q: float, *labels: str) -> float | None:
+        """Bucket upper bound below which a q fraction of observations fall (what histogram_quantile approximates)."""
+        with self._lock:
+            series = self._series.get(labels)
+            if not series or not series[-1]:
+                return None
+            target, seen = q * series[-1], 0
+            for i, bound in enumerate(self.buckets):
+                seen += series[i]
+                if seen >= target:
+                    return bound
+            return float("inf")
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted(self._series.items())
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = 'le="' + _fmt(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {series[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_fmt(series[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {series[-1]}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, *labels: str):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines.extend(f"{self.name}{_labels(self.labelnames, labels)} {_fmt(v)}" for labels, v in items)
+        return lines
+
+
+class CallbackMetric:
+    """
+    Reads its value(s) when scraped, for state other modules already track (cache hits, queue depth).
+    read returns a number, or {label values tuple: number} when labelnames are given.
+    """
+
+    def __init__(self, name: str, help: str, read: Callable[[], float | dict[tuple, float]],
+                 labelnames: tuple[str, ...] = (), kind: str = "gauge"):
+        self.name = name
+        self.help = help
+        self.read = read
+        self.labelnames = labelnames
+        self.kind = kind
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        value = self.read()
+        items = sorted(value.items()) if isinstance(value, dict) else [((), value)]
+        lines.extend(f"{self.name}{_labels(self.labelnames, labels)} {_fmt(v)}" for labels, v in items)
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, Histogram | Counter | CallbackMetric] = {}
+
+    def _add(self, metric):
+        # Re-registering a name (module reloads, tests) returns the existing metric
+        return self._metrics.setdefault(metric.name, metric)
+
+    def histogram(self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def counter(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def callback(self, name: str, help: str, read: Callable, labelnames: tuple[str, ...] = (),
+                 kind: str = "gauge") -> CallbackMetric:
+        return self._add(CallbackMetric(name, help, read, labelnames, kind))
+
+    def get(self, name: str):
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    "gpt_request_seconds", "End-to-end time of recommendation requests.", ("route", "outcome"))
+STAGE_SECONDS = REGISTRY.histogram(
+    "gpt_request_stage_seconds", "Time spent in each stage of a recommendation request.", ("route", "stage"))
+LLM_TOKENS = REGISTRY.histogram(
+    "gpt_llm_tokens", "Tokens reported by the model per agent run.", ("direction",), TOKEN_BUCKETS)
+LLM_TOKENS_TOTAL = REGISTRY.counter("gpt_llm_tokens_total", "Tokens reported by the model.", ("direction",))
+OUTPUT_REPAIRS = REGISTRY.counter(
+    "gpt_output_repairs_total", "Model answers by how their tip list was made valid.", ("outcome",))
+LLM_RETRIES = REGISTRY.counter(
+    "gpt_llm_retries_total", "Extra model requests beyond the first, by cause.", ("kind",))
+PROMPT_SECTION_TOKENS = REGISTRY.histogram(
+    "gpt_prompt_section_tokens", "Estimated prompt tokens per section.", ("section",), TOKEN_BUCKETS)
+
+
+class RequestTrace:
+    """Stage timings and token usage for one request; finish() records them."""
+
+    def __init__(self, route: str):
+        self.route = route
+        self.started = time.perf_counter()
+        self.stages: dict[str, float] = {}
+        self.tokens: dict[str, int] = {}
+        self.fields: dict = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def record_usage(self, usage):
+        """
+        Accepts a pydantic-ai usage object, or the usage() method that returns it on older releases
+        (which also name the fields request/response_tokens rather than input/output_tokens).
+        Returns the usage object.
+        """
+        if callable(usage):
+            usage = usage()
+        if usage is None:
+            return None
+        for direction, names in (("input", ("input_tokens", "request_tokens")),
+                                 ("output", ("output_tokens", "response_tokens"))):
+            for name in names:
+                value = getattr(usage, name, None)
+                if value is not None:
+                    self.tokens[direction] = self.tokens.get(direction, 0) + int(value)
+                    break
+        return usage
+
+    def record_retry(self, kind: str, count: int = 1):
+        if count > 0:
+            LLM_RETRIES.inc(count, kind)
+            retries = self.fields.setdefault("retries", {})
+            retries[kind] = retries.get(kind, 0) + count
+
+    def record_repair(self, outcome: str):
+        OUTPUT_REPAIRS.inc(1, outcome)
+        self.fields["repair"] = outcome
+
+    def record_prompt(self, report: dict):
+        self.fields["prompt_tokens"] = report["tokens"]
+        for section, count in report["tokens"].items():
+            PROMPT_SECTION_TOKENS.observe(count, section)
+
+    def finish(self, outcome: str = "ok"):
+        total = time.perf_counter() - self.started
+        REQUEST_SECONDS.observe(total, self.route, outcome)
+        for name, seconds in self.stages.items():
+            STAGE_SECONDS.observe(seconds, self.route, name)
+        for direction, count in self.tokens.items():
+            LLM_TOKENS.observe(count, direction)
+            LLM_TOKENS_TOTAL.inc(count, direction)
+        if LOG_SAMPLE_RATE and random.random() < LOG_SAMPLE_RATE:
+            logger.info(json.dumps({
+                "route": self.route, "outcome": outcome, "total_ms": round(total * 1000, 2),
+                "stages_ms": {k: round(v * 1000, 2) for k, v in self.stages.items()},
+                "tokens": self.tokens, **self.fields,
+            }))
@@ -0,0 +1,75 @@
+"""
+Local repair of near-miss model output, so a wrong tip count or order does not cost a full
+validation retry with the whole prompt.
+
+repair_tips() sorts tips by prefix (🟩 first, then 🟥), drops extras and anything without a
+prefix, and reports how many of each kind are still missing. Only the missing tips are then asked
+for in a short follow-up (see ai_agent.request_missing_tips).
+"""
+
+GREEN = "🟩"
+RED = "🟥"
+N_GREEN = 5
+N_RED = 3
+
+# Fewer usable tips than this and a short follow-up would be writing most of the answer blind,
+# so the full prompt is re-run instead
+MIN_USABLE_TIPS = 4
+
+
+def _kind(tip: str) -> str | None:
+    tip = tip.lstrip()
+    if tip.startswith(GREEN):
+        return GREEN
+    if tip.startswith(RED):
+        return RED
+    return None
+
+
+def repair_tips(tips: list[str]) -> tuple[list[str], list[str], dict]:
+    """
+    Returns (green, red, report). green/red hold at most N_GREEN/N_RED tips in model order;
+    report has outcome ("valid", "reordered", "trimmed" or "incomplete"), the number of tips
+    dropped, and how many green/red tips are missing.
+    """
+    green, red, dropped = [], [], 0
+    for tip in tips:
+        kind = _kind(tip) if isinstance(tip, str) else None
+        bucket = green if kind == GREEN else red if kind == RED else None
+        if bucket is None or tip.strip() in {t.strip() for t in green + red}:
+            dropped += 1
+            continue
+        bucket.append(tip.strip())
+
+    dropped += max(len(green) - N_GREEN, 0) + max(len(red) - N_RED, 0)
+    green, red = green[:N_GREEN], red[:N_RED]
+    missing_green, missing_red = N_GREEN - len(green), N_RED - len(red)
+
+    if missing_green or missing_red:
+        outcome = "incomplete"
+    elif dropped:
+        outcome = "trimmed"
+    elif green + red != [t.strip() for t in tips]:
+        outcome = "reordered"
+    else:
+        outcome = "valid"
+    report = {"outcome": outcome, "dropped": dropped, "missing_green": missing_green, "missing_red": missing_red}
+    return green, red, report
+
+
+def merge_missing(green: list[str], red: list[str], extra: list[str]) -> tuple[list[str], list[str]]:
+    """Tops green/red up from follow-up tips, ignoring duplicates and anything beyond what is missing."""
+    seen = {t.strip() for t in green + red}
+    green, red = list(green), list(red)
+    for tip in extra:
+        if not isinstance(tip, str) or tip.strip() in seen:
+            continue
+        kind = _kind(tip)
+        if kind == GREEN and len(green) < N_GREEN:
+            green.append(tip.strip())
+        elif kind == RED and len(red) < N_RED:
+            red.append(tip.strip())
+        else:
+            continue
+        seen.add(tip.strip())
+    return green, red
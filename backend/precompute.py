@@ -0,0 +1,103 @@
+"""
+Generates tips for every land cell of the grid dataset ahead of time, for the default case of a
+click with no field context. Each cell's GPTDependencies are built exactly as /api/gpt_response
+builds them for a lat/lon request, the agent is called with bounded concurrency, and results go
+into a PrecomputedTips table that the route serves from.
+
+Re-running resumes: cells whose stored inputs still match are skipped, so an interrupted run
+picks up where it stopped and a refreshed dataset only regenerates the cells that changed.
+
+Run from the repository root:
+    python -m backend.precompute [--out PATH] [--max-concurrency 8] [--timeout 60] [--limit N] [--dry-run]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from backend.ai_agent import create_agent, get_recommendations
+from backend.fan_out import bounded_map
+from backend.grid_store import get_grid_store
+from backend.precomputed_tips import PrecomputedTips
+from backend.recommendation_cache import canonical_key
+from backend.request_deps import build_deps
+
+DEFAULT_PRECOMPUTED_PATH = Path(__file__).parent / "gee" / "dataset" / "precomputed_tips.sqlite"
+DEFAULT_RADIUS = 1
+
+
+def precomputed_path() -> Path:
+    return Path(os.getenv("PRECOMPUTED_TIPS_PATH") or DEFAULT_PRECOMPUTED_PATH)
+
+
+def default_request(grid_lat: float, grid_lon: float) -> dict:
+    """The request body a context-free click on this cell turns into."""
+    return {"lat": grid_lat, "lon": grid_lon, "field_context": "", "radius": DEFAULT_RADIUS}
+
+
+def pending_cells(store, tips: PrecomputedTips) -> tuple[list[tuple], int]:
+    """(lat, lon, deps) for land cells without up-to-date tips, and how many were already done."""
+    done = tips.deps_keys()
+    pending, skipped = [], 0
+    for i, j in zip(*store.land_mask().nonzero()):
+        grid_lat, grid_lon = store.coords_of(int(i), int(j))
+        deps = build_deps(default_request(grid_lat, grid_lon))
+        if done.get((float(grid_lat), float(grid_lon))) == canonical_key(deps):
+            skipped += 1
+        else:
+            pending.append((grid_lat, grid_lon, deps))
+    return pending, skipped
+
+
+async def precompute(tips: PrecomputedTips, cells: list[tuple], max_concurrency: int, timeout: float | None):
+    agent = create_agent()
+
+    async def generate(cell):
+        _, _, deps = cell
+        return (await get_recommendations(agent, deps)).tips
+
+    started = time.perf_counter()
+    succeeded = failed = 0
+    async for index, result, error in bounded_map(generate, cells, max_concurrency, timeout):
+        grid_lat, grid_lon, deps = cells[index]
+        if error is None:
+            # Written as each cell finishes, so an interrupted run keeps everything done so far
+            tips.put(grid_lat, grid_lon, canonical_key(deps), result)
+            succeeded += 1
+        else:
+            failed += 1
+            print(f"Cell ({grid_lat}, {grid_lon}) failed: {error}")
+        if (succeeded + failed) % 25 == 0 or succeeded + failed == len(cells):
+            print(f"{succeeded + failed}/{len(cells)} cells ({failed} failed, {time.perf_counter() - started:.1f}s)")
+    return succeeded, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", type=Path, default=precomputed_path(), help="SQLite file to write tips into")
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds allowed per cell")
+    parser.add_argument("--limit", type=int, help="only generate this many cells in this run")
+    parser.add_argument("--dry-run", action="store_true", help="report pending cells without calling the model")
+    args = parser.parse_args()
+    load_dotenv()
+
+    store = get_grid_store()
+    tips = PrecomputedTips(str(args.out))
+    cells, skipped = pending_cells(store, tips)
+    print(f"{int(store.land_mask().sum())} land cells: {skipped} up to date, {len(cells)} pending")
+    if args.limit is not None:
+        cells = cells[:args.limit]
+    if args.dry_run or not cells:
+        return
+
+    succeeded, failed = asyncio.run(precompute(tips, cells, args.max_concurrency, args.timeout))
+    print(f"Done: {succeeded} generated, {failed} failed; {len(tips)} cells stored in {args.out}")
+
+
+if __name__ == "__main__":
+    main()
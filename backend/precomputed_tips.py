@@ -0,0 +1,51 @@
+import json
+import sqlite3
+import threading
+import time
+
+
+class PrecomputedTips:
+    """
+    Tips generated offline by backend.precompute, one row per grid cell, in a SQLite table whose
+    primary key is the cell's (gridLat, gridLon). Each row keeps the canonical_key() of the
+    GPTDependencies it was generated from, so a row only answers requests whose inputs still match.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS precomputed_tips ("
+            "grid_lat REAL NOT NULL, grid_lon REAL NOT NULL, deps_key TEXT NOT NULL, "
+            "tips TEXT NOT NULL, created_at REAL NOT NULL, PRIMARY KEY (grid_lat, grid_lon)) WITHOUT ROWID"
+        )
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM precomputed_tips").fetchone()[0]
+
+    def lookup(self, grid_lat: float, grid_lon: float) -> tuple[str, list[str]] | None:
+        """(deps_key, tips) stored for the cell, if any."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT deps_key, tips FROM precomputed_tips WHERE grid_lat = ? AND grid_lon = ?",
+                (float(grid_lat), float(grid_lon)),
+            ).fetchone()
+        return None if row is None else (row[0], json.loads(row[1]))
+
+    def put(self, grid_lat: float, grid_lon: float, deps_key: str, tips: list[str]):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO precomputed_tips (grid_lat, grid_lon, deps_key, tips, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (float(grid_lat), float(grid_lon), deps_key, json.dumps(tips, ensure_ascii=False), time.time()),
+            )
+            self._db.commit()
+
+    def deps_keys(self) -> dict[tuple[float, float], str]:
+        """deps_key of every stored cell, used to resume a precompute run."""
+        with self._lock:
+            rows = self._db.execute("SELECT grid_lat, grid_lon, deps_key FROM precomputed_tips").fetchall()
+        return {(lat, lon): key for lat, lon, key in rows}
@@ -0,0 +1,188 @@
+"""
+Prompt assembly under a token budget.
+
+Sections are filled in priority order (selected cell, field context, neighbourhood, history,
+yield benchmarks) and each takes what it needs from what is left. A section that does not fit
+is degraded deterministically rather than cut mid-value:
+    - selected cell: full JSON, else compact_grid(); always kept
+    - context: truncated at a word boundary
+    - neighbourhood: full areaData JSON, else the speed_utils summary, else its headline stats
+    - history / yields: whole lines, most relevant first, until the budget runs out
+"""
+
+import json
+import threading
+from collections import deque
+
+from pydantic import BaseModel
+
+from backend.speed_utils import compact_grid, summarize_area_list
+from backend.tokens import CHARS_PER_TOKEN, estimate_tokens
+
+SECTIONS = ("overhead", "selected_cell", "context", "neighbourhood", "history", "yields")
+HEADLINE_STATS = ("mean", "min", "max", "selected", "anomaly")
+TRAILER = "Return tips as specified in the system instructions."
+
+
+def _json(value) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _block(header: str, body: str) -> str:
+    return f"{header}\n{body}\n\n"
+
+
+def _truncate(text: str, token_budget: int) -> str:
+    """Longest word-boundary prefix of text within token_budget, marked with an ellipsis when cut."""
+    if estimate_tokens(text) <= token_budget:
+        return text
+    limit = max(token_budget * CHARS_PER_TOKEN - 1, 0)
+    cut = text[:limit]
+    if " " in cut:
+        cut = cut[:cut.rindex(" ")]
+    return cut + "…" if cut else ""
+
+
+def _take_lines(text: str, token_budget: int) -> str:
+    lines, used = [], 0
+    for line in text.splitlines():
+        cost = estimate_tokens(line) + 1
+        if used + cost > token_budget:
+            break
+        lines.append(line)
+        used += cost
+    return "\n".join(lines)
+
+
+def _neighbourhood_forms(grid: dict, area: list):
+    """Neighbourhood renderings from richest to smallest, as (form, header, body)."""
+    yield "full", "AREA DATA (JSON; nearby cells):", _json(area)
+    summary = summarize_area_list(area, grid)
+    yield "summary", "AREA SUMMARY (JSON; statistics across nearby cells):", _json(summary)
+    headline = {
+        "n_cells": summary["n_cells"],
+        "metrics": {name: {k: v for k, v in stats.items() if k in HEADLINE_STATS}
+                    for name, stats in summary["metrics"].items()},
+    }
+    yield "headline", "AREA SUMMARY (JSON; mean/min/max across nearby cells):", _json(headline)
+
+
+def assemble_prompt(deps: BaseModel, token_budget: int | None = None) -> tuple[str, dict]:
+    """
+    Builds the user prompt for a GPTDependencies instance. Returns the prompt and a size report:
+    estimated tokens per section, the budget, and the form each degraded section was rendered in.
+    token_budget=None keeps every section whole.
+    """
+    unlimited = token_budget is None
+    tokens = dict.fromkeys(SECTIONS, 0)
+    forms = {}
+    remaining = float("inf") if unlimited else token_budget
+
+    def spend(section: str, text: str) -> str:
+        nonlocal remaining
+        cost = estimate_tokens(text)
+        tokens[section] += cost
+        remaining -= cost
+        return text
+
+    spend("overhead", TRAILER)
+
+    grid = deps.gridData or {}
+    grid_block = _block("SELECTED GRID DATA (JSON):", _json(grid))
+    if estimate_tokens(grid_block) > remaining:
+        grid_block = _block("SELECTED GRID DATA (JSON):", _json(compact_grid(grid)))
+        forms["selected_cell"] = "compact"
+    grid_block = spend("selected_cell", grid_block)
+
+    context_header = "FIELD CONTEXT:\n"
+    context = deps.context or ""
+    room = remaining - estimate_tokens(context_header) - 1
+    if not unlimited and estimate_tokens(context) > room:
+        context = _truncate(context, max(int(room), 0))
+        forms["context"] = "truncated"
+    context_block = spend("context", _block("FIELD CONTEXT:", context))
+
+    area_block = ""
+    area = deps.areaData or []
+    if area:
+        forms["neighbourhood"] = "omitted"
+        for form, header, body in _neighbourhood_forms(grid, area):
+            candidate = _block(header, body)
+            if estimate_tokens(candidate) <= remaining:
+                area_block = spend("neighbourhood", candidate)
+                forms.pop("neighbourhood")
+                if form != "full":
+                    forms["neighbourhood"] = form
+                break
+
+    blocks = []
+    for section, header, text in (
+        ("history", "HISTORICAL DATA:", deps.historical_context or ""),
+        ("yields", "REGIONAL YIELD BENCHMARKS (FAOSTAT):", getattr(deps, "yield_context", "") or ""),
+    ):
+        if not text:
+            if section == "history":
+                # The history header is always present, matching the original layout
+                blocks.append(spend(section, _block(header, "")))
+            continue
+        kept = text
+        room = remaining - estimate_tokens(header) - 1
+        if not unlimited and estimate_tokens(text) > room:
+            kept = _take_lines(text, max(int(room), 0))
+            forms[section] = "trimmed" if kept else "omitted"
+        if kept or section == "history":
+            blocks.append(spend(section, _block(header, kept)))
+
+    prompt = context_block + grid_block + area_block + "".join(blocks) + TRAILER
+    report = {"tokens": tokens, "total": estimate_tokens(prompt), "budget": token_budget, "degraded": forms}
+    return prompt, report
+
+
+def build_repair_prompt(deps: BaseModel, kept: list[str], n_green: int, n_red: int) -> str:
+    """
+    Short follow-up asking only for the tips missing from a near-miss answer: the selected cell in
+    compact form, a clipped context and the tips already kept, instead of the whole original prompt.
+    """
+    return (
+        "FIELD CONTEXT:\n"
+        f"{_truncate(deps.context or '', 80)}\n\n"
+        "SELECTED GRID DATA (JSON):\n"
+        f"{_json(compact_grid(deps.gridData or {}))}\n\n"
+        "EXISTING SUGGESTIONS (do not repeat):\n"
+        + "\n".join(kept) + "\n\n"
+        f"Write exactly {n_green} new 🟩 suggestions and {n_red} new 🟥 avoid suggestions."
+    )
+
+
+class PromptSizeRecorder:
+    """Per-section token totals across requests, plus the most recent reports for inspection."""
+
+    def __init__(self, keep: int = 256):
+        self.requests = 0
+        self.over_budget = 0
+        self.degraded = 0
+        self.section_totals = dict.fromkeys(SECTIONS, 0)
+        self.recent = deque(maxlen=keep)
+        self._lock = threading.Lock()
+
+    def record(self, report: dict):
+        with self._lock:
+            self.requests += 1
+            for section, count in report["tokens"].items():
+                self.section_totals[section] += count
+            if report["degraded"]:
+                self.degraded += 1
+            if report["budget"] is not None and report["total"] > report["budget"]:
+                self.over_budget += 1
+            self.recent.append(report)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            mean = {s: round(t / self.requests, 1) for s, t in self.section_totals.items()} if self.requests else {}
+            return {
+                "requests": self.requests,
+                "degraded": self.degraded,
+                "over_budget": self.over_budget,
+                "mean_section_tokens": mean,
+                "last": self.recent[-1] if self.recent else None,
+            }
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from pydantic import BaseModel
+
+FLOAT_DIGITS = 4
+
+
+def _normalise(value: Any, digits: int = FLOAT_DIGITS) -> Any:
+    """Rounds floats and recurses into containers so equal inputs serialise identically."""
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, float):
+        return round(value, digits)
+    if isinstance(value, dict):
+        return {str(k): _normalise(v, digits) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalise(v, digits) for v in value]
+    return value
+
+
+def canonical_key(deps: BaseModel, digits: int = FLOAT_DIGITS) -> str:
+    """
+    Returns a stable hash of a GPTDependencies instance.
+    Floats are rounded, the free-text context is whitespace-normalised and the
+    JSON is serialised with sorted keys, so cosmetic differences share one key.
+    """
+    payload = _normalise(deps.model_dump(), digits)
+    if isinstance(payload.get("context"), str):
+        payload["context"] = " ".join(payload["context"].split())
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class RecommendationCache:
+    """
+    Bounded LRU cache of tip lists keyed by canonical_key().
+    Entries expire after ttl seconds and may record where their tips came from
+    (e.g. rule-based fallback tips), so they are not later passed off as model
+    output. When a path is given, entries are also written to a SQLite file so
+    they survive restarts.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0, path: str | None = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[float, list[str], str | None]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS recommendations "
+                "(key TEXT PRIMARY KEY, expires_at REAL NOT NULL, tips TEXT NOT NULL, source TEXT)"
+            )
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(recommendations)")}
+            if "source" not in columns:
+                # Files written before sources were recorded
+                self._db.execute("ALTER TABLE recommendations ADD COLUMN source TEXT")
+            self._db.commit()
+            self._load()
+
+    def _load(self):
+        now = time.time()
+        self._db.execute("DELETE FROM recommendations WHERE expires_at <= ?", (now,))
+        self._db.commit()
+        rows = self._db.execute(
+            "SELECT key, expires_at, tips, source FROM recommendations ORDER BY expires_at DESC LIMIT ?",
+            (self.max_entries,),
+        ).fetchall()
+        for key, expires_at, tips, source in reversed(rows):
+            self._entries[key] = (expires_at, json.loads(tips), source)
+
+    def get(self, key: str) -> list[str] | None:
+        entry = self.get_entry(key)
+        return None if entry is None else entry[0]
+
+    def get_entry(self, key: str) -> tuple[list[str], str | None] | None:
+        """(tips, source given to set()) for a live entry, else None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, tips, source = entry
+            if expires_at <= time.time():
+                self._delete(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(tips), source
+
+    def set(self, key: str, tips: list[str], ttl: float | None = None, source: str | None = None):
+        with self._lock:
+            self._store_locked(key, tips, ttl, source)
+
+    def set_provisional(self, key: str, tips: list[str], ttl: float | None = None, source: str | None = None) -> bool:
+        """
+        Stores stand-in tips (e.g. fallback tips at a deadline) unless the key already holds live
+        model output, which a late call may have written first. Returns whether they were stored.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is None and entry[0] > time.time():
+                return False
+            self._store_locked(key, tips, ttl, source)
+            return True
+
+    def _store_locked(self, key: str, tips: list[str], ttl: float | None, source: str | None):
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (expires_at, list(tips), source)
+        self._entries.move_to_end(key)
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO recommendations (key, expires_at, tips, source) VALUES (?, ?, ?, ?)",
+                (key, expires_at, json.dumps(tips, ensure_ascii=False), source),
+            )
+        while len(self._entries) > self.max_entries:
+            oldest, _ = self._entries.popitem(last=False)
+            self.evictions += 1
+            if self._db is not None:
+                self._db.execute("DELETE FROM recommendations WHERE key = ?", (oldest,))
+        if self._db is not None:
+            self._db.commit()
+
+    def _delete(self, key: str):
+        self._entries.pop(key, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM recommendations WHERE key = ?", (key,))
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM recommendations")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,62 @@
+import logging
+import math
+
+from backend.ai_agent import GPTDependencies, HISTORY_TOKEN_BUDGET, YIELD_TOKEN_BUDGET
+from backend.faostat_store import get_faostat_store
+from backend.grid_store import MAX_AREA_RADIUS, get_grid_store
+from backend.historical_index import get_historical_index
+
+logger = logging.getLogger(__name__)
+
+# Missing FAOSTAT data is reported on the first request only; later ones just go without yields
+_faostat_missing_logged = False
+
+
+class InvalidRequest(ValueError):
+    """A request body the routes answer with 400 rather than a server error."""
+
+
+def _number(data: dict, key: str, cast=float):
+    try:
+        value = cast(data[key])
+    except (TypeError, ValueError, OverflowError):
+        raise InvalidRequest(f"{key} must be a number") from None
+    if not math.isfinite(value):
+        raise InvalidRequest(f"{key} must be a finite number")
+    return value
+
+
+def build_deps(data: dict) -> GPTDependencies:
+    """
+    Accepts either the dashboard's full gridData/areaData payload, or just lat/lon
+    (plus optional radius, clamped to MAX_AREA_RADIUS), in which case both are looked up in the
+    server-side grid store. Raises InvalidRequest for non-numeric coordinates.
+    """
+    context = data.get('field_context')
+    grid = data.get('gridData')
+    area = data.get('areaData')
+    if grid is None and data.get('lat') is not None and data.get('lon') is not None:
+        lat, lon = _number(data, 'lat'), _number(data, 'lon')
+        radius = _number(data, 'radius', int) if data.get('radius') is not None else 1
+        store = get_grid_store()
+        grid = store.cell(lat, lon)
+        area = store.area_for_prompt(lat, lon, min(max(radius, 0), MAX_AREA_RADIUS))
+    return GPTDependencies(
+        context=context,
+        gridData=grid,
+        areaData=area,
+        historical_context=get_historical_index().context_for(grid, context, token_budget=HISTORY_TOKEN_BUDGET),
+        yield_context=yield_context_for(grid, context),
+    )
+
+
+def yield_context_for(grid: dict | None, context: str | None) -> str:
+    global _faostat_missing_logged
+    try:
+        store = get_faostat_store()
+    except FileNotFoundError as e:
+        if not _faostat_missing_logged:
+            _faostat_missing_logged = True
+            logger.warning("FAOSTAT data unavailable, prompts will have no yield benchmarks: %s", e)
+        return ""
+    return store.benchmarks_for(grid, context, token_budget=YIELD_TOKEN_BUDGET)
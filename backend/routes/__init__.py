@@ -1,6 +1,14 @@
 from flask import Flask
 from .get_chatgpt_response import fetch_gpt_response_bp
+from .grid_data import grid_data_bp
+from .metrics import metrics_bp
+from .tiles import tiles_bp
+from .timeseries import timeseries_bp
 
 def register_routes(app):
     app.register_blueprint(fetch_gpt_response_bp)
+    app.register_blueprint(grid_data_bp)
+    app.register_blueprint(timeseries_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(tiles_bp)
 
@@ -1,63 +1,429 @@
-from flask import Blueprint, request, jsonify
+import asyncio
+import json
+import logging
+import os
+import time
+
+from flask import Blueprint, Response, request, jsonify
 
 fetch_gpt_response_bp = Blueprint('fetch_gpt_response', __name__)
 
-from backend.ai_agent import GPTDependencies, create_agent, get_recommendations, HISTORICAL_DATA
-# from backend.speed_utils import summarize_area_list, compact_grid
+from backend.admission import AdmissionController, Overloaded
+from backend.ai_agent import GPTDependencies, create_agent, get_recommendations, stream_recommendations
+from backend.async_bridge import iterate_in_thread
+from backend.background_loop import submit
+from backend.fallback_tips import fallback_tips
+from backend.fan_out import bounded_map
+from backend.lazy import Lazy
+from backend.metrics import LOG_PAYLOADS, REGISTRY, RequestTrace
+from backend.precompute import default_request, precomputed_path
+from backend.precomputed_tips import PrecomputedTips
+from backend.recommendation_cache import RecommendationCache, canonical_key
+from backend.request_deps import InvalidRequest, build_deps
+from backend.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Built on the first request (or by create_app's warm-up); agent.replace() swaps in another model
+agent = Lazy("agent", create_agent)
+
+# Repeat clicks on the same cell with the same context skip the LLM round trip
+recommendation_cache = RecommendationCache(
+    max_entries=int(os.getenv("GPT_CACHE_MAX_ENTRIES", "1024")),
+    ttl=float(os.getenv("GPT_CACHE_TTL_SECONDS", "3600")),
+    path=os.getenv("GPT_CACHE_PATH") or None,
+)
+
+# Identical requests that arrive while one is already in flight share its LLM call
+in_flight_recommendations = SingleFlight()
+
+# Past this many seconds the route answers with rule-based tips instead of waiting on the model
+# (0 disables the deadline). With GPT_KEEP_LATE_RESULTS the model call carries on and its tips
+# replace the fallback, which is cached for GPT_FALLBACK_CACHE_TTL_SECONDS in the meantime.
+LLM_DEADLINE = float(os.getenv("GPT_DEADLINE_SECONDS", "10"))
+KEEP_LATE_RESULTS = os.getenv("GPT_KEEP_LATE_RESULTS", "1").lower() in ("1", "true", "yes")
+FALLBACK_CACHE_TTL = float(os.getenv("GPT_FALLBACK_CACHE_TTL_SECONDS", "30"))
+
+# In-flight LLM calls are capped (the cap adapts to provider latency and 429s); callers beyond it
+# queue fairly per client, and are answered 429 + Retry-After once the queue is full
+admission = AdmissionController(
+    limit=int(os.getenv("GPT_ADMISSION_LIMIT", "16")),
+    min_limit=int(os.getenv("GPT_ADMISSION_MIN_LIMIT", "2")),
+    max_limit=int(os.getenv("GPT_ADMISSION_MAX_LIMIT", "64")),
+    max_queue=int(os.getenv("GPT_ADMISSION_MAX_QUEUE", "64")),
+    max_queue_per_client=int(os.getenv("GPT_ADMISSION_MAX_QUEUE_PER_CLIENT", "16")),
+    queue_timeout=float(os.getenv("GPT_ADMISSION_QUEUE_TIMEOUT_SECONDS", "5")),
+    target_latency=float(os.getenv("GPT_ADMISSION_TARGET_LATENCY_SECONDS", "8")),
+)
+
+
+def open_precomputed_tips() -> PrecomputedTips | None:
+    return PrecomputedTips(str(precomputed_path())) if precomputed_path().exists() else None
+
+
+# Tips generated offline by backend.precompute for context-free clicks, if that job has been run
+precomputed_tips = Lazy("precomputed_tips", open_precomputed_tips)
+PRECOMPUTED_LOOKUPS = REGISTRY.counter(
+    "gpt_precomputed_lookups_total", "Context-free requests checked against precomputed tips.", ("result",))
+
+# Batch requests: server-side caps; clients may ask for less, never more
+BATCH_MAX_ITEMS = int(os.getenv("GPT_BATCH_MAX_ITEMS", "100"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("GPT_BATCH_MAX_CONCURRENCY", "8"))
+BATCH_ITEM_TIMEOUT = float(os.getenv("GPT_BATCH_ITEM_TIMEOUT_SECONDS", "60"))
+
+REGISTRY.callback(
+    "gpt_cache_events_total", "Recommendation cache lookups and evictions.",
+    lambda: {("hit",): recommendation_cache.hits, ("miss",): recommendation_cache.misses,
+             ("eviction",): recommendation_cache.evictions},
+    ("event",), kind="counter")
+REGISTRY.callback(
+    "gpt_single_flight_total", "Recommendation LLM calls started, and requests that joined one in flight.",
+    lambda: {("call",): in_flight_recommendations.calls, ("coalesced",): in_flight_recommendations.coalesced},
+    ("event",), kind="counter")
+REGISTRY.callback(
+    "gpt_admission_queue_depth", "LLM calls waiting for an admission slot.", lambda: admission.stats()["queued"])
+REGISTRY.callback(
+    "gpt_admission_in_flight", "LLM calls holding an admission slot.", lambda: admission.stats()["in_flight"])
+REGISTRY.callback(
+    "gpt_admission_limit", "Current adaptive cap on in-flight LLM calls.", lambda: admission.stats()["limit"])
+
+
+def client_id() -> str:
+    """Who a request is queued as for fair scheduling: an explicit X-Client-Id, else the peer address."""
+    return request.headers.get("X-Client-Id") or request.remote_addr or "anonymous"
+
+
+def overloaded_response(error: Overloaded):
+    response = jsonify({"error": str(error), "retry_after": error.retry_after})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response
+
+
+async def ensure_agent():
+    """
+    Builds the agent on first use in a worker thread, not on the event loop running the request:
+    under ASGI that loop serves every request, and on Flask the deadline path shares the background loop.
+    """
+    if not agent.loaded():
+        await asyncio.to_thread(agent.get)
+
+
+async def get_shared_recommendations(deps: GPTDependencies, cache_key: str, trace: RequestTrace, client: str):
+    led = False
+
+    async def run():
+        nonlocal led
+        led = True
+        start = time.perf_counter()
+        async with admission.slot(client):
+            trace.add("admission_wait", time.perf_counter() - start)
+            gpt_out = await get_recommendations(agent.get(), deps, trace)
+        await asyncio.to_thread(recommendation_cache.set, cache_key, gpt_out.tips)
+        return gpt_out
+
+    start = time.perf_counter()
+    gpt_out = await in_flight_recommendations.do(cache_key, run)
+    if not led:
+        # Followers only wait on the leader's call; its stages are on the leader's trace
+        trace.add("coalesced_wait", time.perf_counter() - start)
+    return gpt_out
+
+
+def precomputed_tips_for(data: dict, deps: GPTDependencies) -> list[str] | None:
+    """
+    Offline tips for a click with no field context on a precomputed cell, provided they were
+    generated from the cell's current data. Lat/lon requests must match exactly; dashboard requests
+    carry display values, so they are checked against the server-side inputs for the same cell.
+    """
+    table = precomputed_tips.get()
+    if table is None and precomputed_path().exists():
+        # The precompute job has been run since the table was first looked for
+        precomputed_tips.replace(open_precomputed_tips)
+        table = precomputed_tips.get()
+    if table is None or (deps.context or "").strip():
+        return None
+    grid = deps.gridData or {}
+    if grid.get('gridLat') is None or grid.get('gridLon') is None:
+        return None
+    stored = table.lookup(grid['gridLat'], grid['gridLon'])
+    if stored is None:
+        PRECOMPUTED_LOOKUPS.inc(1, "miss")
+        return None
+    if data.get('gridData') is not None:
+        deps = build_deps(default_request(grid['gridLat'], grid['gridLon']))
+    deps_key, tips = stored
+    if deps_key != canonical_key(deps):
+        PRECOMPUTED_LOOKUPS.inc(1, "stale")
+        return None
+    PRECOMPUTED_LOOKUPS.inc(1, "hit")
+    return tips
+
+
+def stored_tips(data: dict, deps: GPTDependencies, cache_key: str, trace: RequestTrace) -> list[str] | None:
+    """
+    Precomputed or cached tips for a request, noting which in trace.fields["served_from"]. Both can
+    query SQLite (and expiring a persisted cache entry commits), so async callers run this in a
+    worker thread rather than on the event loop serving other requests.
+    """
+    tips = precomputed_tips_for(data, deps)
+    if tips is not None:
+        trace.fields["served_from"] = "precomputed"
+        return tips
+    cached = recommendation_cache.get_entry(cache_key)
+    if cached is None:
+        return None
+    tips, source = cached
+    # Fallback tips cached until a late model answer replaces them keep their source
+    trace.fields["served_from"] = source or "cache_hit"
+    return tips
+
+
+async def recommend(data: dict, deps: GPTDependencies, trace: RequestTrace, client: str = "anonymous") -> list[str]:
+    """
+    Tips for one request: precomputed tips, the cache, then a shared in-flight call to the agent.
+    Raises Overloaded when admission control turns the call away.
+    """
+    cache_key = canonical_key(deps)
+    cached_tips = await asyncio.to_thread(stored_tips, data, deps, cache_key, trace)
+    if cached_tips is not None:
+        return cached_tips
+
+    try:
+        await ensure_agent()
+        if not LLM_DEADLINE:
+            return (await get_shared_recommendations(deps, cache_key, trace, client)).tips
+        # Run on the background loop so the call can outlive this request if it misses the deadline
+        call = submit(get_shared_recommendations(deps, cache_key, trace, client))
+        try:
+            return (await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(call)), LLM_DEADLINE)).tips
+        except asyncio.TimeoutError:
+            trace.fields["served_from"] = "fallback_deadline"
+            tips = fallback_tips(deps.gridData, deps.areaData)
+            if KEEP_LATE_RESULTS:
+                # Unless the call finished in the meantime and cached its own tips
+                await asyncio.to_thread(recommendation_cache.set_provisional, cache_key, tips,
+                                        ttl=FALLBACK_CACHE_TTL, source="fallback_deadline")
+            else:
+                call.cancel()
+            return tips
+    except Overloaded:
+        trace.fields["served_from"] = "rejected"
+        raise
+    except asyncio.CancelledError:
+        if asyncio.current_task().cancelling():
+            raise
+        # This request joined a call whose leader missed its deadline and cancelled it
+        # (GPT_KEEP_LATE_RESULTS=0); it gets the same rule-based tips the leader served
+        trace.fields["served_from"] = "fallback_deadline"
+        return fallback_tips(deps.gridData, deps.areaData)
+    except Exception as e:
+        logger.warning("LLM call failed, serving fallback tips: %s", e)
+        trace.fields["served_from"] = "fallback_error"
+        return fallback_tips(deps.gridData, deps.areaData)
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+# The request handling below is shared by the Flask views and the native ASGI handlers in
+# backend/asgi.py, so both serve the same JSON and event contract
+
+
+async def answer(data: dict, trace: RequestTrace, client: str) -> list[str]:
+    """Tips for one /api/gpt_response body; raises Overloaded when admission control turns it away."""
+    if LOG_PAYLOADS:
+        logger.info("GPT request payload: gridData=%s areaData=%s", data.get('gridData'), data.get('areaData'))
+    with trace.stage("prompt_build"):
+        deps = build_deps(data)
+    tips = await recommend(data, deps, trace, client)
+    if LOG_PAYLOADS:
+        logger.info("GPT output: %s", tips)
+    return tips
+
+
+def prepare_stream(data: dict, trace: RequestTrace, client: str) -> tuple[GPTDependencies, str, list[str] | None]:
+    """
+    (deps, cache key, stored tips or None) for a stream request. When the model has to be called,
+    admission is checked first so a rejection is a 429 rather than a 200 event stream that fails.
+    Blocks on SQLite like stored_tips.
+    """
+    with trace.stage("prompt_build"):
+        deps = build_deps(data)
+    cache_key = canonical_key(deps)
+    cached_tips = stored_tips(data, deps, cache_key, trace)
+    if cached_tips is None:
+        # A queue timeout later still arrives as an "error" event
+        admission.check(client)
+    return deps, cache_key, cached_tips
+
+
+def cached_frames(tips: list[str], trace: RequestTrace) -> list[str]:
+    with trace.stage("serialize"):
+        frames = [sse_event("tip", {"index": i, "tip": tip}) for i, tip in enumerate(tips)]
+        frames.append(sse_event("done", {"tips": tips}))
+    trace.finish(trace.fields.get("served_from", "cache_hit"))
+    return frames
+
+
+async def stream_frames(deps: GPTDependencies, cache_key: str, trace: RequestTrace, client: str):
+    """SSE frames for a streamed model answer: "tip" events, then "done" (or "error"). Finishes the trace."""
+    outcome = "error"
+    try:
+        await ensure_agent()
+        start = time.perf_counter()
+        async with admission.slot(client):
+            trace.add("admission_wait", time.perf_counter() - start)
+            async for kind, index, value in stream_recommendations(agent.get(), deps, trace):
+                if kind == "tip":
+                    with trace.stage("serialize"):
+                        frame = sse_event("tip", {"index": index, "tip": value})
+                    yield frame
+                else:
+                    await asyncio.to_thread(recommendation_cache.set, cache_key, value.tips)
+                    with trace.stage("serialize"):
+                        frame = sse_event("done", {"tips": value.tips})
+                    outcome = "ok"
+                    yield frame
+    except Overloaded as e:
+        outcome = "rejected"
+        yield sse_event("error", {"error": str(e), "retry_after": e.retry_after})
+    except Exception as e:
+        yield sse_event("error", {"error": str(e)})
+    finally:
+        trace.finish(outcome)
+
+
+def parse_batch(body: dict) -> tuple[list, int, float]:
+    """(items, max concurrency, per-item timeout) of a batch body, capped by the server limits; ValueError if invalid."""
+    items = body.get('items')
+    if not isinstance(items, list) or not items:
+        raise ValueError("items must be a non-empty list")
+    if len(items) > BATCH_MAX_ITEMS:
+        raise ValueError(f"at most {BATCH_MAX_ITEMS} items per batch")
+    try:
+        concurrency = min(int(body.get('max_concurrency', BATCH_MAX_CONCURRENCY)), BATCH_MAX_CONCURRENCY)
+        timeout = min(float(body.get('timeout', BATCH_ITEM_TIMEOUT)), BATCH_ITEM_TIMEOUT)
+    except (TypeError, ValueError):
+        raise ValueError("max_concurrency and timeout must be numbers") from None
+    return items, concurrency, timeout
+
+
+async def batch_frames(items: list, concurrency: int, timeout: float, client: str):
+    """SSE frames for a batch: "result" or "item_error" per item in completion order, then "done"."""
+
+    async def run_item(item):
+        trace = RequestTrace("gpt_response_batch")
+        outcome = "error"
+        try:
+            with trace.stage("prompt_build"):
+                deps = build_deps(item)
+            tips = await recommend(item, deps, trace, client)
+            outcome = trace.fields.get("served_from", "ok")
+            return tips, outcome
+        finally:
+            trace.finish(outcome)
+
+    def item_id(index: int):
+        item = items[index]
+        return item.get('id', index) if isinstance(item, dict) else index
+
+    succeeded = failed = 0
+    async for index, result, error in bounded_map(run_item, items, concurrency, timeout):
+        if error is None:
+            succeeded += 1
+            tips, source = result
+            yield sse_event("result", {"index": index, "id": item_id(index), "tips": tips, "source": source})
+        else:
+            failed += 1
+            payload = {"index": index, "id": item_id(index), "error": str(error)}
+            if isinstance(error, Overloaded):
+                payload["retry_after"] = error.retry_after
+            yield sse_event("item_error", payload)
+    yield sse_event("done", {"succeeded": succeeded, "failed": failed})
+
+
+def event_stream(frames) -> Response:
+    return Response(
+        frames,
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-agent = create_agent()
 
 @fetch_gpt_response_bp.route('/api/gpt_response', methods=['POST'])
 async def fetch_gpt_response():
+    trace = RequestTrace("gpt_response")
+    outcome = "error"
     try:
-        print("Python: Received GPT response request")
-        data = request.get_json()
-        context = data.get('field_context')
-        grid_raw  = data.get('gridData')
-        area_raw  = data.get('areaData')
-
-
-        print("Grid raw:")
-        print(grid_raw)
-        print("Area raw:")
-        print(area_raw)
-        print("\n")
-
-        '''
-        # reduce size of data for faster LLM processing
-        area_summary = summarize_area_list(area_raw)
-        grid_compact = compact_grid(grid_raw)
-
-        '''
-
-        deps = GPTDependencies(
-            context=context,
-            gridData=grid_raw,
-            areaData=area_raw,         
-            historical_context=HISTORICAL_DATA
-        )
-
-        '''
-        print("Grid compact:")
-        print(grid_compact)
-        print("Area summary:")
-        print(area_summary)
-        '''
-
-        gpt_out = await get_recommendations(agent, deps)
-
-        print("")
-        print("")
-        print("------GPT OUT:-----")
-        print(gpt_out)
-        print("")
-        print("")
-
-        return gpt_out.tips
+        with trace.stage("parse"):
+            data = request.get_json()
+        tips = await answer(data, trace, client_id())
+
+        outcome = trace.fields.get("served_from", "ok")
+        with trace.stage("serialize"):
+            response = jsonify(tips)
+        response.headers["X-Tips-Source"] = outcome
+        return response
+
+    except InvalidRequest as e:
+        outcome = "invalid"
+        return jsonify({"error": str(e)}), 400
+    except Overloaded as e:
+        outcome = "rejected"
+        return overloaded_response(e)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        trace.finish(outcome)
 
+
+@fetch_gpt_response_bp.route('/api/gpt_response/stream', methods=['POST'])
+def fetch_gpt_response_stream():
+    """
+    Same request body as /api/gpt_response, answered as server-sent events:
+    one "tip" event per finished tip, then a "done" event with the validated list
+    (or an "error" event).
+    """
+    trace = RequestTrace("gpt_response_stream")
+    client = client_id()
+    try:
+        with trace.stage("parse"):
+            data = request.get_json()
+        deps, cache_key, cached_tips = prepare_stream(data, trace, client)
+    except InvalidRequest as e:
+        trace.finish("invalid")
+        return jsonify({"error": str(e)}), 400
+    except Overloaded as e:
+        trace.finish("rejected")
+        return overloaded_response(e)
     except Exception as e:
+        trace.finish("error")
         return jsonify({"error": str(e)}), 500
 
+    if cached_tips is not None:
+        return event_stream(cached_frames(cached_tips, trace))
+    return event_stream(iterate_in_thread(lambda: stream_frames(deps, cache_key, trace, client)))
+
+@fetch_gpt_response_bp.route('/api/gpt_response/batch', methods=['POST'])
+def fetch_gpt_response_batch():
+    """
+    Tips for many fields in one request. Body: {"items": [...], "max_concurrency": n, "timeout": s},
+    where each item is a /api/gpt_response body (optionally with an "id"). Items run concurrently on
+    the shared agent, capped at GPT_BATCH_MAX_CONCURRENCY with a per-item timeout, and are answered as
+    server-sent events in completion order: "result" {index, id, tips, source} or "item_error"
+    {index, id, error[, retry_after]} per item, then "done" {succeeded, failed}. All items queue for
+    admission as the same client, so a large batch cannot crowd out other users.
+    """
+    try:
+        items, concurrency, timeout = parse_batch(request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    client = client_id()
+    return event_stream(iterate_in_thread(lambda: batch_frames(items, concurrency, timeout, client)))
+
+
 '''
 - Provide 5 green suggestions (actions to take, based on the numbers).
 - Provide 3 red avoid suggestions (actions to avoid, based on the numbers).
@@ -0,0 +1,37 @@
+import math
+
+from flask import Blueprint, request, jsonify
+
+grid_data_bp = Blueprint('grid_data', __name__)
+
+from backend.grid_store import MAX_AREA_RADIUS, get_grid_store
+
+
+def read_coordinates():
+    lat = request.args.get('lat', type=float)
+    lon = request.args.get('lon', type=float)
+    if lat is None or lon is None:
+        raise ValueError("lat and lon query parameters are required")
+    if not (math.isfinite(lat) and math.isfinite(lon)):
+        # float() accepts nan and inf, which have no nearest cell
+        raise ValueError("lat and lon must be finite numbers")
+    return lat, lon
+
+
+@grid_data_bp.route('/api/cell', methods=['GET'])
+def fetch_cell():
+    try:
+        lat, lon = read_coordinates()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(get_grid_store().cell(lat, lon))
+
+
+@grid_data_bp.route('/api/area', methods=['GET'])
+def fetch_area():
+    try:
+        lat, lon = read_coordinates()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    radius = min(max(request.args.get('radius', default=1, type=int), 0), MAX_AREA_RADIUS)
+    return jsonify(get_grid_store().area(lat, lon, radius))
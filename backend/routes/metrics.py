@@ -0,0 +1,11 @@
+from flask import Blueprint, Response
+
+metrics_bp = Blueprint('metrics', __name__)
+
+from backend.metrics import REGISTRY
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def fetch_metrics():
+    """Request latency histograms, token usage and cache counters in the Prometheus text format."""
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
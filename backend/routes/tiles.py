@@ -0,0 +1,85 @@
+import gzip
+import os
+
+from flask import Blueprint, Response, request, jsonify
+
+tiles_bp = Blueprint('tiles', __name__)
+
+from backend.metrics import REGISTRY
+from backend.tile_pyramid import DTYPES, STATS, current_pyramid, get_tile_pyramid
+
+# Tiles are keyed by the data version in their ETag, so caches can keep them for a while and
+# revalidate cheaply (304, no tile built) once max-age runs out
+TILE_MAX_AGE = int(os.getenv("TILE_MAX_AGE_SECONDS", "3600"))
+
+
+def tile_cache_events() -> dict:
+    pyramid = current_pyramid()
+    if pyramid is None:
+        return {}
+    return {("hit",): pyramid.hits, ("miss",): pyramid.misses, ("eviction",): pyramid.evictions}
+
+
+REGISTRY.callback(
+    "tile_cache_events_total", "Tile pyramid LRU lookups and evictions (reset when the grid is reloaded).",
+    tile_cache_events, ("event",), kind="counter")
+
+
+def read_list(name: str, allowed) -> list[str] | None:
+    raw = request.args.get(name)
+    if not raw:
+        return None
+    values = [v.strip() for v in raw.split(",") if v.strip()]
+    unknown = [v for v in values if v not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown {name}: {', '.join(unknown)}")
+    return values
+
+
+def cached(response: Response, etag: str) -> Response:
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = f"public, max-age={TILE_MAX_AGE}"
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+@tiles_bp.route('/api/tiles', methods=['GET'])
+def fetch_tileset():
+    """Pyramid metadata: zoom range, tile size, bands, and each level's geometry and tile counts."""
+    pyramid = get_tile_pyramid()
+    etag = pyramid.etag(-1, 0, 0, None, None, "")
+    if request.if_none_match.contains(etag):
+        return cached(Response(status=304), etag)
+    return cached(jsonify(pyramid.describe()), etag)
+
+
+@tiles_bp.route('/api/tiles/<int:z>/<int:x>/<int:y>', methods=['GET'])
+def fetch_tile(z: int, x: int, y: int):
+    """
+    One binary tile (encoding in backend/tile_pyramid.py). Optional query parameters:
+    bands and stats (comma-separated subsets, default all) and dtype (f4, or f2 for half the size).
+    """
+    pyramid = get_tile_pyramid()
+    try:
+        bands = read_list('bands', pyramid.store.band_index)
+        stats = read_list('stats', STATS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    dtype = request.args.get('dtype', 'f4')
+    if dtype not in DTYPES:
+        return jsonify({"error": f"dtype must be one of {', '.join(DTYPES)}"}), 400
+    if not pyramid.contains(z, x, y):
+        return jsonify({"error": f"No tile {z}/{x}/{y}; zoom levels are 0-{pyramid.max_zoom}"}), 404
+
+    compress = "gzip" in request.accept_encodings
+    etag = pyramid.etag(z, x, y, bands, stats, dtype) + ("-gz" if compress else "")
+    if request.if_none_match.contains(etag):
+        return cached(Response(status=304), etag)
+
+    body = pyramid.encode(z, x, y, bands, stats, dtype)
+    response = Response(body, mimetype="application/octet-stream")
+    if compress:
+        # Null-heavy (ocean) tiles shrink several-fold
+        response.set_data(gzip.compress(body, compresslevel=6))
+        response.headers["Content-Encoding"] = "gzip"
+    return cached(response, etag)
@@ -0,0 +1,52 @@
+import math
+import time
+
+from flask import Blueprint, request, jsonify
+
+timeseries_bp = Blueprint('timeseries', __name__)
+
+from backend.timeseries_store import get_timeseries_store
+
+RESAMPLE_SECONDS = {"hour": 3600, "day": 86400, "week": 7 * 86400, "month": 30 * 86400}
+
+
+@timeseries_bp.route('/api/timeseries', methods=['GET'])
+def fetch_timeseries():
+    """
+    History of one band at the cell nearest lat/lon.
+    Range: start/end as UNIX seconds, or the last `days` days (default 30).
+    resample=hour|day|week|month returns mean/min/max/count buckets instead of raw snapshots.
+    """
+    lat = request.args.get('lat', type=float)
+    lon = request.args.get('lon', type=float)
+    if lat is None or lon is None:
+        return jsonify({"error": "lat and lon query parameters are required"}), 400
+    if not (math.isfinite(lat) and math.isfinite(lon)):
+        return jsonify({"error": "lat and lon must be finite numbers"}), 400
+    band = request.args.get('band', 'total_precipitation')
+    resample = request.args.get('resample')
+    if resample is not None and resample not in RESAMPLE_SECONDS:
+        return jsonify({"error": f"resample must be one of {', '.join(RESAMPLE_SECONDS)}"}), 400
+
+    end = request.args.get('end', type=int)
+    start = request.args.get('start', type=int)
+    if start is None:
+        start = (end or int(time.time())) - request.args.get('days', default=30, type=int) * 86400
+
+    try:
+        store = get_timeseries_store()
+    except FileNotFoundError:
+        return jsonify({"error": "No time-series data has been fetched yet"}), 404
+    if band not in store.band_index:
+        return jsonify({"error": f"Unknown band {band}"}), 400
+
+    i, j = store.index_of(lat, lon)
+    response = {"band": band, "gridLat": store.lat0 + i * store.lat_step, "gridLon": store.lon0 + j * store.lon_step}
+    if resample:
+        response["buckets"] = store.aggregate(lat, lon, band, RESAMPLE_SECONDS[resample], start, end)
+    else:
+        times, values = store.cell_series(lat, lon, band, start, end)
+        response["points"] = [
+            {"t": int(t), "value": None if v != v else float(v)} for t, v in zip(times, values)
+        ]
+    return jsonify(response)
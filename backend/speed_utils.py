@@ -1,97 +1,221 @@
-'''
-# Utils to speed up LLM processing 
-# Not used as it damages the quality of AI suggestions
+"""
+Vectorized summaries of grid cells for prompts.
 
-from statistics import mean
-from typing import Iterable, Mapping, Any
+Cells arrive in either schema: ERA5 band names (gridData from the grid store, fetch_data.py output)
+or the dashboard's aliases (rain/temp/soil_moisture_*/cropSupport). They are gathered once into a
+(metric, cell) float64 matrix in prompt units, NaN where missing, and every statistic is then
+computed for all metrics at once.
 
-# Allow both schemas
+Units of the aliases differ by payload, so they are explicit arguments:
+    - areaData (getAreaDataForSuggestions, GridStore.area_for_prompt) carries raw ERA5 values under
+      rain/temp, i.e. metres/day and Kelvin.
+    - gridData built by getDataForLocation carries rain in mm/day and temp in °C.
+Temperatures are also checked by magnitude (anything above 150 is taken as Kelvin), since no
+field reading in °C gets there.
+"""
+
+from typing import Any, Iterable, Mapping
+
+import numpy as np
+
+# Prompt metric -> candidate source keys, in order of preference
 SUMMARY_SOURCES = {
-    "NDVI": ["NDVI"],
-    "total_precipitation": ["total_precipitation", "rain"],             # m/day OR mm
-    "mean_2m_air_temperature": ["mean_2m_air_temperature", "temp"],     # K OR °C
-    "volumetric_soil_water_layer_1": ["volumetric_soil_water_layer_1", "soil_moisture_1"],
-    "volumetric_soil_water_layer_2": ["volumetric_soil_water_layer_2", "soil_moisture_2"],
-    "cropland": ["cropland"],
+    "NDVI": ("NDVI", "ndvi"),
+    "temp_C": ("mean_2m_air_temperature", "temp"),
+    "precip_mm_day": ("total_precipitation", "rain"),
+    "soil_w1_pct": ("volumetric_soil_water_layer_1", "soil_moisture_1"),
+    "soil_w2_pct": ("volumetric_soil_water_layer_2", "soil_moisture_2"),
+    "cropland_pct": ("cropland", "cropSupport"),
 }
+METRICS = tuple(SUMMARY_SOURCES)
+SOURCE_KEYS = tuple(dict.fromkeys(k for keys in SUMMARY_SOURCES.values() for k in keys))
+
+# Decimal places each metric is reported with
+DECIMALS = {"NDVI": 3, "temp_C": 2, "precip_mm_day": 2, "soil_w1_pct": 1, "soil_w2_pct": 1, "cropland_pct": 1}
+
+RAIN_SCALES = {"m": 1000.0, "mm": 1.0}
+KELVIN_THRESHOLD = 150.0
+PERCENTILES = (10, 50, 90)
+
+
+def _num(v) -> float:
+    return float(v) if isinstance(v, (int, float)) and not isinstance(v, bool) else np.nan
+
+
+def _to_prompt_units(source: np.ndarray, rain_units: str) -> np.ndarray:
+    """(SOURCE_KEYS, n) raw values -> (METRICS, n) in prompt units, first present source winning."""
+    col = {key: source[i] for i, key in enumerate(SOURCE_KEYS)}
+    converted = {
+        "mean_2m_air_temperature": col["mean_2m_air_temperature"] - 273.15,
+        "temp": np.where(col["temp"] > KELVIN_THRESHOLD, col["temp"] - 273.15, col["temp"]),
+        "total_precipitation": col["total_precipitation"] * 1000.0,
+        "rain": col["rain"] * RAIN_SCALES[rain_units],
+        "volumetric_soil_water_layer_1": col["volumetric_soil_water_layer_1"] * 100.0,
+        "soil_moisture_1": col["soil_moisture_1"] * 100.0,
+        "volumetric_soil_water_layer_2": col["volumetric_soil_water_layer_2"] * 100.0,
+        "soil_moisture_2": col["soil_moisture_2"] * 100.0,
+        "cropland": col["cropland"] * 100.0,
+        "cropSupport": col["cropSupport"] * 100.0,
+    }
+    out = np.full((len(METRICS), source.shape[1]), np.nan)
+    for m, keys in enumerate(SUMMARY_SOURCES.values()):
+        for key in keys:
+            values = converted.get(key, col[key])
+            out[m] = np.where(np.isnan(out[m]), values, out[m])
+    return out
+
+
+def cells_to_columns(cells: Iterable[Mapping[str, Any]], rain_units: str = "m") -> np.ndarray:
+    """Area list in either schema -> (METRICS, n) matrix. rain_units is "m" for areaData, "mm" for gridData."""
+    cells = [c for c in cells if isinstance(c, Mapping)]
+    source = np.empty((len(SOURCE_KEYS), len(cells)))
+    for i, key in enumerate(SOURCE_KEYS):
+        values = [c.get(key) for c in cells]
+        try:
+            # NumPy turns None into NaN; anything non-numeric falls back to a per-value check
+            source[i] = np.array(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            source[i] = [_num(v) for v in values]
+    return _to_prompt_units(source, rain_units)
+
+
+def bands_to_columns(values: np.ndarray, bands: list[str]) -> np.ndarray:
+    """GridStore-style (band, ...) array -> (METRICS, n) matrix, flattening the spatial axes."""
+    flat = np.asarray(values, dtype=np.float64).reshape(len(bands), -1)
+    index = {band: i for i, band in enumerate(bands)}
+    source = np.full((len(SOURCE_KEYS), flat.shape[1]), np.nan)
+    for i, key in enumerate(SOURCE_KEYS):
+        if key in index:
+            source[i] = flat[index[key]]
+    return _to_prompt_units(source, "m")
 
-def _first_present_num(d: Mapping[str, Any], keys: list[str]) -> float | None:
-    for k in keys:
-        v = d.get(k)
-        if isinstance(v, (int, float)):
-            return float(v)
-    return None
-
-def summarize_area_list(area_list: Iterable[Mapping[str, Any]]) -> dict:
-    cells = [c for c in area_list if isinstance(c, dict)]
-    out = {"n_cells": len(cells), "metrics": {}}
-    if not cells:
+
+def summarize_columns(columns: np.ndarray, selected: np.ndarray | int | None = None,
+                      percentiles: tuple[int, ...] = PERCENTILES) -> dict:
+    """
+    Mean/min/max/percentiles of each metric row. selected is either a column index (that cell is
+    compared against the rest) or a separate (METRICS,) vector compared against every column;
+    its value, anomaly (selected - neighbour mean), z-score and percentile rank are added.
+    """
+    n_cells = columns.shape[1]
+    out = {"n_cells": n_cells, "metrics": {}}
+    if not n_cells:
         return out
 
-    for canonical, choices in SUMMARY_SOURCES.items():
-        vals: list[float] = []
-        for c in cells:
-            v = _first_present_num(c, choices)
-            if v is None:
-                continue
-            # Normalise units to canonical where needed:
-            if canonical == "mean_2m_air_temperature" and "temp" in choices and "temp" in c:
-                # value is °C; convert to K so stats are comparable
-                v = v + 273.15
-            if canonical == "total_precipitation" and "rain" in choices and "rain" in c:
-                # value is mm; convert to meters/day to match ERA5 canonical
-                v = v / 1000.0
-            vals.append(v)
-
-        if vals:
-            out["metrics"][canonical] = {
-                "mean": float(mean(vals)),
-                "min": float(min(vals)),
-                "max": float(max(vals)),
-                "count": len(vals),
-            }
+    valid = ~np.isnan(columns)
+    count = valid.sum(axis=1)
+    safe = np.maximum(count, 1)
+    mean = np.where(valid, columns, 0.0).sum(axis=1) / safe
+    std = np.sqrt(np.where(valid, (columns - mean[:, None]) ** 2, 0.0).sum(axis=1) / safe)
+    lo = np.where(valid, columns, np.inf).min(axis=1)
+    hi = np.where(valid, columns, -np.inf).max(axis=1)
+    pct = _percentiles(columns, count, percentiles)
+
+    if selected is not None:
+        if isinstance(selected, (int, np.integer)):
+            sel = columns[:, selected]
+            others = np.delete(columns, selected, axis=1)
+        else:
+            sel = np.asarray(selected, dtype=np.float64)
+            others = columns
+        other_valid = ~np.isnan(others)
+        other_count = other_valid.sum(axis=1)
+        other_safe = np.maximum(other_count, 1)
+        other_mean = np.where(other_valid, others, 0.0).sum(axis=1) / other_safe
+        other_std = np.sqrt(np.where(other_valid, (others - other_mean[:, None]) ** 2, 0.0).sum(axis=1) / other_safe)
+        anomaly = sel - other_mean
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = np.where(other_std > 0, anomaly / other_std, 0.0)
+        rank = np.where(other_valid, others < sel[:, None], False).sum(axis=1) / other_safe * 100.0
+
+    for m, name in enumerate(METRICS):
+        if not count[m]:
+            continue
+        digits = DECIMALS[name]
+        stats = {
+            "mean": round(float(mean[m]), digits),
+            "min": round(float(lo[m]), digits),
+            "max": round(float(hi[m]), digits),
+            "std": round(float(std[m]), digits),
+            **{f"p{q}": round(float(pct[k, m]), digits) for k, q in enumerate(percentiles)},
+            "count": int(count[m]),
+        }
+        if selected is not None and not np.isnan(sel[m]):
+            stats["selected"] = round(float(sel[m]), digits)
+            if other_count[m]:
+                stats["anomaly"] = round(float(anomaly[m]), digits)
+                stats["z"] = round(float(z[m]), 2)
+                stats["rank_pct"] = round(float(rank[m]), 1)
+        out["metrics"][name] = stats
     return out
 
 
-# Shrinks gridData so GPT can process faster
-def compact_grid(grid: dict) -> dict:
-    """Accepts either ERA5-like keys or your derived keys and normalises to compact form."""
-    def fnum(v):
-        return None if v is None else (float(v) if isinstance(v, (int, float)) else None)
-
-    # Temperature: prefer already-in-°C 'temp', else convert from Kelvin
-    temp_c = fnum(grid.get("temp"))
-    if temp_c is None:
-        K = fnum(grid.get("mean_2m_air_temperature"))
-        if K is not None:
-            temp_c = K - 273.15
-
-    # Precip: prefer already-in-mm 'rain', else convert from meters/day
-    precip_mm = fnum(grid.get("rain"))
-    if precip_mm is None:
-        m_per_day = fnum(grid.get("total_precipitation"))
-        if m_per_day is not None:
-            precip_mm = m_per_day * 1000.0
-
-    # Soil moisture: accept either volumetric_* or soil_moisture_*
-    w1 = fnum(grid.get("volumetric_soil_water_layer_1"))
-    if w1 is None:
-        w1 = fnum(grid.get("soil_moisture_1"))
-    w2 = fnum(grid.get("volumetric_soil_water_layer_2"))
-    if w2 is None:
-        w2 = fnum(grid.get("soil_moisture_2"))
-
-    # Cropland fraction (0..1) or already % somewhere else
-    cropland = fnum(grid.get("cropland"))
-
-    return {
-        "NDVI": fnum(grid.get("NDVI")),
-        "temp_C": None if temp_c is None else round(temp_c, 2),
-        "precip_mm_day": None if precip_mm is None else round(precip_mm, 2),
-        "soil_w1_pct": None if w1 is None else round(w1 * 100.0, 1),
-        "soil_w2_pct": None if w2 is None else round(w2 * 100.0, 1),
-        "cropland_pct": None if cropland is None else round(cropland * 100.0, 1),
-        "landcover": grid.get("landcover"),
-    }
+def _percentiles(columns: np.ndarray, count: np.ndarray, percentiles: tuple[int, ...]) -> np.ndarray:
+    """(len(percentiles), METRICS) linear-interpolated percentiles; one sort instead of nanpercentile's per-row work."""
+    ordered = np.sort(columns, axis=1)  # NaNs sort last, so each row's valid values are its first count entries
+    position = np.maximum(count - 1, 0)[None, :] * (np.asarray(percentiles, dtype=np.float64)[:, None] / 100.0)
+    below = np.floor(position).astype(np.int64)
+    above = np.minimum(below + 1, np.maximum(count - 1, 0)[None, :])
+    rows = np.arange(len(columns))[None, :]
+    lower, upper = ordered[rows, below], ordered[rows, above]
+    return lower + (upper - lower) * (position - below)
+
+
+def summarize_area_list(area_list: Iterable[Mapping[str, Any]], grid: Mapping[str, Any] | None = None,
+                        area_rain_units: str = "m", grid_rain_units: str = "mm") -> dict:
+    """Neighbourhood statistics for an areaData list, with the selected gridData compared against it."""
+    columns = cells_to_columns(area_list, area_rain_units)
+    selected = None if grid is None else cells_to_columns([grid], grid_rain_units)[:, 0]
+    return summarize_columns(columns, selected)
+
+
+def summarize_region(store, lat_min: float, lat_max: float, lon_min: float, lon_max: float,
+                     selected: tuple[float, float] | None = None) -> dict:
+    """Statistics for every GridStore cell inside a lat/lon box, read straight from the band array."""
+    i0, j0 = store.index_of(lat_min, lon_min)
+    i1, j1 = store.index_of(lat_max, lon_max)
+    window = store.values[:, min(i0, i1):max(i0, i1) + 1, min(j0, j1):max(j0, j1) + 1]
+    columns = bands_to_columns(window, store.bands)
+    sel = None
+    if selected is not None:
+        i, j = store.index_of(*selected)
+        sel = bands_to_columns(store.values[:, i:i + 1, j:j + 1], store.bands)[:, 0]
+    return summarize_columns(columns, sel)
 
-'''
\ No newline at end of file
+
+def neighbourhood_means(columns: np.ndarray, radius: int = 1) -> tuple[np.ndarray, np.ndarray]:
+    """
+    For a (METRICS, lat, lon) grid, the mean of each cell's (2r+1)^2 neighbourhood excluding the cell
+    itself, and the cell's anomaly against it, for every cell in one pass (edges use the cells present).
+    """
+    valid = ~np.isnan(columns)
+    values = np.where(valid, columns, 0.0)
+    pad = ((0, 0), (radius, radius), (radius, radius))
+    # Summed-area tables make every window sum four lookups
+    sums = np.pad(values, pad).cumsum(axis=1).cumsum(axis=2)
+    counts = np.pad(valid.astype(np.int64), pad).cumsum(axis=1).cumsum(axis=2)
+    sums = np.pad(sums, ((0, 0), (1, 0), (1, 0)))
+    counts = np.pad(counts, ((0, 0), (1, 0), (1, 0)))
+    w = 2 * radius + 1
+    n_lat, n_lon = columns.shape[1:]
+
+    def window(table):
+        return table[:, w:w + n_lat, w:w + n_lon] - table[:, :n_lat, w:w + n_lon] \
+            - table[:, w:w + n_lat, :n_lon] + table[:, :n_lat, :n_lon]
+
+    total = window(sums) - values
+    count = window(counts) - valid
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(count > 0, total / count, np.nan)
+    return mean, columns - mean
+
+
+def compact_grid(grid: Mapping[str, Any], rain_units: str = "mm") -> dict:
+    """One gridData cell in prompt units (rain in mm unless rain_units says otherwise)."""
+    values = cells_to_columns([grid], rain_units)[:, 0]
+    out = {
+        name: None if np.isnan(v) else round(float(v), DECIMALS[name])
+        for name, v in zip(METRICS, values)
+    }
+    out["landcover"] = grid.get("landcover")
+    return out
@@ -0,0 +1,30 @@
+import os
+
+# Set before any backend module reads its settings at import. The agent always runs on
+# StubLLM in these tests; building it still needs a provider key to be set.
+os.environ.setdefault("OPENAI_API_KEY", "unused-by-stub-model")
+os.environ.setdefault("PYDANTIC_AI_NO_BANNER", "1")
+os.environ["DATA_RELOAD_INTERVAL_SECONDS"] = "0"
+os.environ["APP_WARMUP"] = "off"
+
+import pytest
+
+import backend.routes.get_chatgpt_response as gpt_route
+from backend.ai_agent import create_agent
+from backend.benchmarks.harness import load_dataset, make_payloads
+from backend.benchmarks.stub_model import StubLLM
+
+
+@pytest.fixture
+def stub():
+    """Installs a StubLLM with 0.3s fixed latency as the route's agent, on an empty cache."""
+    model = StubLLM(0.3, "fixed")
+    gpt_route.agent.replace(lambda: create_agent(model.model))
+    gpt_route.recommendation_cache.clear()
+    yield model
+    gpt_route.recommendation_cache.clear()
+
+
+@pytest.fixture(scope="session")
+def payloads():
+    return make_payloads(load_dataset(), 32)
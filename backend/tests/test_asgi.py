@@ -0,0 +1,40 @@
+import asyncio
+import json
+
+import backend.routes.get_chatgpt_response as gpt_route
+from backend.asgi import create_asgi_app
+
+
+def test_disconnect_mid_batch_stops_remaining_calls(stub, payloads):
+    app = create_asgi_app(warmup="off", pooled_client=False)
+    body = json.dumps({"items": payloads[:16], "max_concurrency": 2}).encode()
+    scope = {"type": "http", "method": "POST", "path": "/api/gpt_response/batch", "client": ("127.0.0.1", 1),
+             "headers": [(b"content-type", b"application/json")]}
+
+    async def run() -> tuple[int, int]:
+        gone = asyncio.Event()
+        messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            await gone.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if b"event: result" in message.get("body", b""):
+                # The client leaves after its first result, with 15 items still to go
+                gone.set()
+
+        await asyncio.wait_for(app(scope, receive, send), 5)
+        # Items already handed to the background loop still reach the model and finish (their tips
+        # get cached); nothing may start after that
+        await asyncio.sleep(0.1)
+        calls = stub.calls
+        await asyncio.sleep(1.0)
+        return calls, stub.calls
+
+    at_disconnect, later = asyncio.run(run())
+    assert at_disconnect <= 4
+    assert later == at_disconnect
+    assert gpt_route.admission.stats()["in_flight"] == 0
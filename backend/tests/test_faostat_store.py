@@ -0,0 +1,24 @@
+import numpy as np
+
+from backend.faostat_store import FaostatStore
+
+
+def make_store(areas: list[str]) -> FaostatStore:
+    n = len(areas)
+    columns = {
+        "area": np.arange(n), "item": np.zeros(n, dtype=np.int64), "element": np.zeros(n, dtype=np.int64),
+        "unit": np.zeros(n, dtype=np.int64), "flag": np.zeros(n, dtype=np.int64),
+        "year": np.full(n, 2022, dtype=np.int16), "value": np.ones(n),
+    }
+    categories = {"area": areas, "item": ["Maize (corn)"], "element": ["Yield"], "unit": ["kg/ha"], "flag": ["A"]}
+    return FaostatStore(columns, categories)
+
+
+def test_areas_for_matches_whole_names_only():
+    store = make_store(["Niger", "Nigeria", "Oman", "Bolivia (Plurinational State of)"])
+
+    assert store.areas_for(None, None, "Maize fields in northern Nigeria") == ["Nigeria"]
+    assert store.areas_for(None, None, "Millet near Niamey, Niger.") == ["Niger"]
+    assert store.areas_for(None, None, "A woman farming in the Niger delta and Nigeria") == ["Niger", "Nigeria"]
+    assert store.areas_for(None, None, "Quinoa in Bolivia (Plurinational State of)") == [
+        "Bolivia (Plurinational State of)"]
@@ -0,0 +1,32 @@
+import asyncio
+import time
+
+import backend.routes.get_chatgpt_response as gpt_route
+from backend.fallback_tips import fallback_tips
+from backend.metrics import RequestTrace
+from backend.recommendation_cache import canonical_key
+from backend.request_deps import build_deps
+
+
+def test_late_result_is_not_overwritten_by_deadline_fallback(stub, payloads, monkeypatch):
+    stub.latency = 0.25
+    monkeypatch.setattr(gpt_route, "LLM_DEADLINE", 0.2)
+    monkeypatch.setattr(gpt_route, "KEEP_LATE_RESULTS", True)
+
+    def slow_fallback(grid, area):
+        # The model call finishes and caches its tips while the fallback is still being built
+        time.sleep(0.3)
+        return fallback_tips(grid, area)
+
+    monkeypatch.setattr(gpt_route, "fallback_tips", slow_fallback)
+    data = payloads[0]
+    deps = build_deps(data)
+    trace = RequestTrace("gpt_response")
+
+    tips = asyncio.run(gpt_route.recommend(data, deps, trace))
+
+    assert trace.fields["served_from"] == "fallback_deadline"
+    assert tips == fallback_tips(deps.gridData, deps.areaData)
+    cached_tips, source = gpt_route.recommendation_cache.get_entry(canonical_key(deps))
+    assert source is None
+    assert cached_tips != tips
@@ -0,0 +1,203 @@
+"""
+Multi-resolution tile pyramid over the grid store, served by /api/tiles/{z}/{x}/{y}.
+
+Levels run from z=0 (the whole grid in one tile) to max_zoom (native resolution). Each level
+halves the resolution of the one above it: a level-z cell aggregates a 2^(max_zoom - z) square
+block of native cells into its mean, min and max, ignoring nulls. Every tile is TILE_SIZE x
+TILE_SIZE level cells (edge tiles are smaller); x counts tile columns eastward from lon0 and y
+counts tile rows northward from lat0, matching the grid's own (lat, lon) indices.
+
+Tiles are built on first request straight from the native window they cover and kept in a small
+LRU, so a viewport only costs the tiles it shows. Tile encoding (little-endian, like gridfile):
+    8 bytes   magic b"ATILE001"
+    4 bytes   uint32 header length
+    n bytes   UTF-8 JSON header: z, x, y, lat0, lon0 (first cell centre), lat_step, lon_step,
+              n_lat, n_lon, bands, stats, dtype
+    padding   zero bytes up to the next 64-byte boundary
+    data      (stat, band, lat, lon) array of float32 ("f4") or float16 ("f2"); NaN = null
+"""
+
+import hashlib
+import json
+import math
+import os
+import struct
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+from backend.grid_store import GRID, GridStore, get_grid_store
+from backend.gridfile import ALIGNMENT
+
+MAGIC = b"ATILE001"
+TILE_SIZE = 64
+STATS = ("mean", "min", "max")
+DTYPES = {"f4": np.dtype("<f4"), "f2": np.dtype("<f2")}
+
+
+def _aggregate(window: np.ndarray, factor: int) -> np.ndarray:
+    """(band, lat, lon) native window -> (stat, band, lat / factor, lon / factor) mean/min/max."""
+    n_bands, n_lat, n_lon = window.shape
+    if factor == 1:
+        return np.broadcast_to(window, (len(STATS),) + window.shape)
+    pad_lat, pad_lon = -n_lat % factor, -n_lon % factor
+    if pad_lat or pad_lon:
+        window = np.pad(window, ((0, 0), (0, pad_lat), (0, pad_lon)), constant_values=np.nan)
+    blocks = window.reshape(n_bands, window.shape[1] // factor, factor, window.shape[2] // factor, factor)
+    present = ~np.isnan(blocks)
+    count = present.sum(axis=(2, 4))
+    total = np.where(present, blocks, 0).sum(axis=(2, 4), dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = (total / count).astype(np.float32)
+    # fmin/fmax skip NaN and give NaN only for all-null blocks, without nanmin's warnings
+    return np.stack([mean, np.fmin.reduce(blocks, axis=(2, 4)), np.fmax.reduce(blocks, axis=(2, 4))])
+
+
+class TilePyramid:
+    def __init__(self, store: GridStore, tile_size: int = TILE_SIZE, max_tiles: int = 256):
+        self.store = store
+        self.tile_size = tile_size
+        self.max_tiles = max_tiles
+        n_lat, n_lon = store.shape
+        self.max_zoom = max(math.ceil(math.log2(max(n_lat, n_lon) / tile_size)), 0)
+        self.version = self._fingerprint()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._tiles: OrderedDict[tuple[int, int, int], np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _fingerprint(self) -> str:
+        """Short hash of the grid geometry and values; changes whenever the data does."""
+        digest = hashlib.blake2b(digest_size=8)
+        store = self.store
+        digest.update(json.dumps([store.bands, store.lat0, store.lon0, store.lat_step, store.lon_step,
+                                  list(store.shape), self.tile_size]).encode("utf-8"))
+        for band in range(len(store.bands)):
+            digest.update(np.ascontiguousarray(store.values[band]).tobytes())
+        return digest.hexdigest()
+
+    def factor(self, z: int) -> int:
+        return 2 ** (self.max_zoom - z)
+
+    def level(self, z: int) -> dict:
+        """Geometry of level z: cell centres, steps, cell counts and tile counts."""
+        f = self.factor(z)
+        n_lat, n_lon = (-(-n // f) for n in self.store.shape)
+        offset = (f - 1) / 2
+        return {
+            "z": z,
+            "lat0": self.store.lat0 + offset * self.store.lat_step,
+            "lon0": self.store.lon0 + offset * self.store.lon_step,
+            "lat_step": self.store.lat_step * f,
+            "lon_step": self.store.lon_step * f,
+            "n_lat": n_lat,
+            "n_lon": n_lon,
+            "tiles_y": -(-n_lat // self.tile_size),
+            "tiles_x": -(-n_lon // self.tile_size),
+        }
+
+    def describe(self) -> dict:
+        return {
+            "version": self.version,
+            "tile_size": self.tile_size,
+            "min_zoom": 0,
+            "max_zoom": self.max_zoom,
+            "bands": self.store.bands,
+            "stats": list(STATS),
+            "dtypes": list(DTYPES),
+            "levels": [self.level(z) for z in range(self.max_zoom + 1)],
+        }
+
+    def contains(self, z: int, x: int, y: int) -> bool:
+        if not 0 <= z <= self.max_zoom:
+            return False
+        level = self.level(z)
+        return 0 <= x < level["tiles_x"] and 0 <= y < level["tiles_y"]
+
+    def tile(self, z: int, x: int, y: int) -> np.ndarray:
+        """(stat, band, lat, lon) float32 array for tile z/x/y, which must exist (see contains)."""
+        key = (z, x, y)
+        with self._lock:
+            tile = self._tiles.get(key)
+            if tile is not None:
+                self._tiles.move_to_end(key)
+                self.hits += 1
+                return tile
+            self.misses += 1
+
+        # Built outside the lock: coarse tiles scan large windows, and a duplicate build is harmless
+        f, span = self.factor(z), self.tile_size * self.factor(z)
+        window = self.store.values[:, y * span:(y + 1) * span, x * span:(x + 1) * span]
+        tile = _aggregate(np.array(window, dtype=np.float32), f)
+
+        with self._lock:
+            self._tiles[key] = tile
+            self._tiles.move_to_end(key)
+            while len(self._tiles) > self.max_tiles:
+                self._tiles.popitem(last=False)
+                self.evictions += 1
+        return tile
+
+    def encode(self, z: int, x: int, y: int, bands: list[str] | None = None, stats: list[str] | None = None,
+               dtype: str = "f4") -> bytes:
+        bands = bands or self.store.bands
+        stats = stats or list(STATS)
+        tile = self.tile(z, x, y)
+        data = tile[[STATS.index(s) for s in stats]][:, [self.store.band_index[b] for b in bands]]
+
+        level = self.level(z)
+        header = json.dumps({
+            "z": z, "x": x, "y": y,
+            "lat0": level["lat0"] + y * self.tile_size * level["lat_step"],
+            "lon0": level["lon0"] + x * self.tile_size * level["lon_step"],
+            "lat_step": level["lat_step"], "lon_step": level["lon_step"],
+            "n_lat": data.shape[2], "n_lon": data.shape[3],
+            "bands": bands, "stats": stats, "dtype": dtype,
+        }).encode("utf-8")
+        prefix = MAGIC + struct.pack("<I", len(header)) + header
+        padding = b"\0" * (-len(prefix) % ALIGNMENT)
+        return prefix + padding + np.ascontiguousarray(data, dtype=DTYPES[dtype]).tobytes()
+
+    def etag(self, z: int, x: int, y: int, bands: list[str] | None, stats: list[str] | None, dtype: str) -> str:
+        """Validator for an encoded tile, computable without building it."""
+        raw = json.dumps([self.version, z, x, y, bands, stats, dtype])
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=12).hexdigest()
+
+
+# One pyramid per loaded grid; when a reload replaces the grid, its pyramid and tile LRU go with it
+_pyramids: "weakref.WeakKeyDictionary[GridStore, TilePyramid]" = weakref.WeakKeyDictionary()
+_pyramids_lock = threading.Lock()
+
+
+def pyramid_for(store: GridStore) -> TilePyramid:
+    with _pyramids_lock:
+        pyramid = _pyramids.get(store)
+    if pyramid is None:
+        # Built outside the lock: fingerprinting a large grid must not hold up tiles of the current one
+        pyramid = TilePyramid(store, max_tiles=int(os.getenv("TILE_CACHE_MAX_TILES", "256")))
+        with _pyramids_lock:
+            pyramid = _pyramids.setdefault(store, pyramid)
+    return pyramid
+
+
+def get_tile_pyramid() -> TilePyramid:
+    """Pyramid over the current grid, created on the first tile request; TILE_CACHE_MAX_TILES bounds its LRU."""
+    return pyramid_for(get_grid_store())
+
+
+def current_pyramid() -> TilePyramid | None:
+    """The current grid's pyramid if tiles have been requested, without loading or building anything."""
+    if not GRID.loaded():
+        return None
+    with _pyramids_lock:
+        return _pyramids.get(get_grid_store())
+
+
+@GRID.warm
+def _warm_pyramid(store: GridStore):
+    # Tiles are in use, so have the new grid's pyramid ready before the swap
+    if current_pyramid() is not None:
+        pyramid_for(store)
@@ -0,0 +1,187 @@
+"""
+Append-only, chunked time-series store of grid snapshots with dimensions (time, lat, lon, band).
+
+Layout of a store directory:
+    meta.json          grid geometry, band names and snapshots per chunk
+    times.npy          int64 snapshot times (UNIX seconds, strictly increasing)
+    chunk_000000.npy   float32 (chunk_size, n_lat, n_lon, n_bands), NaN for missing values
+    chunk_000001.npy   ...
+
+Snapshot k lives in chunk k // chunk_size. A time-range query bisects times.npy and only
+memory-maps the chunks that overlap the range, so queries never scan every snapshot.
+"""
+
+import json
+import math
+import os
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+META_NAME = "meta.json"
+TIMES_NAME = "times.npy"
+DEFAULT_CHUNK_SIZE = 32
+# meta.json fields that place a snapshot's cells on the globe
+GEOMETRY = ("lat0", "lon0", "lat_step", "lon_step", "n_lat", "n_lon")
+DEFAULT_TIMESERIES_PATH = Path(__file__).parent / "gee" / "dataset" / "timeseries"
+
+
+class TimeSeriesStore:
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        self._times_version = None
+        self.refresh()
+
+    @classmethod
+    def create(cls, directory: str | Path, bands: list[str], lat0: float, lon0: float, lat_step: float,
+               lon_step: float, n_lat: int, n_lon: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> "TimeSeriesStore":
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "bands": list(bands), "lat0": lat0, "lon0": lon0, "lat_step": lat_step, "lon_step": lon_step,
+            "n_lat": n_lat, "n_lon": n_lon, "chunk_size": chunk_size,
+        }
+        _write_atomic(directory / META_NAME, lambda f: f.write(json.dumps(meta).encode("utf-8")))
+        _write_atomic(directory / TIMES_NAME, lambda f: np.save(f, np.empty(0, dtype=np.int64)))
+        return cls(directory)
+
+    @classmethod
+    def open_or_create(cls, directory: str | Path, **grid) -> "TimeSeriesStore":
+        """
+        Opens the store in directory, or creates it with grid's geometry. An existing store must have
+        the same geometry (origin, steps and size), or its snapshots would not line up with the new ones.
+        """
+        if not (Path(directory) / META_NAME).exists():
+            return cls.create(directory, **grid)
+        store = cls(directory)
+        mismatched = [
+            f"{name} {getattr(store, name)} != {grid[name]}"
+            for name in GEOMETRY if name in grid and not math.isclose(getattr(store, name), grid[name])
+        ]
+        if mismatched:
+            raise ValueError(f"Grid geometry does not match the store in {directory}: {', '.join(mismatched)}")
+        return store
+
+    def refresh(self):
+        """Re-reads metadata if another process has appended since the last read."""
+        times_path = self.directory / TIMES_NAME
+        stat = times_path.stat()
+        # times.npy is replaced on every append, so a new inode/mtime means new snapshots
+        version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if version == self._times_version:
+            return
+        with open(self.directory / META_NAME, encoding="utf-8") as f:
+            meta = json.load(f)
+        self.bands = meta["bands"]
+        self.band_index = {band: i for i, band in enumerate(self.bands)}
+        self.lat0, self.lon0 = meta["lat0"], meta["lon0"]
+        self.lat_step, self.lon_step = meta["lat_step"], meta["lon_step"]
+        self.n_lat, self.n_lon = meta["n_lat"], meta["n_lon"]
+        self.chunk_size = meta["chunk_size"]
+        self.times = np.load(times_path)
+        self._times_version = version
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def _chunk_path(self, chunk: int) -> Path:
+        return self.directory / f"chunk_{chunk:06d}.npy"
+
+    def _chunk(self, chunk: int, mode: str = "r") -> np.ndarray:
+        return np.load(self._chunk_path(chunk), mmap_mode=mode)
+
+    def append(self, timestamp: int, values: np.ndarray, bands: list[str]):
+        """
+        Appends one (band, lat, lon) snapshot, e.g. GridStore.values. Bands are matched by name;
+        bands the store does not know are ignored and missing ones stored as NaN.
+        """
+        self.refresh()
+        timestamp = int(timestamp)
+        if len(self.times) and timestamp <= self.times[-1]:
+            raise ValueError(f"Snapshot time {timestamp} is not after the last stored time {self.times[-1]}")
+        if values.shape[1:] != (self.n_lat, self.n_lon):
+            raise ValueError(f"Snapshot grid {values.shape[1:]} does not match store grid {(self.n_lat, self.n_lon)}")
+
+        snapshot = np.full((self.n_lat, self.n_lon, len(self.bands)), np.nan, dtype=np.float32)
+        for b, band in enumerate(bands):
+            if band in self.band_index:
+                snapshot[:, :, self.band_index[band]] = values[b]
+
+        k = len(self.times)
+        chunk, slot = divmod(k, self.chunk_size)
+        if slot == 0:
+            data = np.lib.format.open_memmap(
+                self._chunk_path(chunk), mode="w+", dtype=np.float32,
+                shape=(self.chunk_size, self.n_lat, self.n_lon, len(self.bands)),
+            )
+            data[:] = np.nan
+        else:
+            data = self._chunk(chunk, mode="r+")
+        data[slot] = snapshot
+        data.flush()
+        del data
+
+        # Committing the new times array last makes the snapshot visible atomically
+        times = np.append(self.times, np.int64(timestamp))
+        _write_atomic(self.directory / TIMES_NAME, lambda f: np.save(f, times))
+        self.refresh()
+
+    def index_of(self, lat: float, lon: float) -> tuple[int, int]:
+        i = min(max(round((lat - self.lat0) / self.lat_step), 0), self.n_lat - 1)
+        j = min(max(round((lon - self.lon0) / self.lon_step), 0), self.n_lon - 1)
+        return i, j
+
+    def cell_series(self, lat: float, lon: float, band: str, start: int | None = None,
+                    end: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """(times, values) of one band at the cell nearest (lat, lon), for start <= t <= end."""
+        self.refresh()
+        b = self.band_index[band]
+        i, j = self.index_of(lat, lon)
+        lo = 0 if start is None else int(np.searchsorted(self.times, start, side="left"))
+        hi = len(self.times) if end is None else int(np.searchsorted(self.times, end, side="right"))
+        if lo >= hi:
+            return self.times[:0], np.empty(0, dtype=np.float32)
+
+        parts = []
+        for chunk in range(lo // self.chunk_size, (hi - 1) // self.chunk_size + 1):
+            first = max(lo - chunk * self.chunk_size, 0)
+            last = min(hi - chunk * self.chunk_size, self.chunk_size)
+            parts.append(np.array(self._chunk(chunk)[first:last, i, j, b]))
+        return self.times[lo:hi], np.concatenate(parts)
+
+    def aggregate(self, lat: float, lon: float, band: str, bucket_seconds: int, start: int | None = None,
+                  end: int | None = None) -> list[dict]:
+        """Downsamples a cell series into fixed buckets: mean/min/max/count of the non-NaN values."""
+        times, values = self.cell_series(lat, lon, band, start, end)
+        valid = ~np.isnan(values)
+        times, values = times[valid], values[valid].astype(np.float64)
+        if not len(times):
+            return []
+
+        origin = times[0] if start is None else start
+        buckets = (times - origin) // bucket_seconds
+        edges = np.flatnonzero(np.diff(buckets)) + 1
+        starts = np.concatenate(([0], edges))
+        sums = np.add.reduceat(values, starts)
+        counts = np.diff(np.append(starts, len(values)))
+        mins = np.minimum.reduceat(values, starts)
+        maxs = np.maximum.reduceat(values, starts)
+        return [
+            {"t": int(origin + buckets[s] * bucket_seconds), "mean": float(total / n),
+             "min": float(lo), "max": float(hi), "count": int(n)}
+            for s, total, n, lo, hi in zip(starts, sums, counts, mins, maxs)
+        ]
+
+
+@lru_cache(maxsize=1)
+def get_timeseries_store() -> TimeSeriesStore:
+    """Opens the store named by TIMESERIES_PATH (default gee/dataset/timeseries) on first use."""
+    return TimeSeriesStore(os.getenv("TIMESERIES_PATH") or DEFAULT_TIMESERIES_PATH)
+
+
+def _write_atomic(path: Path, write):
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
@@ -0,0 +1,9 @@
+import math
+
+# Rough characters-per-token ratio for OpenAI tokenizers on English/JSON text
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for prompt budgeting; avoids loading a tokenizer per request."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
@@ -3,7 +3,7 @@ import "leaflet/dist/leaflet.css";
 import "bootstrap/dist/css/bootstrap.min.css";
 import "bootstrap/dist/js/bootstrap.bundle.min.js";
 
-import { fetchChatGPTResponse } from "../services/api.js";
+import { streamChatGPTResponse } from "../services/api.js";
 import "../utils/chartSetup";
 import { getAreaGridData, getDataForLocation } from "../utils/dataHelpers";
 import {
@@ -171,7 +171,7 @@ export default function AgriDashboard() {
   }
     setAiTips(["Loading..."]);
     const areaData = getAreaDataForSuggestions(data.gridLat, data.gridLon, dataset);
-    const tips = await fetchChatGPTResponse(context, data, areaData);
+    const tips = await streamChatGPTResponse(context, data, areaData, setAiTips);
     setAiTips(tips);
   };
 
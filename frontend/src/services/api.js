@@ -33,4 +33,60 @@ export const fetchChatGPTResponse = async (field_context, gridData, areaData) =>
     console.error('Error fetching GPT response:', error);
     return ["Error fetching AI suggestions."];
   }
-};
\ No newline at end of file
+};
+
+// Streams tips from the SSE endpoint, calling onTip(tips) with the list so far after every event
+export const streamChatGPTResponse = async (field_context, gridData, areaData, onTip) => {
+  console.log("Calling backend GPT streaming route");
+
+  try {
+    const response = await fetch(`${API_BASE_URL}/api/gpt_response/stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({
+        field_context,
+        gridData,
+        areaData
+      }),
+    });
+
+    if (!response.ok || !response.body) {
+      throw new Error('Network response was not ok');
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    let tips = [];
+
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      const events = buffer.split("\n\n");
+      buffer = events.pop();
+      for (const raw of events) {
+        const event = raw.match(/^event: (.*)$/m)?.[1];
+        const data = JSON.parse(raw.match(/^data: (.*)$/m)?.[1] || "{}");
+        if (event === "tip") {
+          tips = [...tips, data.tip];
+          onTip(tips);
+        } else if (event === "done") {
+          tips = data.tips;
+          onTip(tips);
+        } else if (event === "error") {
+          throw new Error(data.error);
+        }
+      }
+    }
+
+    return tips;
+
+  } catch (error) {
+    console.error('Error streaming GPT response:', error);
+    return ["Error fetching AI suggestions."];
+  }
+};